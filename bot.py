@@ -10,6 +10,8 @@ from dotenv import load_dotenv
 import asyncio
 import threading
 
+from utils.scheduler import JobScheduler
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
@@ -28,6 +30,8 @@ class SharkBot(commands.Bot):
             intents=intents,
             application_id=os.getenv('DISCORD_APP_ID')
         )
+        self.scheduler = JobScheduler()  # Agendador central das tarefas dos cogs
+        self.dashboard_mode = 'thread'   # Definido no main (os cogs ajustam os pollings de fallback)
         self.initial_extensions = [
             'cogs.auto_setup',  # Deve ser carregado primeiro para setup automático
             'cogs.profile',
@@ -40,12 +44,17 @@ class SharkBot(commands.Bot):
             'cogs.events',
             'cogs.shop',
             'cogs.notifications',  # Processa notificações do Dashboard
+            'cogs.expirations',    # Agenda de expirações (boosters, VIP, eventos, calls, missões)
         ]
     
     async def setup_hook(self):
         """Configuração inicial do bot"""
         print("🦈 Iniciando SharkClub Bot...")
         
+        # Conecta o barramento da Dashboard (mesmo processo) ao loop do bot
+        from database.change_feed import dashboard_bus
+        dashboard_bus.attach(asyncio.get_running_loop())
+        
         # Carrega cogs
         for ext in self.initial_extensions:
             try:
@@ -75,6 +84,9 @@ class SharkBot(commands.Bot):
     
     async def on_ready(self):
         """Evento quando o bot está pronto"""
+        # Inicia os jobs dos cogs (startup ordenado por dependências)
+        self.scheduler.start()
+        
         print("🔄 Sincronizando comandos...")
         
         # Sincroniza comandos APENAS por servidor (sem duplicação global)
@@ -155,11 +167,29 @@ async def main():
         print("   Execute o SQL disponível em database/connection.py")
         print("   no SQL Editor do Supabase Dashboard.\n")
     
-    # Inicia a Dashboard em thread separada
+    # Inicia a Dashboard
+    # DASHBOARD_MODE=process -> processo separado (gunicorn, recomendado em produção)
+    # DASHBOARD_MODE=thread  -> thread no processo do bot (servidor de desenvolvimento do Flask)
+    # DASHBOARD_MODE=off     -> não inicia a Dashboard
+    dashboard_mode = os.getenv('DASHBOARD_MODE', 'thread').lower()
+    dashboard_port = int(os.getenv('DASHBOARD_PORT', 5000))
+    dashboard_process = None
+    
+    if dashboard_mode == 'process':
+        from dashboard.launcher import DashboardProcess
+        if DashboardProcess.is_supported():
+            dashboard_process = DashboardProcess(
+                port=dashboard_port,
+                workers=int(os.getenv('DASHBOARD_WORKERS', 2))
+            )
+            dashboard_process.start()
+        else:
+            print("⚠️ gunicorn não instalado - Dashboard volta para o modo thread")
+            dashboard_mode = 'thread'
+    
     def run_dashboard():
         try:
             from dashboard.app import app
-            dashboard_port = int(os.getenv('DASHBOARD_PORT', 5000))
             print(f"🌐 Dashboard iniciando na porta {dashboard_port}...")
             # Desabilita logs do werkzeug para não poluir console
             import logging
@@ -169,22 +199,43 @@ async def main():
         except Exception as e:
             print(f"❌ Erro ao iniciar Dashboard: {e}")
     
-    dashboard_thread = threading.Thread(target=run_dashboard, daemon=True)
-    dashboard_thread.start()
-    print("✅ Dashboard thread iniciada!")
+    if dashboard_mode == 'thread':
+        dashboard_thread = threading.Thread(target=run_dashboard, daemon=True)
+        dashboard_thread.start()
+        print("✅ Dashboard thread iniciada!")
     
     # Inicia o bot
     bot = SharkBot()
+    bot.dashboard_mode = dashboard_mode
     
     # Configura handler de erro global
     await setup_global_error_handler(bot)
     
+    # SIGTERM (parada da hospedagem) fecha o bot e a Dashboard de forma graciosa
+    try:
+        import signal
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+    except (NotImplementedError, AttributeError):
+        pass  # Windows
+    
+    # Health check da Dashboard em processo separado (reinicia se cair)
+    if dashboard_process:
+        import config
+        from utils.scheduler import Interval
+        bot.scheduler.add_job('dashboard_health', dashboard_process.check_health,
+                              Interval(config.DASHBOARD_HEALTH_INTERVAL))
+    
     try:
         await bot.start(token)
     except discord.LoginFailure:
         print("❌ Token inválido! Verifique seu DISCORD_TOKEN no .env")
     except Exception as e:
         print(f"❌ Erro ao iniciar bot: {e}")
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+        if dashboard_process:
+            dashboard_process.stop()
 
 
 if __name__ == "__main__":
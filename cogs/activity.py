@@ -3,6 +3,7 @@
 Sistema de monitoramento de atividade e avaliação de membros com estrelas e comentários
 """
 
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -306,6 +307,16 @@ class ActivityCog(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Execução única no startup: cooldowns de avaliação passam a ser verificados em memória
+        bot.scheduler.add_job('evaluation_cooldowns', self.warm_evaluation_cooldowns)
+    
+    def cog_unload(self):
+        self.bot.scheduler.remove_job('evaluation_cooldowns')
+    
+    async def warm_evaluation_cooldowns(self):
+        """Carrega as avaliações da janela de cooldown em uma consulta"""
+        loaded = await asyncio.to_thread(EvaluationQueries.warm_cooldowns, config.EVALUATION_COOLDOWN_HOURS)
+        print(f"⭐ Cooldowns de avaliação carregados ({loaded} avaliações recentes)")
     
     def is_admin(self, interaction: discord.Interaction) -> bool:
         """Verifica se o usuário é admin"""
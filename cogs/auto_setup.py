@@ -3,11 +3,17 @@
 Sistema de configuração automática de cargos e canais
 """
 
+import asyncio
+import time
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
-from typing import Optional, Dict, List
+from discord.ext import commands
+from typing import Optional, Dict, List, Tuple
 import config
+from utils.rate_limiter import RateLimiter
+from utils.role_manager import LevelRoleIndex, RoleManager
+from utils.role_sync import RoleSyncEngine
+from utils.scheduler import Interval
 
 
 class AutoSetupCog(commands.Cog):
@@ -17,15 +23,29 @@ class AutoSetupCog(commands.Cog):
         self.bot = bot
         self._level_roles: Dict[int, discord.Role] = {}  # Cache de roles por nível
         self._channels: Dict[str, discord.TextChannel] = {}  # Cache de canais
+        self._role_managers: Dict[int, RoleManager] = {}  # Gerenciador de cargos por servidor
+        self._role_sync: Dict[int, RoleSyncEngine] = {}  # Sync de cargos por servidor
+        self._level_up_queue: Dict[Tuple[int, int], dict] = {}  # (guild_id, member_id) -> level up pendente
+        self._level_up_limiter = RateLimiter(config.LEVEL_UP_MAX_MESSAGES, config.LEVEL_UP_WINDOW_SECONDS)
         self._setup_complete = False
+        
+        # Jobs no agendador central (os demais cogs dependem de 'setup_guilds')
+        bot.scheduler.add_job('setup_guilds', self.setup_all_guilds)
+        bot.scheduler.add_job('level_up_flush', self.flush_level_ups,
+                              Interval(config.LEVEL_UP_FLUSH_INTERVAL), after=['setup_guilds'])
+        bot.scheduler.add_job('role_sync', self.periodic_role_sync,
+                              Interval(300), after=['setup_guilds'], jitter=config.JOB_JITTER_SECONDS)
     
     def cog_unload(self):
-        """Para a task quando o cog é descarregado"""
-        self.periodic_role_sync.cancel()
+        """Remove os jobs do agendador quando o cog é descarregado"""
+        for name in ('setup_guilds', 'level_up_flush', 'role_sync'):
+            self.bot.scheduler.remove_job(name)
+        for engine in self._role_sync.values():
+            if engine.running:
+                engine._task.cancel()
     
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """Executa setup automático quando o bot inicia"""
+    async def setup_all_guilds(self):
+        """Executa setup automático quando o bot inicia (job de startup)"""
         print("🔧 Iniciando configuração automática...")
         
         for guild in self.bot.guilds:
@@ -33,28 +53,14 @@ class AutoSetupCog(commands.Cog):
         
         self._setup_complete = True
         print("✅ Configuração automática concluída!")
-        
-        # Inicia a task de sincronização periódica
-        if not self.periodic_role_sync.is_running():
-            self.periodic_role_sync.start()
-            print("🔄 Task de sincronização periódica iniciada (a cada 5 min)")
     
-    @tasks.loop(minutes=5)
     async def periodic_role_sync(self):
-        """Sincroniza cargos de todos os membros periodicamente (apenas servidores pequenos)"""
+        """Sincroniza cargos de todos os membros periodicamente (em segundo plano, com rate limit)"""
         if not self._setup_complete:
             return
         
         for guild in self.bot.guilds:
-            # Pula servidores grandes - cargos são sincronizados sob demanda
-            member_count = len([m for m in guild.members if not m.bot])
-            if member_count < 50:
-                await self.auto_sync_member_roles(guild, silent=True)
-    
-    @periodic_role_sync.before_loop
-    async def before_periodic_sync(self):
-        """Aguarda o bot estar pronto antes de iniciar"""
-        await self.bot.wait_until_ready()
+            self.get_role_sync(guild).start()
     
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
@@ -75,60 +81,39 @@ class AutoSetupCog(commands.Cog):
         # 3. Configurar permissões
         await self.setup_permissions(guild)
         
-        # 4. Sincronizar cargos apenas para servidores pequenos (< 50 membros)
-        # Para servidores grandes, os cargos são sincronizados sob demanda
-        member_count = len([m for m in guild.members if not m.bot])
-        if member_count < 50:
-            await self.auto_sync_member_roles(guild)
-        else:
-            print(f"  ⏭️ Sincronização de cargos adiada (servidor grande: {member_count} membros)")
+        # 4. Sincronizar cargos em segundo plano (qualquer tamanho de servidor)
+        self.get_role_sync(guild).start()
+        print(f"  🔄 Sincronização de cargos iniciada em segundo plano")
         
         print(f"✅ Servidor {guild.name} configurado!")
     
-    async def auto_sync_member_roles(self, guild: discord.Guild, silent: bool = False):
-        """Sincroniza cargos de nível de todos os membros automaticamente (OTIMIZADO)"""
-        from database.queries import UserQueries
-        
-        if not silent:
-            print(f"  🔄 Sincronizando cargos dos membros...")
-        synced = 0
-        
-        # OTIMIZAÇÃO: Busca todos os usuários de uma vez (1 request em vez de N)
-        all_users = UserQueries.get_all_users()
-        user_levels = {u['user_id']: u.get('level', 1) for u in all_users}
-        
-        for member in guild.members:
-            if member.bot:
-                continue
-            
-            # Usa lookup no dicionário em vez de chamada HTTP
-            level = user_levels.get(member.id)
-            if level:
-                # Verifica se já tem o cargo correto
-                current_role = self.get_member_level_from_roles(member)
-                if current_role != level:
-                    success = await self.assign_level_role(member, level)
-                    if success:
-                        synced += 1
-                        if not silent:
-                            print(f"    ✅ {member.display_name} -> Nível {level}")
-        
-        if not silent:
-            if synced > 0:
-                print(f"  ✅ {synced} membros sincronizados!")
-            else:
-                print(f"  ✅ Todos os cargos já estão sincronizados!")
-        elif synced > 0:
-            print(f"🔄 Sync periódico: {synced} membros atualizados")
+    def get_role_sync(self, guild: discord.Guild) -> RoleSyncEngine:
+        """Retorna o motor de sincronização de cargos do servidor (um por servidor)"""
+        engine = self._role_sync.get(guild.id)
+        if engine is None:
+            engine = RoleSyncEngine(guild, self.get_member_level_from_roles, self.assign_level_role)
+            self._role_sync[guild.id] = engine
+        return engine
     
     def get_member_level_from_roles(self, member: discord.Member) -> int:
-        """Retorna o nível do membro baseado nos cargos que tem"""
-        for level in range(10, 0, -1):
-            cargo_name = config.CARGO_NAMES.get(level)
-            for role in member.roles:
-                if role.name == cargo_name:
-                    return level
-        return 0  # Não tem nenhum cargo de nível
+        """Retorna o nível do membro baseado nos cargos que tem (0 se não tiver cargo de nível)"""
+        return LevelRoleIndex.get_member_level(member)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        """Reconstrói o índice de cargos de nível quando um cargo é criado"""
+        LevelRoleIndex.rebuild(role.guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """Reconstrói o índice se um cargo foi renomeado"""
+        if before.name != after.name:
+            LevelRoleIndex.rebuild(after.guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Reconstrói o índice quando um cargo é removido"""
+        LevelRoleIndex.rebuild(role.guild)
     
     # ═══════════════════════════════════════════════════════════════
     # SISTEMA DE CARGOS
@@ -143,6 +128,8 @@ class AutoSetupCog(commands.Cog):
             if role:
                 self._level_roles[level] = role
         
+        LevelRoleIndex.rebuild(guild)
+        
         # Cargo VIP
         await self.get_or_create_role(
             guild, 
@@ -208,35 +195,25 @@ class AutoSetupCog(commands.Cog):
             print(f"    ❌ Erro ao criar cargo {name}: {e}")
             return None
     
+    def get_role_manager(self, guild: discord.Guild) -> RoleManager:
+        """Retorna o gerenciador de cargos do servidor (um por servidor, com cache de cargos)"""
+        manager = self._role_managers.get(guild.id)
+        if manager is None:
+            manager = RoleManager(guild)
+            self._role_managers[guild.id] = manager
+        return manager
+    
     async def assign_level_role(self, member: discord.Member, new_level: int) -> bool:
-        """Atribui cargo de nível a um membro (remove cargos anteriores)"""
-        guild = member.guild
+        """
+        Atribui cargo de nível a um membro (troca os cargos de nível numa única edição).
+        Rate limit (HTTP 429) é propagado: o sync de cargos recua e tenta o mesmo membro de novo.
+        """
+        result = await self.get_role_manager(member.guild).update_member_role(member, new_level)
         
-        try:
-            # Remove todos os cargos de nível anteriores
-            roles_to_remove = []
-            for level in range(1, 11):
-                if level != new_level:
-                    role = await self.get_or_create_level_role(guild, level)
-                    if role and role in member.roles:
-                        roles_to_remove.append(role)
-            
-            if roles_to_remove:
-                await member.remove_roles(*roles_to_remove, reason=f"SharkClub - Subiu para nível {new_level}")
-            
-            # Adiciona o cargo do novo nível
-            new_role = await self.get_or_create_level_role(guild, new_level)
-            if new_role and new_role not in member.roles:
-                await member.add_roles(new_role, reason=f"SharkClub - Alcançou nível {new_level}")
-                return True
-            
-            return True
-        except discord.Forbidden:
-            print(f"❌ Sem permissão para atribuir cargo a {member.display_name}")
-            return False
-        except Exception as e:
-            print(f"❌ Erro ao atribuir cargo: {e}")
-            return False
+        if not result['success']:
+            print(f"❌ Erro ao atribuir cargo a {member.display_name}: {result['error']}")
+        
+        return result['success']
     
     # ═══════════════════════════════════════════════════════════════
     # SISTEMA DE CANAIS (USANDO IDs FIXOS)
@@ -354,39 +331,105 @@ class AutoSetupCog(commands.Cog):
     @app_commands.command(name="sync-cargos", description="[ADMIN] Sincronizar cargos de todos os membros")
     @is_admin()
     async def sync_cargos(self, interaction: discord.Interaction):
-        """Sincroniza cargos de nível de todos os membros"""
+        """Sincroniza cargos de nível de todos os membros (em segundo plano, com progresso)"""
         await interaction.response.defer(ephemeral=True)
         
-        from database.queries import UserQueries
+        engine = self.get_role_sync(interaction.guild)
+        if engine.running:
+            embed = discord.Embed(
+                title="⏳ Sincronização em andamento",
+                description=f"{engine.processed}/{engine.total} membros processados.",
+                color=config.EMBED_COLOR_WARNING
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
         
-        synced = 0
-        errors = 0
+        message = await interaction.followup.send(
+            embed=discord.Embed(
+                title="🔄 Sincronizando cargos...",
+                description="Comparando níveis salvos com os cargos atuais.",
+                color=config.EMBED_COLOR_PRIMARY
+            ),
+            ephemeral=True,
+            wait=True
+        )
         
-        for member in interaction.guild.members:
-            if member.bot:
-                continue
-            
-            user_data = UserQueries.get_user(member.id)
-            if user_data:
-                level = user_data.get('level', 1)
-                success = await self.assign_level_role(member, level)
-                if success:
-                    synced += 1
-                else:
-                    errors += 1
+        async def report_progress(engine: RoleSyncEngine):
+            finished = not engine.pending
+            embed = discord.Embed(
+                title="✅ Sincronização Completa!" if finished else "🔄 Sincronizando cargos...",
+                description=f"{engine.processed}/{engine.total} membros processados.\n"
+                           f"Cargos sincronizados para {engine.synced} membros.",
+                color=config.EMBED_COLOR_SUCCESS if finished else config.EMBED_COLOR_PRIMARY
+            )
+            if engine.failed > 0:
+                embed.add_field(name="⚠️ Erros", value=f"{engine.failed} membros não puderam ser atualizados")
+            try:
+                await message.edit(embed=embed)
+            except discord.HTTPException:
+                pass  # Token da interação expira após 15 min; o sync continua
+        
+        engine.start(report_progress)
+    
+    @app_commands.command(name="recalcular-niveis", description="[ADMIN] Recalcular o nível de todos os usuários após mudar a curva de XP")
+    @app_commands.describe(aplicar="Se falso, apenas simula e mostra quantos usuários mudariam de nível")
+    @is_admin()
+    async def recalcular_niveis(self, interaction: discord.Interaction, aplicar: bool = False):
+        """Recalcula níveis em lote a partir do XP e sincroniza os cargos afetados"""
+        await interaction.response.defer(ephemeral=True)
+        
+        from utils.level_recompute import LevelRecompute
+        
+        # Roda fora do event loop para não travar o bot em bases grandes
+        report = await asyncio.to_thread(LevelRecompute.run, not aplicar)
+        
+        if aplicar and report['changes']:
+            # Os cargos são ajustados em segundo plano pelo sync (fila replanejada com os novos níveis)
+            self.get_role_sync(interaction.guild).start(replan=True)
         
         embed = discord.Embed(
-            title="✅ Sincronização Completa!",
-            description=f"Cargos sincronizados para {synced} membros.",
-            color=config.EMBED_COLOR_SUCCESS
+            title="✅ Níveis Recalculados!" if aplicar else "🔍 Simulação de Recalculo de Níveis",
+            description=f"{report['total']} usuários analisados.",
+            color=config.EMBED_COLOR_SUCCESS if aplicar else config.EMBED_COLOR_PRIMARY
         )
-        if errors > 0:
-            embed.add_field(name="⚠️ Erros", value=f"{errors} membros não puderam ser atualizados")
+        embed.add_field(name="⬆️ Sobem", value=str(report['up']), inline=True)
+        embed.add_field(name="⬇️ Descem", value=str(report['down']), inline=True)
+        embed.add_field(name="➖ Sem mudança", value=str(report['unchanged']), inline=True)
+        if aplicar:
+            embed.add_field(name="💾 Atualizados", value=str(report['updated']), inline=True)
+            embed.add_field(name="🎭 Cargos", value="Sincronização iniciada (acompanhe com /sync-cargos)", inline=True)
+        else:
+            embed.set_footer(text="Use aplicar:True para gravar os novos níveis e sincronizar os cargos")
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
+    @app_commands.command(name="agendador", description="[ADMIN] Ver status e métricas das tarefas agendadas")
+    @is_admin()
+    async def agendador(self, interaction: discord.Interaction):
+        """Mostra execuções, falhas, overruns e duração de cada job do agendador"""
+        embed = discord.Embed(
+            title="⏱️ Agendador de Tarefas",
+            color=config.EMBED_COLOR_PRIMARY
+        )
+        
+        for stats in self.bot.scheduler.stats():
+            status = "🔄 Rodando" if stats['running'] else "💤 Aguardando"
+            next_run = f"<t:{int(stats['next_run_at'])}:R>" if stats['next_run_at'] else "—"
+            value = (
+                f"{status} • Próxima: {next_run}\n"
+                f"Execuções: **{stats['runs']}** • Falhas: **{stats['failures']}** • Overruns: **{stats['overruns']}**\n"
+                f"Duração: última {stats['last_duration']:.2f}s • média {stats['avg_duration']:.2f}s • máx {stats['max_duration']:.2f}s"
+            )
+            if stats['last_error']:
+                value += f"\n⚠️ `{stats['last_error'][:80]}`"
+            embed.add_field(name=stats['name'], value=value, inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @setup_command.error
     @sync_cargos.error
+    @recalcular_niveis.error
+    @agendador.error
     async def admin_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         if isinstance(error, app_commands.CheckFailure):
             embed = discord.Embed(
@@ -433,12 +476,117 @@ class AutoSetupCog(commands.Cog):
             except:
                 pass
     
+    async def send_level_up_batch(self, guild: discord.Guild, entries: List[dict]):
+        """Envia vários level ups num único embed (respeitando o rate limit do canal)"""
+        if len(entries) == 1:
+            entry = entries[0]
+            await self._level_up_limiter.acquire()
+            await self.send_level_up_notification(guild, entry['member'], entry['old_level'], entry['new_level'])
+            return
+        
+        channel_id = config.CHANNEL_IDS.get("level_ups")
+        channel = guild.get_channel(channel_id)
+        
+        if not channel:
+            print(f"⚠️ Canal de level-ups não encontrado (ID: {channel_id})")
+            return
+        
+        batch_size = config.LEVEL_UP_BATCH_SIZE
+        for i in range(0, len(entries), batch_size):
+            chunk = sorted(entries[i:i + batch_size], key=lambda e: e['new_level'], reverse=True)
+            
+            lines = []
+            for entry in chunk:
+                new_level = entry['new_level']
+                cargo_name = config.CARGO_NAMES.get(new_level, f"Nível {new_level}")
+                cargo_emoji = config.CARGO_EMOJIS.get(new_level, "🎉")
+                lines.append(f"**{entry['member'].display_name}** subiu para o **Nível {new_level}** • {cargo_emoji} **{cargo_name}**")
+            
+            top_level = chunk[0]['new_level']
+            embed = discord.Embed(
+                title=f"🎉 LEVEL UP! ({len(chunk)} membros)",
+                description="\n".join(lines),
+                color=discord.Color(config.CARGO_COLORS.get(top_level, 0xFFD700))
+            )
+            
+            await self._level_up_limiter.acquire()
+            try:
+                await channel.send(embed=embed)
+            except:
+                pass
+    
+    def queue_level_up(self, guild: discord.Guild, member: discord.Member, old_level: int, new_level: int):
+        """
+        Enfileira um level up para ser processado em segundo plano (badge, cargo e anúncio).
+        Vários level ups do mesmo membro dentro da janela viram um único anúncio.
+        """
+        key = (guild.id, member.id)
+        entry = self._level_up_queue.get(key)
+        
+        if entry:
+            entry['member'] = member
+            entry['old_level'] = min(entry['old_level'], old_level)
+            entry['new_level'] = max(entry['new_level'], new_level)
+        else:
+            self._level_up_queue[key] = {
+                'guild': guild,
+                'member': member,
+                'old_level': old_level,
+                'new_level': new_level,
+                'queued_at': time.monotonic(),
+            }
+    
+    async def flush_level_ups(self):
+        """Processa os level ups cuja janela de agrupamento já terminou"""
+        from utils.xp_calculator import XPCalculator
+        from database.queries import BadgeQueries
+        
+        now = time.monotonic()
+        due = [key for key, entry in self._level_up_queue.items()
+               if now - entry['queued_at'] >= config.LEVEL_UP_COALESCE_SECONDS]
+        if not due:
+            return
+        
+        by_guild: Dict[int, List[dict]] = {}
+        for key in due:
+            entry = self._level_up_queue.pop(key)
+            by_guild.setdefault(entry['guild'].id, []).append(entry)
+        
+        # Badges de todos os níveis alcançados pela onda inteira em uma única escrita
+        awards = [
+            (entry['member'].id, XPCalculator.get_badge_name(level), 'level')
+            for entries in by_guild.values() for entry in entries
+            for level in range(entry['old_level'] + 1, entry['new_level'] + 1)
+        ]
+        try:
+            await asyncio.to_thread(BadgeQueries.award_badges_batch, awards)
+        except Exception as e:
+            print(f"⚠️ Erro ao conceder badges de nível: {e}")
+        
+        for entries in by_guild.values():
+            for entry in entries:
+                member = entry['member']
+                
+                # Atribui o cargo do nível final (uma única troca)
+                try:
+                    await self.assign_level_role(member, entry['new_level'])
+                except discord.HTTPException as e:
+                    # O sync periódico de cargos corrige quem ficou para trás
+                    print(f"⚠️ Rate limit ao atribuir cargo a {member.display_name}: {e}")
+                
+                print(f"🎉 {member.display_name} subiu para nível {entry['new_level']}!")
+            
+            try:
+                await self.send_level_up_batch(entries[0]['guild'], entries)
+            except Exception as e:
+                print(f"⚠️ Erro ao anunciar level ups: {e}")
+    
     async def handle_xp_gain(self, guild: discord.Guild, member: discord.Member, 
                               old_xp: int, new_xp: int, old_level: int = None):
         """
         Método centralizado para lidar com ganho de XP.
         DEVE ser chamado por QUALQUER cog que dê XP ao usuário.
-        Verifica level up e atribui cargo automaticamente.
+        Verifica level up e enfileira badge, cargo e anúncio (processados em segundo plano).
         
         Args:
             guild: Servidor Discord
@@ -451,7 +599,6 @@ class AutoSetupCog(commands.Cog):
             dict com informações do resultado
         """
         from utils.xp_calculator import XPCalculator
-        from database.queries import BadgeQueries
         
         # Calcula níveis
         if old_level is None:
@@ -462,25 +609,16 @@ class AutoSetupCog(commands.Cog):
             'leveled_up': False,
             'old_level': old_level,
             'new_level': new_level,
-            'role_assigned': False,
+            'queued': False,
         }
         
         # Verifica se subiu de nível
         if new_level > old_level:
             result['leveled_up'] = True
             
-            # Concede badge de nível
-            badge_name = XPCalculator.get_badge_name(new_level)
-            BadgeQueries.award_badge(member.id, badge_name, 'level')
-            
-            # Atribui cargo automaticamente
-            success = await self.assign_level_role(member, new_level)
-            result['role_assigned'] = success
-            
-            # Envia notificação no canal
-            await self.send_level_up_notification(guild, member, old_level, new_level)
-            
-            print(f"🎉 {member.display_name} subiu para nível {new_level}!")
+            # Badge, cargo e notificação no canal vão para a fila de level up
+            self.queue_level_up(guild, member, old_level, new_level)
+            result['queued'] = True
         
         return result
     
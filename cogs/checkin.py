@@ -46,13 +46,14 @@ class CheckinCog(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Depois do setup de canais (em vez de esperar um tempo fixo)
+        bot.scheduler.add_job('checkin_panel', self.send_checkin_panels, after=['setup_guilds'])
     
-    @commands.Cog.listener()
-    async def on_ready(self):
+    def cog_unload(self):
+        self.bot.scheduler.remove_job('checkin_panel')
+    
+    async def send_checkin_panels(self):
         """Envia painel de check-in no canal apropriado"""
-        import asyncio
-        await asyncio.sleep(6)  # Aguarda setup de canais
-        
         for guild in self.bot.guilds:
             await self._send_checkin_panel(guild)
     
@@ -157,8 +158,9 @@ class CheckinCog(commands.Cog):
         username = interaction.user.display_name
 
         
-        # Busca ou cria usuário
-        user_data = UserQueries.get_or_create_user(user_id, username)
+        # Usuário, cooldowns e missões ativas em uma única consulta (cria o usuário se preciso)
+        state = UserQueries.get_user_state(user_id, username)
+        user_data = state.user
         is_vip = user_data.get('is_vip', False)
         
         # Determina cooldown baseado no VIP
@@ -166,7 +168,7 @@ class CheckinCog(commands.Cog):
         cooldown_seconds = cooldown_hours * 3600
         
         # Verifica cooldown (ninguém ignora)
-        can_checkin, remaining = CooldownManager.check(user_id, 'checkin', cooldown_seconds)
+        can_checkin, remaining = CooldownManager.check(user_id, 'checkin', cooldown_seconds, state=state)
         
         if not can_checkin:
             hours = remaining // 3600
@@ -211,7 +213,7 @@ class CheckinCog(commands.Cog):
             xp_earned = int(xp_earned * config.VIP_XP_MULTIPLIER)
         
         # Verifica se tem multiplicador de booster ativo
-        booster = UserQueries.get_active_booster(user_id)
+        booster = UserQueries.booster_from_user(user_data)
         if booster:
             xp_earned = int(xp_earned * booster['multiplier'])
         
@@ -230,10 +232,10 @@ class CheckinCog(commands.Cog):
         # GERAÇÃO AUTOMÁTICA DE MISSÕES NO CHECK-IN
         # ═══════════════════════════════════════════════════════════════
         
-        # Busca missões ativas do usuário
-        daily_missions = MissionQueries.get_active_missions(user_id, 'daily')
-        weekly_missions = MissionQueries.get_active_missions(user_id, 'weekly')
-        secret_missions = MissionQueries.get_active_missions(user_id, 'secret')
+        # Missões ativas do usuário (já carregadas no state)
+        daily_missions = state.missions_of('daily')
+        weekly_missions = state.missions_of('weekly')
+        secret_missions = state.missions_of('secret')
         
         # Se não tem missões diárias, tenta gerar
         if not daily_missions:
@@ -250,10 +252,10 @@ class CheckinCog(commands.Cog):
                 print(f"📆 Geradas {len(weekly_missions)} missões semanais para {username} via check-in")
         
         # Se é VIP e não tem missões secretas, tenta gerar
-        if is_vip and not secret_missions:
+        if state.is_vip and not secret_missions:
             missions_cog = self.bot.get_cog('MissionsCog')
             if missions_cog:
-                secret_missions = await missions_cog.generate_secret_missions(user_id)
+                secret_missions = await missions_cog.generate_secret_missions(user_id, is_vip=True, existing=[])
                 if secret_missions:
                     print(f"⭐ Geradas {len(secret_missions)} missões secretas VIP para {username} via check-in")
         
@@ -280,20 +282,14 @@ class CheckinCog(commands.Cog):
         # Concede badge de nível se subiu
         if leveled_up:
             print(f"🎉 {username} subiu de nível! {old_level} -> {new_level}")
-            badge_name = XPCalculator.get_badge_name(new_level)
-            BadgeQueries.award_badge(user_id, badge_name, 'level')
             
-            # Atribui cargo automaticamente
+            # Badge, cargo e notificação no canal de level-ups são processados em segundo plano
             auto_setup_cog = self.bot.get_cog('AutoSetupCog')
-            print(f"🔧 AutoSetupCog encontrado: {auto_setup_cog is not None}")
             if auto_setup_cog and interaction.guild:
-                print(f"✅ Atribuindo cargo nível {new_level} para {username}")
-                await auto_setup_cog.assign_level_role(interaction.user, new_level)
-                # Envia notificação no canal de level-ups
-                await auto_setup_cog.send_level_up_notification(
-                    interaction.guild, interaction.user, old_level, new_level
-                )
+                auto_setup_cog.queue_level_up(interaction.guild, interaction.user, old_level, new_level)
             else:
+                badge_name = XPCalculator.get_badge_name(new_level)
+                BadgeQueries.award_badge(user_id, badge_name, 'level')
                 print(f"❌ Não foi possível atribuir cargo: cog={auto_setup_cog}, guild={interaction.guild}")
         
         # Verifica se atingiu marco de streak
@@ -435,11 +431,11 @@ class CheckinCog(commands.Cog):
         user_id = interaction.user.id
         username = interaction.user.display_name
         
-        # Garante que usuário existe
-        UserQueries.get_or_create_user(user_id, username)
+        # Usuário e progresso de hoje em uma única consulta (cria o usuário se preciso)
+        state = UserQueries.get_user_state(user_id, username)
         
         # Busca resumo diário
-        summary = DailyProgressQueries.get_user_daily_summary(user_id)
+        summary = DailyProgressQueries.get_user_daily_summary(user_id, state=state)
         is_vip = summary['is_vip']
         
         # Cor baseada no status
@@ -3,13 +3,17 @@
 Sistema de eventos e lives com presença X2 para VIPs
 """
 
+import asyncio
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import Optional, Dict, Set
 
+from database.change_feed import event_feed
+from database.expirations import expirations
 from database.queries import UserQueries, EventQueries
+from utils.scheduler import Interval
 from utils.embeds import SharkEmbeds
 import config
 import re
@@ -25,91 +29,18 @@ class EventPanelView(discord.ui.View):
     
     @discord.ui.button(label="Participar", style=discord.ButtonStyle.success, emoji="✅", custom_id="shark_event_checkin_btn")
     async def checkin_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer(ephemeral=True)
-        
-        # Busca eventos ativos
-        events = EventQueries.get_active_events()
-        if not events:
-            # Check if there is really NO event or just no *active* event
-            await interaction.followup.send("⚠️ Nenhum evento está acontecendo neste momento.", ephemeral=True)
+        # Responde na hora a partir da memória; a gravação é feita em lote pelo cog
+        cog = interaction.client.get_cog('EventsCog')
+        if not cog:
+            await interaction.response.send_message("⚠️ Sistema de eventos indisponível no momento.", ephemeral=True)
             return
-
-        # Lógica para detectar qual evento está rolando AGORA (Timezone BRT)
-        now = datetime.now(timezone.utc)
-        active_event = None
-        
-        for event in events:
-            start_time = event.get('starts_at') or event.get('start_time')
-            end_time = event.get('ends_at') or event.get('end_time')
-            
-            if start_time and end_time:
-                if isinstance(start_time, str):
-                    start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                if isinstance(end_time, str):
-                    end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-                
-                # Check se agora está entre inicio e fim
-                if start_time <= now <= end_time:
-                    active_event = event
-                    break
-            else:
-                 # Eventos sem hora definida são considerados ativos
-                 active_event = event
-                 break
-        
-        if not active_event:
-             await interaction.followup.send("⚠️ Não há nenhum evento ativo no momento. Fique atento aos horários!", ephemeral=True)
-             return
-
-        # Lógica de marcar presença
-        event = active_event
-        user_id = interaction.user.id
-        username = interaction.user.display_name
-        
-        user_data = UserQueries.get_or_create_user(user_id, username)
-        is_vip = user_data.get('is_vip', False)
-        
-        presence = EventQueries.mark_presence(event['id'], user_id, is_vip)
-        
-        if not presence:
-            await interaction.followup.send(f"✅ Você já marcou presença em **{event['event_name']}**!", ephemeral=True)
-            return
-
-        # Recompensas
-        xp_earned = presence.get('xp_earned', 0)
-        coins_earned = presence.get('coins_earned', 0)
-        multiplier = presence.get('presence_multiplier', 1)
-        
-        UserQueries.update_xp(user_id, xp_earned)
-        UserQueries.update_coins(user_id, coins_earned)
-        
-        # Embed Sucesso
-        color = config.EMBED_COLOR_VIP if is_vip else config.EMBED_COLOR_SUCCESS
-        status_emoji = config.EMOJI_VIP if is_vip else config.EMOJI_FREE
-        
-        embed = discord.Embed(
-            title=f"✅ Presença Confirmada! {status_emoji}",
-            description=f"Você está participando do evento **{event['event_name']}**!",
-            color=color
-        )
-        embed.add_field(name="⭐ XP Ganho", value=f"+{xp_earned} XP", inline=True)
-        embed.add_field(name="🪙 Moedas", value=f"+{coins_earned}", inline=True)
-        if is_vip and multiplier > 1:
-            embed.add_field(name=f"{config.EMOJI_VIP} Bônus VIP!", value=f"Presença X{multiplier}!", inline=False)
-            
-        await interaction.followup.send(embed=embed, ephemeral=True)
-        
-        # Atualiza embed do evento se possível
-        try:
-             cog = interaction.client.get_cog('EventsCog')
-             if cog: await cog.update_event_announcement(interaction.guild, event)
-        except: pass
+        await cog.handle_checkin(interaction)
 
     @discord.ui.button(label="Ver Eventos", style=discord.ButtonStyle.primary, emoji="📅", custom_id="shark_event_list_btn")
     async def events_list_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer(ephemeral=True)
         
-        events = EventQueries.get_active_events()
+        events = await asyncio.to_thread(EventQueries.get_active_events)
         
         embed = discord.Embed(
             title="📅 Calendário de Eventos",
@@ -158,71 +89,128 @@ class EventsCog(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.known_active_ids = set()
+        self.active_events: Dict[int, dict] = {}  # Snapshot em memória dos eventos ativos
+        self._announce_lock = asyncio.Lock()
+        self._feed_task: Optional[asyncio.Task] = None
+        
+        # Estado dos anúncios: só edita a mensagem quando o conteúdo renderizado muda
+        self._presences: Dict[int, dict] = {}                    # Contagem + primeiros participantes por evento
+        self._rendered: Dict[int, tuple] = {}                    # Fingerprint do último embed enviado
+        self._pending_updates: Dict[int, asyncio.Task] = {}      # Edições agendadas (debounce)
+        
+        # Presenças pelo botão: deduplicadas em memória e gravadas em lote
+        self._snapshot_ready = False
+        self._attendees: Dict[int, Set[int]] = {}                # Quem já marcou presença, por evento
+        self._attendees_lock = asyncio.Lock()
+        self._presence_queue: Dict[int, Dict[int, discord.Interaction]] = {}  # Cliques aguardando gravação
+        self._flush_now = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # A reconciliação roda primeiro (monta o snapshot); o refresh usa o snapshot.
+        # Com a Dashboard em outro processo, a reconciliação é o único caminho para as mudanças dela
+        sync_seconds = (config.EVENT_FEED_CROSS_PROCESS_SECONDS if getattr(bot, 'dashboard_mode', None) == 'process'
+                        else config.EVENT_FEED_FALLBACK_SECONDS)
+        bot.scheduler.add_job('events_sync', self.sync_events_fallback,
+                              Interval(sync_seconds), after=['setup_guilds'],
+                              jitter=config.JOB_JITTER_SECONDS, run_on_start=True)
+        bot.scheduler.add_job('events_refresh', self.refresh_event_announcements,
+                              Interval(15), after=['events_sync'])
     
     def cog_unload(self):
         """Cancela tasks ao descarregar cog"""
-        self.auto_close_events.cancel()
-        self.announce_new_events.cancel()
+        self.bot.scheduler.remove_job('events_sync')
+        self.bot.scheduler.remove_job('events_refresh')
+        if self._feed_task:
+            self._feed_task.cancel()
+        for task in self._pending_updates.values():
+            task.cancel()
+        if self._flush_task:
+            self._flush_task.cancel()
     
     @commands.Cog.listener()
     async def on_ready(self):
-        """Inicia task de auto-fechamento de eventos"""
-        if not self.auto_close_events.is_running():
-            self.auto_close_events.start()
-            print("✅ Task de auto-fechamento de eventos iniciada")
-            
-        if not self.announce_new_events.is_running():
-            self.announce_new_events.start()
-            print("✅ Task de anúncios automáticos iniciada")
+        """Conecta o feed de mudanças de eventos"""
+        if not event_feed.attached:
+            event_feed.attach(self.bot.loop)
+        
+        if not self._feed_task or self._feed_task.done():
+            self._feed_task = self.bot.loop.create_task(self.consume_event_feed())
+            print("✅ Feed de mudanças de eventos conectado")
             
         # Registra a view persistente
         self.bot.add_view(EventPanelView())
     
-    @tasks.loop(seconds=15)
-    async def auto_close_events(self):
-        """Verifica eventos que passaram do horário e os encerra automaticamente. Deleta anúncios de encerrados."""
-        try:
-            # Busca eventos ativos atuais no banco
-            events = EventQueries.get_active_events()
-            current_active_ids = {e['id'] for e in events}
-            
-            # 1. Verifica eventos que sumiram (encerrados pela dashboard/externamente)
-            if self.known_active_ids:
-                ended_externally_ids = self.known_active_ids - current_active_ids
-                
-                for event_id in ended_externally_ids:
-                    # Busca info do evento (inativo) para poder deletar a mensagem
-                    event = EventQueries.get_event(event_id)
-                    if event:
-                        await self.delete_event_announcement(event)
-                        print(f"🗑️ Evento #{event_id} encerrado externamente - Anúncio removido")
-
-            # 2. Verifica eventos ativos que expiraram por tempo
-            now = datetime.now(timezone.utc)
-            
-            # Lista para remover dos IDs ativos se expirarem agora
-            expired_ids = set()
+    async def consume_event_feed(self):
+        """Consome as mudanças de eventos publicadas pela Dashboard e pelas queries"""
+        while True:
+            change = await event_feed.get()
+            try:
+                await self.handle_event_change(change)
+            except Exception as e:
+                print(f"⚠️ Erro ao processar mudança do evento {change.get('event_id')}: {e}")
+    
+    async def handle_event_change(self, change: dict):
+        """Aplica uma mudança (insert, update, end) no snapshot e nos anúncios"""
+        event_id = change['event_id']
+        event = change.get('event')
+        
+        if change['type'] == 'end' or (event and not event.get('is_active', True)):
+            known = self.active_events.pop(event_id, None)
+            self.forget_event(event_id)
+            event = {**(known or {}), **(event or {})}
+            if event:
+                await self.delete_event_announcement(event)
+                print(f"🗑️ Evento #{event_id} encerrado - Anúncio removido")
+            return
+        
+        if event is None:
+            event = EventQueries.get_event(event_id)
+            if not event or not event.get('is_active'):
+                return
+        
+        self.active_events[event_id] = {**self.active_events.get(event_id, {}), **event}
+        self.schedule_event_end(self.active_events[event_id])
+        
+        if not self.active_events[event_id].get('message_id'):
+            await self.announce_event(self.active_events[event_id])
+    
+    async def announce_event(self, event: dict):
+        """Anuncia um evento no canal fixo de eventos (uma única vez)"""
+        channel_id = config.CHANNEL_IDS.get("eventos")
+        channel = self.bot.get_channel(channel_id)
+        
+        if not channel:
+            # Silencioso para não spammar logs se não configurado
+            return
+        
+        async with self._announce_lock:
+            known = self.active_events.get(event['id'], event)
+            if known.get('message_id'):
+                return  # Já anunciado (feed e fallback podem ver o mesmo evento)
             
-            for event in events:
-                end_time = event.get('end_time') or event.get('ends_at')
-                start_time = event.get('start_time') or event.get('starts_at')
+            try:
+                # Cria embed
+                embed = self.create_event_announcement_embed(event, [], 0)
                 
-                # Converte string ISO para datetime
-                if isinstance(end_time, str):
-                    end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+                # Envia para o canal com @everyone e botões
+                message = await channel.send(content="@everyone", embed=embed, view=EventPanelView())
                 
-                # Verifica encerramento
-                if end_time and end_time <= now:
-                    EventQueries.close_event(event['id'])
-                    print(f"🔒 Evento #{event['id']} '{event['event_name']}' encerrado automaticamente")
-                    
-                    # Deleta o anúncio
-                    await self.delete_event_announcement(event)
-                    
-                    expired_ids.add(event['id'])
-                    continue
-
+                # Atualiza BD e snapshot com message_id
+                EventQueries.update_event_message(event['id'], message.id, channel.id)
+                known['message_id'] = str(message.id)
+                known['channel_id'] = str(channel.id)
+                print(f"📢 Novo evento anunciado: {event['event_name']}")
+            
+            except Exception as ex:
+                print(f"❌ Erro ao anunciar evento {event['id']}: {ex}")
+    
+    async def refresh_event_announcements(self):
+        """
+        Atualiza o status dos anúncios (Em Breve -> Ativo) a partir do snapshot em memória.
+        O encerramento no horário é disparado pela agenda de expirações.
+        """
+        try:
+            for event in list(self.active_events.values()):
                 # Atualiza status (Em Breve -> Ativo) e contadores
                 if event.get('message_id') and event.get('channel_id'):
                     try:
@@ -231,48 +219,41 @@ class EventsCog(commands.Cog):
                             await self.update_event_announcement(channel.guild, event)
                     except Exception as e:
                         pass
-            
-            # Atualiza lista de conhecidos (removendo os que acabaram de expirar)
-            self.known_active_ids = current_active_ids - expired_ids
                         
         except Exception as e:
-            print(f"⚠️ Erro ao verificar auto-fechamento de eventos: {e}")
-
-    @tasks.loop(seconds=15)
-    async def announce_new_events(self):
-        """Verifica novos eventos criados na dashboard e os anuncia"""
+            print(f"⚠️ Erro ao atualizar anúncios de eventos: {e}")
+    
+    async def sync_events_fallback(self):
+        """
+        Polling lento de segurança: reconcilia o snapshot com o banco.
+        Cobre mudanças que não passaram pelo feed (ex: Dashboard rodando em outro processo).
+        """
         try:
-            # Busca canal fixo de eventos
-            channel_id = config.CHANNEL_IDS.get("eventos")
-            channel = self.bot.get_channel(channel_id)
+            events = await asyncio.to_thread(EventQueries.get_active_events)
+            current = {e['id']: e for e in events}
             
-            if not channel:
-                # Silencioso para não spammar logs se não configurado
-                return
+            # Eventos que sumiram (encerrados externamente) - usa o snapshot, sem buscar de novo
+            for event_id in set(self.active_events) - set(current):
+                event = self.active_events.pop(event_id)
+                self.forget_event(event_id)
+                await self.delete_event_announcement(event)
+                print(f"🗑️ Evento #{event_id} encerrado externamente - Anúncio removido")
             
-            # Busca eventos não anunciados
-            new_events = EventQueries.get_unannounced_events()
+            for event_id, event in current.items():
+                self.active_events[event_id] = {**self.active_events.get(event_id, {}), **event}
+                self.schedule_event_end(self.active_events[event_id])
+                # Recarrega as presenças no próximo render (cobre presenças marcadas fora do bot)
+                self._presences.pop(event_id, None)
             
-            if not new_events:
-                return
-                
-            for event in new_events:
-                try:
-                    # Cria embed
-                    embed = self.create_event_announcement_embed(event, [])
-                    
-                    # Envia para o canal com @everyone e botões
-                    message = await channel.send(content="@everyone", embed=embed, view=EventPanelView())
-                    
-                    # Atualiza BD com message_id
-                    EventQueries.update_event_message(event['id'], message.id, channel.id)
-                    print(f"📢 Novo evento anunciado: {event['event_name']}")
-                    
-                except Exception as ex:
-                    print(f"❌ Erro ao anunciar evento {event['id']}: {ex}")
+            self._snapshot_ready = True
+            
+            # Eventos ainda não anunciados
+            for event in list(self.active_events.values()):
+                if not event.get('message_id'):
+                    await self.announce_event(event)
                     
         except Exception as e:
-            print(f"⚠️ Erro na task de anúncios: {e}")
+            print(f"⚠️ Erro na sincronização de eventos: {e}")
     
     def is_admin():
         """Decorator para verificar permissão de admin"""
@@ -280,8 +261,8 @@ class EventsCog(commands.Cog):
             return interaction.user.guild_permissions.administrator
         return app_commands.check(predicate)
 
-    def create_event_announcement_embed(self, event: dict, presences: list) -> discord.Embed:
-        """Cria embed do anúncio de evento com lista de participantes"""
+    def create_event_announcement_embed(self, event: dict, presences: list, presence_count: int = None) -> discord.Embed:
+        """Cria embed do anúncio de evento com lista de participantes (presences pode ser só o início da lista)"""
         tipo_emoji = {
             'live': '🎬',
             'event': '🎪',
@@ -338,13 +319,15 @@ class EventsCog(commands.Cog):
         embed.add_field(name=f"{config.EMOJI_VIP} Bônus VIP", value="Recompensas X2!", inline=True)
         
         # Lista de participantes
-        if presences:
+        if presence_count is None:
+            presence_count = len(presences)
+        if presence_count:
             participants_text = ""
             for i, p in enumerate(presences[:15], 1):
                 participants_text += f"{i}. <@{p['user_id']}>\n"
-            if len(presences) > 15:
-                participants_text += f"\n_...e mais {len(presences) - 15} participantes_"
-            embed.add_field(name=f"👥 Participantes ({len(presences)})", value=participants_text, inline=False)
+            if presence_count > 15:
+                participants_text += f"\n_...e mais {presence_count - 15} participantes_"
+            embed.add_field(name=f"👥 Participantes ({presence_count})", value=participants_text, inline=False)
         else:
             embed.add_field(name="👥 Participantes", value="_Nenhum ainda - seja o primeiro!_", inline=False)
         
@@ -362,8 +345,243 @@ class EventsCog(commands.Cog):
         embed.set_footer(text=f"🆔 Evento #{event['id']} | 🦈 SharkClub")
         return embed
     
+    @staticmethod
+    def get_event_status(event: dict) -> str:
+        """Retorna o status exibido no anúncio: 'future', 'active' ou 'ended'"""
+        start_time = event.get('starts_at') or event.get('start_time')
+        end_time = event.get('ends_at') or event.get('end_time')
+        now = datetime.now(timezone.utc)
+        
+        if isinstance(start_time, str):
+            start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        if isinstance(end_time, str):
+            end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+        
+        if start_time and start_time > now:
+            return 'future'
+        if end_time and end_time <= now:
+            return 'ended'
+        return 'active'
+    
+    def render_fingerprint(self, event: dict, summary: dict) -> tuple:
+        """Resume tudo que aparece no embed do anúncio (status, contagem e nomes listados)"""
+        return (
+            self.get_event_status(event),
+            summary['count'],
+            tuple(p['user_id'] for p in summary['preview'][:15]),
+            event.get('event_name'),
+            event.get('description'),
+        )
+    
+    def get_cached_presences(self, event_id: int) -> dict:
+        """Contagem e primeiros participantes do evento, buscados no banco apenas na primeira vez"""
+        if event_id not in self._presences:
+            self._presences[event_id] = EventQueries.get_presence_summary(event_id, preview_limit=15)
+        return self._presences[event_id]
+    
+    def note_presence(self, event_id: int, presence: dict):
+        """Registra uma presença nova no cache local (evita buscar a contagem de novo)"""
+        attendees = self._attendees.get(event_id)
+        if attendees is not None:
+            attendees.add(presence['user_id'])
+        
+        cached = self._presences.get(event_id)
+        if cached is None or any(p['user_id'] == presence['user_id'] for p in cached['preview']):
+            return
+        cached['count'] += 1
+        if len(cached['preview']) < 15:
+            cached['preview'].append(presence)
+    
+    def schedule_event_end(self, event: dict):
+        """Agenda o encerramento automático do evento no horário de término"""
+        end_time = event.get('end_time') or event.get('ends_at')
+        if end_time:
+            expirations.schedule('event', event['id'], end_time)
+    
+    def forget_event(self, event_id: int):
+        """Descarta o estado de renderização de um evento encerrado"""
+        expirations.cancel('event', event_id)
+        self._presences.pop(event_id, None)
+        self._rendered.pop(event_id, None)
+        self._attendees.pop(event_id, None)
+        task = self._pending_updates.pop(event_id, None)
+        if task:
+            task.cancel()
+    
+    def get_current_event(self) -> Optional[dict]:
+        """Evento acontecendo agora, a partir do snapshot em memória"""
+        now = datetime.now(timezone.utc)
+        
+        for event in self.active_events.values():
+            start_time = event.get('starts_at') or event.get('start_time')
+            end_time = event.get('ends_at') or event.get('end_time')
+            
+            if not (start_time and end_time):
+                return event  # Eventos sem hora definida são considerados ativos
+            
+            if isinstance(start_time, str):
+                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+            if isinstance(end_time, str):
+                end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+            
+            if start_time <= now <= end_time:
+                return event
+        return None
+    
+    async def get_attendees(self, event_id: int) -> Set[int]:
+        """Quem já marcou presença no evento (carregado do banco uma vez; depois só em memória)"""
+        if event_id not in self._attendees:
+            async with self._attendees_lock:
+                if event_id not in self._attendees:
+                    self._attendees[event_id] = await asyncio.to_thread(EventQueries.get_presence_user_ids, event_id)
+        return self._attendees[event_id]
+    
+    async def handle_checkin(self, interaction: discord.Interaction):
+        """Clique em Participar: valida e deduplica em memória, responde na hora e enfileira a gravação"""
+        if not self._snapshot_ready:
+            await interaction.response.send_message("⏳ Os eventos ainda estão sendo carregados. Tente novamente em instantes.", ephemeral=True)
+            return
+        
+        event = self.get_current_event()
+        if not event:
+            if self.active_events:
+                await interaction.response.send_message("⚠️ Não há nenhum evento ativo no momento. Fique atento aos horários!", ephemeral=True)
+            else:
+                await interaction.response.send_message("⚠️ Nenhum evento está acontecendo neste momento.", ephemeral=True)
+            return
+        
+        user_id = interaction.user.id
+        try:
+            attendees = await self.get_attendees(event['id'])
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar presenças do evento #{event['id']}: {e}")
+            await interaction.response.send_message("❌ Não foi possível registrar sua presença. Tente novamente.", ephemeral=True)
+            return
+        
+        if user_id in attendees:
+            await interaction.response.send_message(f"✅ Você já marcou presença em **{event['event_name']}**!", ephemeral=True)
+            return
+        
+        attendees.add(user_id)
+        self._presence_queue.setdefault(event['id'], {})[user_id] = interaction
+        self.schedule_presence_flush()
+        
+        await interaction.response.send_message(
+            f"⏳ Presença registrada em **{event['event_name']}**! Creditando suas recompensas...", ephemeral=True
+        )
+    
+    def schedule_presence_flush(self):
+        """Agenda a gravação da fila de presenças (antecipa quando o lote enche)"""
+        if sum(len(pending) for pending in self._presence_queue.values()) >= config.EVENT_PRESENCE_BATCH_SIZE:
+            self._flush_now.set()
+        
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._presence_flush_loop())
+    
+    async def _presence_flush_loop(self):
+        while self._presence_queue:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=config.EVENT_PRESENCE_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            
+            # Cliques que chegarem durante a gravação entram na próxima rodada
+            queue, self._presence_queue = self._presence_queue, {}
+            for event_id, pending in queue.items():
+                try:
+                    await self.flush_presences(event_id, pending)
+                except Exception as e:
+                    print(f"⚠️ Erro ao processar presenças do evento #{event_id}: {e}")
+    
+    async def flush_presences(self, event_id: int, pending: Dict[int, discord.Interaction]):
+        """Grava um lote de presenças, credita as recompensas e responde cada membro"""
+        event = self.active_events.get(event_id)
+        if not event:
+            await asyncio.gather(*(
+                self._edit_checkin_reply(i, content="⚠️ O evento foi encerrado antes de sua presença ser registrada.")
+                for i in pending.values()
+            ))
+            return
+        
+        items = list(pending.items())
+        for start in range(0, len(items), config.EVENT_PRESENCE_BATCH_SIZE):
+            chunk = dict(items[start:start + config.EVENT_PRESENCE_BATCH_SIZE])
+            usernames = {user_id: interaction.user.display_name for user_id, interaction in chunk.items()}
+            
+            try:
+                presences = await asyncio.to_thread(EventQueries.mark_presences_batch, event, usernames)
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar {len(chunk)} presenças do evento #{event_id}: {e}")
+                # Libera para o membro tentar de novo
+                self._attendees.get(event_id, set()).difference_update(chunk)
+                await asyncio.gather(*(
+                    self._edit_checkin_reply(i, content="❌ Não foi possível registrar sua presença. Tente novamente.")
+                    for i in chunk.values()
+                ))
+                continue
+            
+            by_user = {p['user_id']: p for p in presences}
+            replies = []
+            for user_id, interaction in chunk.items():
+                presence = by_user.get(user_id)
+                if presence:
+                    self.note_presence(event_id, presence)
+                    replies.append(self._edit_checkin_reply(interaction, embed=self.create_presence_embed(event, presence)))
+                else:
+                    # Já existia no banco (ex: marcada por /presenca em outro processo)
+                    replies.append(self._edit_checkin_reply(interaction, content=f"✅ Você já marcou presença em **{event['event_name']}**!"))
+            await asyncio.gather(*replies)
+            print(f"✅ {len(presences)} presença(s) gravadas no evento #{event_id}")
+        
+        # Uma única atualização do anúncio por rajada
+        guild = next(iter(pending.values())).guild
+        if guild:
+            self.schedule_announcement_update(guild, event)
+    
+    @staticmethod
+    async def _edit_checkin_reply(interaction: discord.Interaction, content: str = None, embed: discord.Embed = None):
+        try:
+            await interaction.edit_original_response(content=content, embed=embed)
+        except discord.HTTPException:
+            pass  # Interação expirada ou mensagem descartada pelo membro
+    
+    def create_presence_embed(self, event: dict, presence: dict) -> discord.Embed:
+        """Embed de presença confirmada pelo botão"""
+        is_vip = presence.get('is_vip', False)
+        multiplier = presence.get('presence_multiplier', 1)
+        color = config.EMBED_COLOR_VIP if is_vip else config.EMBED_COLOR_SUCCESS
+        status_emoji = config.EMOJI_VIP if is_vip else config.EMOJI_FREE
+        
+        embed = discord.Embed(
+            title=f"✅ Presença Confirmada! {status_emoji}",
+            description=f"Você está participando do evento **{event['event_name']}**!",
+            color=color
+        )
+        # XP com o booster ativo aplicado (xp_earned é o valor base gravado na presença)
+        xp_gained = presence.get('xp_gained', presence.get('xp_earned', 0))
+        embed.add_field(name="⭐ XP Ganho", value=f"+{xp_gained} XP", inline=True)
+        embed.add_field(name="🪙 Moedas", value=f"+{presence.get('coins_earned', 0)}", inline=True)
+        if is_vip and multiplier > 1:
+            embed.add_field(name=f"{config.EMOJI_VIP} Bônus VIP!", value=f"Presença X{multiplier}!", inline=False)
+        return embed
+    
+    def schedule_announcement_update(self, guild: discord.Guild, event: dict):
+        """Agenda a atualização do anúncio; rajadas de presenças viram uma única edição"""
+        task = self._pending_updates.get(event['id'])
+        if task and not task.done():
+            return
+        
+        self._pending_updates[event['id']] = asyncio.create_task(self._debounced_update(guild, event))
+    
+    async def _debounced_update(self, guild: discord.Guild, event: dict):
+        await asyncio.sleep(config.EVENT_ANNOUNCE_DEBOUNCE_SECONDS)
+        # Libera o agendamento antes de editar: presenças durante a edição agendam a próxima
+        self._pending_updates.pop(event['id'], None)
+        await self.update_event_announcement(guild, self.active_events.get(event['id'], event))
+    
     async def update_event_announcement(self, guild: discord.Guild, event: dict):
-        """Atualiza o embed do anúncio do evento com a lista atualizada de participantes"""
+        """Atualiza o embed do anúncio do evento (só edita se o conteúdo mudou)"""
         try:
             # Pega message_id e channel_id do evento
             message_id = event.get('message_id')
@@ -372,25 +590,28 @@ class EventsCog(commands.Cog):
             if not message_id or not channel_id:
                 return  # Evento não tem anúncio salvo
             
+            summary = self.get_cached_presences(event['id'])
+            
+            # Nada mudou desde a última edição - não gasta rate limit do canal
+            fingerprint = self.render_fingerprint(event, summary)
+            if self._rendered.get(event['id']) == fingerprint:
+                return
+            
             # Busca o canal
             channel = guild.get_channel(int(channel_id))
             if not channel:
                 return
             
-            # Busca a mensagem
+            # Edita direto pela referência parcial (sem fetch_message)
+            message = channel.get_partial_message(int(message_id))
+            new_embed = self.create_event_announcement_embed(event, summary['preview'], summary['count'])
+            
             try:
-                message = await channel.fetch_message(int(message_id))
-            except:
+                await message.edit(embed=new_embed)
+            except discord.NotFound:
                 return  # Mensagem não encontrada
             
-            # Busca presenças atualizadas
-            presences = EventQueries.get_event_presences(event['id'])
-            
-            # Cria embed atualizado
-            new_embed = self.create_event_announcement_embed(event, presences)
-            
-            # Edita a mensagem
-            await message.edit(embed=new_embed)
+            self._rendered[event['id']] = fingerprint
         except Exception as e:
             print(f"⚠️ Erro ao atualizar anúncio: {e}")
 
@@ -430,7 +651,7 @@ class EventsCog(commands.Cog):
         username = interaction.user.display_name
         
         # Busca eventos ativos
-        events = EventQueries.get_active_events()
+        events = await asyncio.to_thread(EventQueries.get_active_events)
         
         if not events:
             embed = discord.Embed(
@@ -533,13 +754,14 @@ class EventsCog(commands.Cog):
         
         await interaction.followup.send(embed=embed, ephemeral=True)
         
-        # Atualiza o embed do anúncio dinamicamente
-        await self.update_event_announcement(interaction.guild, event)
+        # Atualiza o embed do anúncio (agrupado com outras presenças próximas)
+        self.note_presence(event['id'], presence)
+        self.schedule_announcement_update(interaction.guild, event)
     
     @app_commands.command(name="eventos", description="Ver eventos ativos disponíveis")
     async def eventos(self, interaction: discord.Interaction):
         """Lista eventos ativos para o usuário"""
-        events = EventQueries.get_active_events()
+        events = await asyncio.to_thread(EventQueries.get_active_events)
         
         # Verifica status VIP do usuário
         user_data = UserQueries.get_or_create_user(interaction.user.id, interaction.user.display_name)
@@ -553,12 +775,11 @@ class EventsCog(commands.Cog):
         )
         
         if events:
+            # Presenças do usuário nos eventos listados, em uma única consulta
+            attended = EventQueries.get_user_presence_event_ids(interaction.user.id, [e['id'] for e in events[:5]])
+            
             for event in events[:5]:
-                # Verifica se usuário já marcou presença
-                presences = EventQueries.get_event_presences(event['id'])
-                user_presence = next((p for p in presences if p['user_id'] == interaction.user.id), None)
-                
-                status = "✅ Presença marcada" if user_presence else "⬜ Aguardando presença"
+                status = "✅ Presença marcada" if event['id'] in attended else "⬜ Aguardando presença"
                 
                 # Multiplicador VIP
                 if is_vip:
@@ -586,7 +807,7 @@ class EventsCog(commands.Cog):
         """Força a atualização dos anúncios de eventos ativos para incluir os botões"""
         await interaction.response.defer(ephemeral=True)
         
-        events = EventQueries.get_active_events()
+        events = await asyncio.to_thread(EventQueries.get_active_events)
         if not events:
             await interaction.followup.send("⚠️ Nenhum evento ativo encontrado.", ephemeral=True)
             return
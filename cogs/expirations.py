@@ -0,0 +1,65 @@
+"""
+🦈 SharkClub Discord Bot - Expirations Cog
+Carrega a agenda de expirações do banco e dispara boosters, VIP, eventos, calls e missões no horário
+"""
+
+import asyncio
+from typing import Optional
+
+from discord.ext import commands
+import config
+from database.expirations import expirations
+from database.queries import ExpirationQueries, MissionQueries, UserQueries
+from utils.scheduler import Interval
+
+
+class ExpirationsCog(commands.Cog):
+    """Expirações agendadas (substitui a limpeza feita nas leituras e os pollings)"""
+    
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._task: Optional[asyncio.Task] = None
+        
+        # Handlers recebem todas as chaves que venceram juntas
+        expirations.register('booster', ExpirationQueries.expire_boosters)
+        expirations.register('vip', ExpirationQueries.expire_vips)
+        expirations.register('call', ExpirationQueries.expire_calls)
+        expirations.register('event', ExpirationQueries.expire_events)
+        expirations.register('missions', lambda deadlines: MissionQueries.expire_old_missions())
+        
+        # Sem dependências: carrega a agenda (e o índice de VIPs) assim que o agendador inicia
+        bot.scheduler.add_job('expirations', self.start_expirations)
+        bot.scheduler.add_job('vip_index', self.refresh_vip_index, Interval(config.VIP_INDEX_REFRESH_SECONDS),
+                              after=['expirations'], jitter=config.JOB_JITTER_SECONDS)
+    
+    def cog_unload(self):
+        self.bot.scheduler.remove_job('expirations')
+        self.bot.scheduler.remove_job('vip_index')
+        if self._task:
+            self._task.cancel()
+    
+    async def start_expirations(self):
+        """Carrega as expirações pendentes e inicia a agenda (uma única vez)"""
+        if self._task and not self._task.done():
+            return
+        
+        try:
+            scheduled = await asyncio.to_thread(ExpirationQueries.get_scheduled_expirations)
+        except Exception as e:
+            scheduled = []
+            print(f"⚠️ Erro ao carregar expirações agendadas: {e}")
+        
+        for kind, key, when in scheduled:
+            expirations.schedule(kind, key, when)
+        
+        self._task = self.bot.loop.create_task(expirations.run(self.bot.loop))
+        print(f"✅ Agenda de expirações iniciada ({len(expirations)} pendentes)")
+    
+    async def refresh_vip_index(self):
+        """Recarrega o índice de VIPs (alterações feitas fora do bot, ex: Dashboard em outro processo)"""
+        vips = await asyncio.to_thread(UserQueries.load_vip_index)
+        print(f"👑 Índice de VIPs recarregado ({len(vips)} VIPs)")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ExpirationsCog(bot))
@@ -75,13 +75,14 @@ class MinigamesCog(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Depois do setup de canais (em vez de esperar um tempo fixo)
+        bot.scheduler.add_job('minigames_panel', self.send_minigames_panels, after=['setup_guilds'])
     
-    @commands.Cog.listener()
-    async def on_ready(self):
+    def cog_unload(self):
+        self.bot.scheduler.remove_job('minigames_panel')
+    
+    async def send_minigames_panels(self):
         """Envia painel de minigames no canal apropriado"""
-        import asyncio
-        await asyncio.sleep(5)  # Aguarda setup de canais
-        
         for guild in self.bot.guilds:
             await self._send_minigames_panel(guild)
     
@@ -194,9 +195,10 @@ class MinigamesCog(commands.Cog):
             return "pair"
         return "lose"
     
-    def update_minigame_mission(self, user_id: int):
-        """Atualiza progresso da missão de minigame"""
-        daily_missions = MissionQueries.get_active_missions(user_id, 'daily')
+    def update_minigame_mission(self, user_id: int, daily_missions: list = None):
+        """Atualiza progresso da missão de minigame (daily_missions: missões já carregadas no state)"""
+        if daily_missions is None:
+            daily_missions = MissionQueries.get_active_missions(user_id, 'daily')
         
         for mission in daily_missions:
             if mission.get('mission_id') == 'daily_minigame' and mission.get('status') == 'active':
@@ -251,19 +253,23 @@ class MinigamesCog(commands.Cog):
         """Roleta Shark - 1 gratuito por dia, tickets extras via eventos!"""
         user_id = interaction.user.id
         
-        # Busca dados do usuário primeiro para verificar VIP
-        user_data = UserQueries.get_or_create_user(user_id, interaction.user.display_name)
+        # Usuário, cooldowns, tickets e missões em uma única consulta (cria o usuário se preciso)
+        state = UserQueries.get_user_state(user_id, interaction.user.display_name)
+        user_data = state.user
         is_vip = user_data.get('is_vip', False)
         
         # Verifica cooldown diário (24h FREE, 20h VIP)
-        can_spin, remaining = CooldownManager.check(user_id, 'roulette', is_vip=is_vip)
+        can_spin, remaining = CooldownManager.check(user_id, 'roulette', is_vip=is_vip, state=state)
         
-        # Verifica se tem ticket extra
-        reward = RewardQueries.get_reward(user_id, 'roulette_ticket')
-        has_ticket = reward and reward.get('available_count', 0) > 0
+        # Ticket extra primeiro (não afeta cooldown gratuito), senão o giro gratuito diário.
+        # As duas são escritas condicionais: cliques simultâneos não giram duas vezes
+        used_ticket = state.reward_count('roulette_ticket') > 0 and RewardQueries.use_reward(user_id, 'roulette_ticket')
+        if not used_ticket and can_spin and not CooldownManager.claim(user_id, 'roulette', is_vip=is_vip):
+            # Outro clique acabou de usar o giro gratuito
+            can_spin, remaining = False, CooldownManager.get_seconds('roulette', is_vip=is_vip)
         
         # Precisa cooldown liberado OU ticket extra
-        if not can_spin and not has_ticket:
+        if not can_spin and not used_ticket:
             remaining_text = CooldownManager.format_remaining(remaining)
             vip_tip = "" if is_vip else "\n👑 **VIPs têm cooldown reduzido!**"
             embed = discord.Embed(
@@ -279,16 +285,6 @@ class MinigamesCog(commands.Cog):
         # Animação inicial
         await interaction.response.defer(ephemeral=True)
         
-        # Decide se usa ticket ou cooldown gratuito
-        used_ticket = False
-        if has_ticket:
-            # Usa ticket extra (não afeta cooldown gratuito)
-            RewardQueries.use_reward(user_id, 'roulette_ticket')
-            used_ticket = True
-        else:
-            # Usa o gratuito diário - seta cooldown
-            CooldownManager.set(user_id, 'roulette')
-        
         # Gira slots para efeito visual
         slots = self.spin_slots()
         visual_result = self.get_slot_visual_result(slots)
@@ -401,7 +397,7 @@ class MinigamesCog(commands.Cog):
         embed.set_footer(text=f"🦈 SharkClub Roleta | Próximo giro em 24h")
         
         # Atualiza missão de minigame
-        self.update_minigame_mission(user_id)
+        self.update_minigame_mission(user_id, state.missions_of('daily'))
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
@@ -410,10 +406,13 @@ class MinigamesCog(commands.Cog):
         """Lootbox - Prêmios especiais para membros dedicados"""
         user_id = interaction.user.id
         
-        # Verifica se tem lootbox disponível
-        reward = RewardQueries.get_reward(user_id, 'lootbox')
+        # Usuário, lootboxes e missões em uma única consulta (cria o usuário se preciso)
+        state = UserQueries.get_user_state(user_id, interaction.user.display_name)
         
-        if not reward or reward.get('available_count', 0) <= 0:
+        # Abre a lootbox com um decremento condicional (falha se não houver ou se outro clique levou a última)
+        opened = state.reward_count('lootbox') > 0 and RewardQueries.use_reward(user_id, 'lootbox')
+        
+        if not opened:
             embed = discord.Embed(
                 title="📦 Sem Lootboxes",
                 description="Você não tem Lootboxes disponíveis!\n\n"
@@ -429,11 +428,7 @@ class MinigamesCog(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
-        # Usa a lootbox
-        RewardQueries.use_reward(user_id, 'lootbox')
-        
-        # Garante que usuário existe e verifica VIP
-        user_data = UserQueries.get_or_create_user(user_id, interaction.user.display_name)
+        user_data = state.user
         is_vip = user_data.get('is_vip', False)
         
         # Sorteia prêmio
@@ -521,7 +516,7 @@ class MinigamesCog(commands.Cog):
         embed.set_footer(text="🦈 SharkClub Lootbox")
         
         # Atualiza missão de minigame
-        self.update_minigame_mission(user_id)
+        self.update_minigame_mission(user_id, state.missions_of('daily'))
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
@@ -530,19 +525,23 @@ class MinigamesCog(commands.Cog):
         """Raspadinha Shark - 1 gratuito por semana, tickets extras via lootbox!"""
         user_id = interaction.user.id
         
-        # Busca dados do usuário primeiro para verificar VIP
-        user_data = UserQueries.get_or_create_user(user_id, interaction.user.display_name)
+        # Usuário, cooldowns, tickets e missões em uma única consulta (cria o usuário se preciso)
+        state = UserQueries.get_user_state(user_id, interaction.user.display_name)
+        user_data = state.user
         is_vip = user_data.get('is_vip', False)
         
         # Verifica cooldown semanal (7 dias FREE, 5 dias VIP)
-        can_scratch, remaining = CooldownManager.check(user_id, 'scratch', is_vip=is_vip)
+        can_scratch, remaining = CooldownManager.check(user_id, 'scratch', is_vip=is_vip, state=state)
         
-        # Verifica se tem ticket extra
-        reward = RewardQueries.get_reward(user_id, 'scratch_ticket')
-        has_ticket = reward and reward.get('available_count', 0) > 0
+        # Ticket extra primeiro (não afeta cooldown gratuito), senão a raspadinha gratuita semanal.
+        # As duas são escritas condicionais: cliques simultâneos não raspam duas vezes
+        used_ticket = state.reward_count('scratch_ticket') > 0 and RewardQueries.use_reward(user_id, 'scratch_ticket')
+        if not used_ticket and can_scratch and not CooldownManager.claim(user_id, 'scratch', is_vip=is_vip):
+            # Outro clique acabou de usar a raspadinha gratuita
+            can_scratch, remaining = False, CooldownManager.get_seconds('scratch', is_vip=is_vip)
         
         # Precisa cooldown liberado OU ticket extra
-        if not can_scratch and not has_ticket:
+        if not can_scratch and not used_ticket:
             remaining_text = CooldownManager.format_remaining(remaining)
             vip_tip = "" if is_vip else "\n👑 **VIPs têm cooldown reduzido!**"
             embed = discord.Embed(
@@ -557,14 +556,6 @@ class MinigamesCog(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         
-        # Decide se usa ticket ou cooldown gratuito
-        if has_ticket:
-            # Usa ticket extra (não afeta cooldown gratuito)
-            RewardQueries.use_reward(user_id, 'scratch_ticket')
-        else:
-            # Usa o gratuito semanal - seta cooldown
-            CooldownManager.set(user_id, 'scratch')
-        
         # Sorteia resultado
         result = self.weighted_choice(config.SCRATCH_PRIZES)
         
@@ -624,7 +615,7 @@ class MinigamesCog(commands.Cog):
         embed.set_footer(text="🦈 SharkClub Raspadinha")
         
         # Atualiza missão de minigame
-        self.update_minigame_mission(user_id)
+        self.update_minigame_mission(user_id, state.missions_of('daily'))
         
         await interaction.followup.send(embed=embed, ephemeral=True)
 
@@ -5,15 +5,15 @@ Sistema de missões diárias, semanais e secretas
 
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
-from datetime import datetime, timezone, timedelta
+from discord.ext import commands
+from datetime import datetime, timezone, timedelta, time
 from typing import List, Dict, Any
 import random
-import asyncio
 
 from database.queries import UserQueries, MissionQueries, RewardQueries, ActivityQueries
 from utils.embeds import SharkEmbeds
 from utils.xp_calculator import XPCalculator
+from utils.scheduler import Weekly
 import config
 
 
@@ -42,30 +42,8 @@ class MissionsView(discord.ui.View):
             await interaction.followup.send("❌ Erro ao carregar missões.", ephemeral=True)
             return
         
-        user_id = interaction.user.id
-        
-        # Garante que usuário existe
-        UserQueries.get_or_create_user(user_id, interaction.user.display_name)
-        
-        # Busca missões ativas
-        daily = MissionQueries.get_active_missions(user_id, 'daily')
-        weekly = MissionQueries.get_active_missions(user_id, 'weekly')
-        secret = MissionQueries.get_active_missions(user_id, 'secret')
-        
-        # Se não tem missões diárias, gera novas
-        if not daily:
-            daily = await missions_cog.generate_daily_missions(user_id)
-        
-        # Se não tem missões semanais, gera novas
-        if not weekly:
-            weekly = await missions_cog.generate_weekly_missions(user_id)
-        
-        # Se é VIP e não tem missões secretas, gera novas
-        if UserQueries.is_vip(user_id) and not secret:
-            secret = await missions_cog.generate_secret_missions(user_id)
-        
-        # Cria embed customizado
-        embed = missions_cog.create_missions_embed(daily, weekly, secret)
+        grouped = await missions_cog.get_user_missions(interaction.user.id, interaction.user.display_name)
+        embed = missions_cog.create_missions_embed(grouped)
         
         await interaction.followup.send(embed=embed, ephemeral=True)
 
@@ -140,22 +118,18 @@ class ThreadHelpedButtonView(discord.ui.View):
             )
             return
         
-        # Garante que o helper existe no banco
-        UserQueries.get_or_create_user(thread_owner_id, helper.display_name)
-        
-        # Busca missões semanais do helper
-        weekly_missions = MissionQueries.get_active_missions(thread_owner_id, 'weekly')
+        # Helper, VIP e missões em uma única consulta (cria o helper no banco se preciso)
+        state = UserQueries.get_user_state(thread_owner_id, helper.display_name)
+        weekly_missions = state.missions_of('weekly')
         
         # Se não tem missões semanais, cria automaticamente (via cog)
         missions_cog = interaction.client.get_cog('MissionsCog')
         if not weekly_missions and missions_cog:
             weekly_missions = await missions_cog.generate_weekly_missions(thread_owner_id)
         
-        # Registra a ajuda no activity_log (para missão secreta 2)
+        # Registra a ajuda da semana (para missão secreta 2) - pares repetidos são ignorados
         try:
-            unique_helped = ActivityQueries.get_unique_helped_members(thread_owner_id, days=7)
-            if clicker_id not in unique_helped:
-                ActivityQueries.log_help_activity(thread_owner_id, clicker_id)
+            ActivityQueries.record_help(thread_owner_id, clicker_id)
         except Exception as e:
             print(f"⚠️ Erro ao registrar ajuda: {e}")
         
@@ -168,8 +142,8 @@ class ThreadHelpedButtonView(discord.ui.View):
                 ephemeral=True
             )
             # Ainda verifica missão secreta VIP
-            if UserQueries.is_vip(thread_owner_id) and missions_cog:
-                await missions_cog._check_help_mission(thread_owner_id, clicker_id)
+            if state.is_vip and missions_cog:
+                await missions_cog._check_help_mission(thread_owner_id, clicker_id, state.missions_of('secret'))
             return
         
         if mentor_mission.get('status') == 'completed':
@@ -180,8 +154,8 @@ class ThreadHelpedButtonView(discord.ui.View):
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
             # Mesmo com missão semanal completa, ainda verifica missão secreta VIP
-            if UserQueries.is_vip(thread_owner_id) and missions_cog:
-                await missions_cog._check_help_mission(thread_owner_id, clicker_id)
+            if state.is_vip and missions_cog:
+                await missions_cog._check_help_mission(thread_owner_id, clicker_id, state.missions_of('secret'))
             return
         
         # Avança o progresso da missão
@@ -217,8 +191,8 @@ class ThreadHelpedButtonView(discord.ui.View):
             await interaction.followup.send(embed=embed, ephemeral=True)
         
         # Verifica missão secreta 2 para VIPs
-        if UserQueries.is_vip(thread_owner_id) and missions_cog:
-            await missions_cog._check_help_mission(thread_owner_id, clicker_id)
+        if state.is_vip and missions_cog:
+            await missions_cog._check_help_mission(thread_owner_id, clicker_id, state.missions_of('secret'))
 
 
 class MissionsCog(commands.Cog):
@@ -229,12 +203,16 @@ class MissionsCog(commands.Cog):
         self._missions_message_id = None  # ID da mensagem das missões no canal
         # Tracking de tempo em voz para recompensas passivas
         self.voice_join_times: Dict[int, datetime] = {}  # user_id -> timestamp de entrada
+        
+        # Startup em ordem: setup de canais -> painel -> geração de missões semanais
+        bot.scheduler.add_job('missions_panel', self.send_missions_panels, after=['setup_guilds'])
+        bot.scheduler.add_job('weekly_missions', self.generate_startup_missions, after=['missions_panel'])
+        # Reset semanal: segunda-feira 00:00 UTC
+        bot.scheduler.add_job('weekly_reset', self.weekly_reset, Weekly(0, time(hour=0, minute=0)),
+                              after=['weekly_missions'])
     
-    @commands.Cog.listener()
-    async def on_ready(self):
+    async def send_missions_panels(self):
         """Envia painel de missões no canal apropriado e registra Views persistentes"""
-        await asyncio.sleep(7)  # Aguarda setup
-        
         # Registra a View persistente do botão "Ajudou" para threads
         # Usa ID 0 como placeholder - o ID real é extraído do embed footer
         self.bot.add_view(ThreadHelpedButtonView(thread_owner_id=0))
@@ -355,17 +333,11 @@ class MissionsCog(commands.Cog):
             await interaction.followup.send(f"❌ Erro: {e}", ephemeral=True)
 
     def cog_unload(self):
-        self.check_weekly_reset.cancel()
+        for name in ('missions_panel', 'weekly_missions', 'weekly_reset'):
+            self.bot.scheduler.remove_job(name)
     
-    @commands.Cog.listener()
-    async def on_ready_missions_gen(self):
-        """Inicia verificação de reset semanal e gera missões"""
-        if not self.check_weekly_reset.is_running():
-            self.check_weekly_reset.start()
-        
-        # Aguarda um pouco para garantir que os canais estão configurados
-        await asyncio.sleep(8)
-        
+    async def generate_startup_missions(self):
+        """Gera as missões semanais de quem ainda não tem (job de startup)"""
         # Para cada servidor - apenas gera missões
         for guild in self.bot.guilds:
             # Gera missões semanais para todos os membros automaticamente
@@ -422,20 +394,16 @@ class MissionsCog(commands.Cog):
                 print(f"📋 {created} missões semanais criadas para {len(members_needing_missions)} membros em {guild.name}")
 
     
-    @tasks.loop(hours=1)
-    async def check_weekly_reset(self):
-        """Verifica se é hora de resetar missões semanais (segunda-feira 00:00)"""
-        now = datetime.now(timezone.utc)
-        # Segunda-feira = 0
-        if now.weekday() == 0 and now.hour == 0:
-            print("🔄 Resetando missões semanais...")
-            # Expira todas as missões semanais antigas
-            MissionQueries.expire_old_missions('weekly')
-            
-            # Gera novas missões para todos e atualiza o canal
-            for guild in self.bot.guilds:
-                await self.generate_weekly_missions_for_all(guild)
-                await self.send_missions_to_channel(guild)
+    async def weekly_reset(self):
+        """Reseta as missões semanais (segunda-feira 00:00)"""
+        print("🔄 Resetando missões semanais...")
+        # Expira todas as missões semanais antigas
+        MissionQueries.expire_old_missions('weekly')
+        
+        # Gera novas missões para todos e atualiza o canal
+        for guild in self.bot.guilds:
+            await self.generate_weekly_missions_for_all(guild)
+            await self.send_missions_to_channel(guild)
     
     async def send_missions_to_channel(self, guild: discord.Guild):
         """Envia ou atualiza embed de missões semanais no canal 📋-missoes-🦈"""
@@ -526,36 +494,40 @@ class MissionsCog(commands.Cog):
         """Lista missões do usuário"""
         await interaction.response.defer(ephemeral=True)
         
-        user_id = interaction.user.id
+        grouped = await self.get_user_missions(interaction.user.id, interaction.user.display_name)
+        embed = self.create_missions_embed(grouped)
         
-        # Garante que usuário existe
-        UserQueries.get_or_create_user(user_id, interaction.user.display_name)
-        
-        # Busca missões ativas
-        daily = MissionQueries.get_active_missions(user_id, 'daily')
-        weekly = MissionQueries.get_active_missions(user_id, 'weekly')
-        secret = MissionQueries.get_active_missions(user_id, 'secret')
+        # Missões são pessoais
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    async def get_user_missions(self, user_id: int, username: str) -> Dict[str, Any]:
+        """
+        Missões ativas agrupadas por tipo ({'daily', 'weekly', 'secret'}) a partir do estado do usuário
+        (uma única consulta); gera as que faltarem. Caminho usado pelo /missoes e pelo botão do painel.
+        """
+        state = UserQueries.get_user_state(user_id, username)
+        grouped = state.missions_by_type
         
         # Se não tem missões diárias, gera novas
-        if not daily:
-            daily = await self.generate_daily_missions(user_id)
+        if not grouped['daily']:
+            grouped['daily'] = await self.generate_daily_missions(user_id)
         
         # Se não tem missões semanais, gera novas
-        if not weekly:
-            weekly = await self.generate_weekly_missions(user_id)
+        if not grouped['weekly']:
+            grouped['weekly'] = await self.generate_weekly_missions(user_id)
         
         # Se é VIP e não tem missões secretas, gera novas
-        if UserQueries.is_vip(user_id) and not secret:
-            secret = await self.generate_secret_missions(user_id)
+        if state.is_vip and not grouped['secret']:
+            grouped['secret'] = await self.generate_secret_missions(user_id, is_vip=True, existing=[])
         
-        # Cria embed customizado
-        embed = self.create_missions_embed(daily, weekly, secret)
-        
-        # Missões são pessoais
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        return grouped
     
-    def create_missions_embed(self, daily: list, weekly: list, secret: list) -> discord.Embed:
-        """Cria embed de missões formatado"""
+    def create_missions_embed(self, grouped: Dict[str, Any]) -> discord.Embed:
+        """Cria embed de missões formatado a partir do resultado agrupado ({'daily', 'weekly', 'secret'})"""
+        daily = grouped.get('daily') or []
+        weekly = grouped.get('weekly') or []
+        secret = grouped.get('secret') or []
+        
         embed = discord.Embed(
             title="📋 Suas Missões",
             description="Complete missões para ganhar XP!",
@@ -667,10 +639,21 @@ class MissionsCog(commands.Cog):
         print(f"📋 Criadas {len(missions)} missões semanais para user {user_id}")
         return missions
     
-    async def generate_secret_missions(self, user_id: int) -> List[Dict[str, Any]]:
-        """Gera missões secretas para usuários VIP"""
+    async def generate_secret_missions(self, user_id: int, is_vip: bool = None,
+                                       existing: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Gera missões secretas para usuários VIP (is_vip/existing: dados já carregados, evitam consultas)"""
+        # O que não veio carregado sai do estado do usuário (uma consulta)
+        if is_vip is None or existing is None:
+            state = UserQueries.get_user_state(user_id)
+            if state is None:
+                return []
+            if is_vip is None:
+                is_vip = state.is_vip
+            if existing is None:
+                existing = state.missions_of('secret')
+        
         # Verifica se o usuário é VIP
-        if not UserQueries.is_vip(user_id):
+        if not is_vip:
             return []
         
         missions = []
@@ -683,8 +666,7 @@ class MissionsCog(commands.Cog):
         expires_at = expires_at.replace(hour=23, minute=59, second=59)
         
         # Verifica se já tem missões secretas ativas
-        existing_secret = MissionQueries.get_active_missions(user_id, 'secret')
-        existing_ids = [m.get('mission_id') for m in existing_secret]
+        existing_ids = [m.get('mission_id') for m in existing]
         
         # Cria missões secretas que ainda não existem
         for mission_id, mission_data in config.SECRET_MISSIONS.items():
@@ -1006,22 +988,17 @@ class MissionsCog(commands.Cog):
         
         helper_id = membro.id
         
-        # Garante que o helper existe no banco
-        UserQueries.get_or_create_user(helper_id, membro.display_name)
-        
-        # Busca missões semanais do helper
-        weekly_missions = MissionQueries.get_active_missions(helper_id, 'weekly')
+        # Helper, VIP e missões em uma única consulta (cria o helper no banco se preciso)
+        state = UserQueries.get_user_state(helper_id, membro.display_name)
+        weekly_missions = state.missions_of('weekly')
         
         # Se não tem missões semanais, cria automaticamente
         if not weekly_missions:
             weekly_missions = await self.generate_weekly_missions(helper_id)
         
-        # Registra a ajuda no activity_log (para missão secreta 2)
+        # Registra a ajuda da semana (para missão secreta 2) - pares repetidos são ignorados
         try:
-            # Verifica se esse par já foi registrado esta semana para evitar duplicatas
-            unique_helped = ActivityQueries.get_unique_helped_members(helper_id, days=7)
-            if interaction.user.id not in unique_helped:
-                ActivityQueries.log_help_activity(helper_id, interaction.user.id)
+            ActivityQueries.record_help(helper_id, interaction.user.id)
         except Exception as e:
             print(f"⚠️ Erro ao registrar ajuda: {e}")
         
@@ -1046,8 +1023,8 @@ class MissionsCog(commands.Cog):
             )
             await interaction.followup.send(embed=embed)
             # Mesmo com missão semanal completa, ainda verifica missão secreta VIP
-            if UserQueries.is_vip(helper_id):
-                await self._check_help_mission(helper_id, interaction.user.id)
+            if state.is_vip:
+                await self._check_help_mission(helper_id, interaction.user.id, state.missions_of('secret'))
             return
         
         # Avança o progresso da missão
@@ -1085,8 +1062,8 @@ class MissionsCog(commands.Cog):
         await interaction.followup.send(embed=embed)
         
         # Verifica missão secreta 2 para VIPs
-        if UserQueries.is_vip(helper_id):
-            await self._check_help_mission(helper_id, interaction.user.id)
+        if state.is_vip:
+            await self._check_help_mission(helper_id, interaction.user.id, state.missions_of('secret'))
     
     async def _check_activity_streak_mission(self, user_id: int):
         """
@@ -1116,21 +1093,21 @@ class MissionsCog(commands.Cog):
             else:
                 MissionQueries.update_mission_progress(activity_mission['id'], consecutive_days)
     
-    async def _check_help_mission(self, helper_id: int, helped_member_id: int):
+    async def _check_help_mission(self, helper_id: int, helped_member_id: int, secret_missions: list = None):
         """
         Verifica e atualiza progresso da missão secreta 'Mentor da Comunidade'.
-        Chamado após cada /ajudou.
+        Chamado após cada /ajudou (secret_missions: missões já carregadas no state).
         """
         # Busca missão secreta ativa
-        secret_missions = MissionQueries.get_active_missions(helper_id, 'secret')
+        if secret_missions is None:
+            secret_missions = MissionQueries.get_active_missions(helper_id, 'secret')
         help_mission = next((m for m in secret_missions if m.get('mission_id') == 'secreta_2'), None)
         
         if not help_mission or help_mission.get('status') == 'completed':
             return
         
-        # Conta membros únicos ajudados
-        unique_helped = ActivityQueries.get_unique_helped_members(helper_id, days=7)
-        unique_count = len(unique_helped)
+        # Conta membros únicos ajudados na semana (conjunto em memória)
+        unique_count = ActivityQueries.count_helped_this_week(helper_id)
         target = help_mission.get('target', 3)
         
         # Atualiza progresso
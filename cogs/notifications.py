@@ -3,10 +3,16 @@
 Processa notificações pendentes do Dashboard e envia DMs aos usuários
 """
 
+import asyncio
+import aiohttp
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
+from typing import List, Optional
 import config
+from database.change_feed import dashboard_bus
 from database.queries import NotificationQueries
+from utils.rate_limiter import RateLimiter
+from utils.scheduler import Interval
 
 
 class NotificationsCog(commands.Cog):
@@ -14,68 +20,116 @@ class NotificationsCog(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.process_notifications.start()
+        self._dm_limiter = RateLimiter(config.NOTIFICATION_DM_MAX, config.NOTIFICATION_DM_WINDOW_SECONDS)
+        self._stale_released = False
+        bot.scheduler.add_job('notifications', self.process_notifications, Interval(config.NOTIFICATION_POLL_SECONDS),
+                              after=['setup_guilds'], jitter=config.JOB_JITTER_SECONDS, run_on_start=True)
+        # A Dashboard avisa na hora; o polling continua como fallback (processos separados)
+        dashboard_bus.subscribe('notification', self.on_dashboard_notification)
     
     def cog_unload(self):
-        self.process_notifications.cancel()
+        self.bot.scheduler.remove_job('notifications')
+        dashboard_bus.unsubscribe('notification', self.on_dashboard_notification)
+    
+    async def on_dashboard_notification(self, **payload):
+        """Nova notificação gravada pela Dashboard - antecipa o envio da fila"""
+        self.bot.scheduler.trigger_now('notifications')
     
-    @tasks.loop(seconds=30)
     async def process_notifications(self):
-        """Processa notificações pendentes a cada 30 segundos"""
+        """Esvazia a fila de notificações pendentes em lotes, com envio concorrente"""
         try:
-            notifications = NotificationQueries.get_pending_notifications(limit=10)
+            # Reservas de uma execução anterior interrompida voltam para a fila
+            if not self._stale_released:
+                released = await asyncio.to_thread(NotificationQueries.release_stale_claims)
+                self._stale_released = True
+                if released:
+                    print(f"📬 {released} notificações interrompidas devolvidas para a fila")
             
-            for notif in notifications:
-                await self.send_notification(notif)
+            while True:
+                notifications = await asyncio.to_thread(
+                    NotificationQueries.claim_pending_notifications, config.NOTIFICATION_BATCH_SIZE
+                )
+                if not notifications:
+                    break
+                
+                await self.dispatch_batch(notifications)
                 
+                if len(notifications) < config.NOTIFICATION_BATCH_SIZE:
+                    break
+        
         except Exception as e:
             print(f"⚠️ Erro ao processar notificações: {e}")
     
-    @process_notifications.before_loop
-    async def before_process_notifications(self):
-        await self.bot.wait_until_ready()
+    async def dispatch_batch(self, notifications: List[dict]):
+        """Envia um lote de DMs em paralelo e grava os status de uma vez"""
+        semaphore = asyncio.Semaphore(config.NOTIFICATION_CONCURRENCY)
+        
+        async def worker(notif: dict):
+            async with semaphore:
+                return notif['id'], await self.send_notification(notif)
+        
+        results = await asyncio.gather(*(worker(n) for n in notifications))
+        
+        sent = [notification_id for notification_id, error in results if error is None]
+        failed = {notification_id: error for notification_id, error in results if error is not None}
+        
+        if sent:
+            await asyncio.to_thread(NotificationQueries.mark_many_as_sent, sent)
+        if failed:
+            await asyncio.to_thread(NotificationQueries.mark_many_as_failed, failed)
+        
+        print(f"📬 Notificações: {len(sent)} enviadas, {len(failed)} falharam")
     
-    async def send_notification(self, notif: dict):
-        """Envia notificação para o usuário via DM"""
-        try:
-            user_id = notif.get('user_id')
-            user = await self.bot.fetch_user(user_id)
-            
-            if not user:
-                NotificationQueries.mark_as_failed(notif['id'], "Usuário não encontrado")
-                return
-            
-            # Cria embed da notificação
-            xp_reward = notif.get('xp_reward', 0)
-            coins_reward = notif.get('coins_reward', 0)
-            
-            # Monta descrição com recompensas
-            description = notif.get('message', '')
-            
-            embed = discord.Embed(
-                title=notif.get('title', '📬 Notificação'),
-                description=description,
-                color=config.EMBED_COLOR_SUCCESS
-            )
-            
-            embed.set_footer(text="🦈 SharkClub")
-            
-            # Tenta enviar DM
+    def build_embed(self, notif: dict) -> discord.Embed:
+        """Cria embed da notificação"""
+        embed = discord.Embed(
+            title=notif.get('title', '📬 Notificação'),
+            description=notif.get('message', ''),
+            color=config.EMBED_COLOR_SUCCESS
+        )
+        embed.set_footer(text="🦈 SharkClub")
+        return embed
+    
+    async def send_notification(self, notif: dict) -> Optional[str]:
+        """Envia notificação para o usuário via DM. Retorna None se enviou ou a mensagem de erro."""
+        user_id = notif.get('user_id')
+        embed = self.build_embed(notif)
+        
+        for attempt in range(config.NOTIFICATION_MAX_RETRIES + 1):
             try:
+                user = self.bot.get_user(user_id)
+                if not user:
+                    await self._dm_limiter.acquire()
+                    user = await self.bot.fetch_user(user_id)
+                
+                await self._dm_limiter.acquire()
                 await user.send(embed=embed)
-                NotificationQueries.mark_as_sent(notif['id'])
-                print(f"✅ Notificação enviada para {user.name} (ID: {user_id})")
+                return None
+            
             except discord.Forbidden:
                 # Usuário bloqueou DMs
-                NotificationQueries.mark_as_failed(notif['id'], "DMs desabilitadas")
                 print(f"⚠️ Não foi possível enviar DM para {user_id} - DMs bloqueadas")
-            except Exception as dm_error:
-                NotificationQueries.mark_as_failed(notif['id'], str(dm_error))
-                print(f"⚠️ Erro ao enviar DM para {user_id}: {dm_error}")
-                
-        except Exception as e:
-            NotificationQueries.mark_as_failed(notif['id'], str(e))
-            print(f"⚠️ Erro ao processar notificação {notif.get('id')}: {e}")
+                return "DMs desabilitadas"
+            except discord.NotFound:
+                return "Usuário não encontrado"
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    self._dm_limiter.penalize(config.NOTIFICATION_DM_WINDOW_SECONDS)
+                elif e.status < 500:
+                    return str(e)  # Erro permanente (ex: embed inválido)
+                error = str(e)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or e.__class__.__name__
+            except Exception as e:
+                print(f"⚠️ Erro ao processar notificação {notif.get('id')}: {e}")
+                return str(e)
+            
+            # Erro transitório: tenta de novo com backoff exponencial
+            if attempt < config.NOTIFICATION_MAX_RETRIES:
+                await asyncio.sleep(config.NOTIFICATION_RETRY_BASE_SECONDS * (2 ** attempt))
+        
+        print(f"⚠️ Erro ao enviar DM para {user_id} após {config.NOTIFICATION_MAX_RETRIES} tentativas: {error}")
+        return error
 
 
 async def setup(bot: commands.Bot):
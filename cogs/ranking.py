@@ -4,12 +4,14 @@
 Sistema de leaderboard diário automático
 """
 
+import asyncio
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timezone, time
 import config
 from database.queries import UserQueries
+from utils.scheduler import Daily
 
 # Horários que o leaderboard será postado (10:00 e 18:00 BRT = 13:00 e 21:00 UTC)
 LEADERBOARD_TIME = [
@@ -22,20 +24,12 @@ class RankingCog(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        bot.scheduler.add_job('daily_leaderboard', self.daily_leaderboard, Daily(LEADERBOARD_TIME))
     
     def cog_unload(self):
-        """Cancela tasks ao descarregar cog"""
-        self.daily_leaderboard.cancel()
+        """Remove o job ao descarregar cog"""
+        self.bot.scheduler.remove_job('daily_leaderboard')
     
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """Inicia task de ranking diário"""
-        if not self.daily_leaderboard.is_running():
-            print("⏳ Iniciando agendador de Ranking Diário...")
-            self.daily_leaderboard.start()
-            print("✅ Ranking Diário agendado para 10:00 BRT")
-    
-    @tasks.loop(time=LEADERBOARD_TIME)
     async def daily_leaderboard(self):
         """Task que roda todos os dias para postar o ranking"""
         await self.post_leaderboard()
@@ -58,7 +52,7 @@ class RankingCog(commands.Cog):
                     return
             
             # Busca top 10 usuários
-            top_users = UserQueries.get_top_users(limit=10)
+            top_users = await asyncio.to_thread(UserQueries.get_top_users, limit=10)
             
             if not top_users:
                 print("⚠️ Nenhum usuário encontrado para o ranking.")
@@ -424,15 +424,13 @@ class ShopCog(commands.Cog):
             await interaction.response.send_message("❌ Apenas a pessoa solicitada pode responder!", ephemeral=True)
             return
         
-        # Atualiza status
-        ShopQueries.update_purchase_status(purchase_id, 'declined')
-        
-        # Busca a compra e devolve moedas
-        purchase = ShopQueries.get_purchase(purchase_id)
-        price_paid = 0
-        if purchase:
-            price_paid = purchase.get('price_paid', 0)
-            UserQueries.update_coins(buyer_id, price_paid)
+        # Recusa e devolve moedas na mesma transação (só se ainda estiver pendente)
+        receipt = ShopQueries.refund_purchase(purchase_id, 'declined')
+        if receipt['status'] != 'ok':
+            status = (receipt.get('purchase') or {}).get('status', 'processado')
+            await interaction.response.send_message(f"❌ Este pedido já foi {status}!", ephemeral=True)
+            return
+        price_paid = receipt['purchase'].get('price_paid', 0)
         
         # Desabilita botões
         view = discord.ui.View()
@@ -548,16 +546,22 @@ class ShopCog(commands.Cog):
             await interaction.followup.send("❌ Você não pode solicitar uma call com um bot!", ephemeral=True)
             return
         
-        # Busca dados do usuário
-        user_data = UserQueries.get_or_create_user(interaction.user.id, interaction.user.display_name)
-        coins = user_data.get('coins', 0)
-        is_vip = user_data.get('is_vip', False)
-        
-        # Calcula preço
-        price = shop_item['price_vip'] if is_vip else shop_item['price_free']
+        # Preço (FREE/VIP), débito condicional e registro da compra em uma única transação.
+        # A chave é a própria interação; o duplo clique (mesma compra em poucos segundos) é barrado no banco
+        receipt = ShopQueries.purchase(
+            idempotency_key=str(interaction.id),
+            buyer_id=interaction.user.id,
+            item_id=item,
+            price_free=shop_item['price_free'],
+            price_vip=shop_item['price_vip'],
+            target_id=membro.id if membro else None,
+            guild_id=interaction.guild.id if interaction.guild else None,
+            dedupe_seconds=config.SHOP_IDEMPOTENCY_WINDOW_SECONDS
+        )
         
-        # Verifica saldo
-        if coins < price:
+        if receipt['status'] == 'insufficient_funds':
+            coins = receipt.get('balance', 0)
+            price = receipt.get('price', shop_item['price_free'])
             await interaction.followup.send(
                 f"❌ Saldo insuficiente!\n"
                 f"💰 Você tem: **{coins:,}** {config.EMOJI_COINS}\n"
@@ -567,24 +571,20 @@ class ShopCog(commands.Cog):
             )
             return
         
-        # Desconta moedas
-        UserQueries.update_coins(interaction.user.id, -price)
-        
-        # Registra compra
-        purchase = ShopQueries.create_purchase(
-            buyer_id=interaction.user.id,
-            item_id=item,
-            target_id=membro.id if membro else None,
-            price_paid=price,
-            guild_id=interaction.guild.id if interaction.guild else None
-        )
+        if receipt['status'] == 'duplicate':
+            await interaction.followup.send(
+                f"⚠️ Esta compra já foi registrada (ID #{receipt['purchase']['id']}). Nenhuma moeda foi cobrada de novo.",
+                ephemeral=True
+            )
+            return
         
-        if not purchase:
-            # Devolve moedas se falhou
-            UserQueries.update_coins(interaction.user.id, price)
+        if receipt['status'] != 'ok':
             await interaction.followup.send("❌ Erro ao processar a compra. Tente novamente.", ephemeral=True)
             return
         
+        purchase = receipt['purchase']
+        price = receipt['price']
+        
         # Para call_expert, envia DM para o membro escolhido
         if item == "call_expert" and membro:
             try:
@@ -666,9 +666,8 @@ class ShopCog(commands.Cog):
                 await interaction.followup.send(embed=success_embed, ephemeral=True)
                 
             except discord.Forbidden:
-                # Não conseguiu enviar DM - devolve moedas
-                UserQueries.update_coins(interaction.user.id, price)
-                ShopQueries.update_purchase_status(purchase['id'], 'expired')
+                # Não conseguiu enviar DM - expira e devolve moedas (mesma transação)
+                ShopQueries.refund_purchase(purchase['id'], 'expired')
                 
                 await interaction.followup.send(
                     f"❌ Não foi possível enviar mensagem para {membro.mention}!\n"
@@ -775,12 +774,15 @@ class ShopCog(commands.Cog):
             )
             return
         
-        # Recusa e devolve moedas
-        ShopQueries.update_purchase_status(id, 'declined')
+        # Recusa e devolve moedas na mesma transação (outra recusa simultânea não devolve de novo)
+        receipt = ShopQueries.refund_purchase(id, 'declined')
+        if receipt['status'] != 'ok':
+            status = (receipt.get('purchase') or {}).get('status', 'processado')
+            await interaction.followup.send(f"❌ Este pedido já foi {status}!", ephemeral=True)
+            return
         
-        price_paid = purchase.get('price_paid', 0)
-        buyer_id = purchase.get('buyer_id')
-        UserQueries.update_coins(buyer_id, price_paid)
+        price_paid = receipt['purchase'].get('price_paid', 0)
+        buyer_id = receipt['purchase'].get('buyer_id')
         
         await interaction.followup.send(
             f"❌ Você **recusou** a call com <@{buyer_id}>.\n"
@@ -125,6 +125,58 @@ CARGO_COLORS = {
     10: 0xFF0000,  # Vermelho - Mestre Supremo
 }
 
+# ═══════════════════════════════════════════════════════════════
+# SINCRONIZAÇÃO DE CARGOS EM LOTE
+# ═══════════════════════════════════════════════════════════════
+
+ROLE_SYNC_MAX_EDITS = 10             # Edições de cargo por janela (rate limit do Discord)
+ROLE_SYNC_WINDOW_SECONDS = 10        # Tamanho da janela do rate limit
+ROLE_SYNC_PROGRESS_INTERVAL = 5      # Segundos entre atualizações de progresso
+
+# ═══════════════════════════════════════════════════════════════
+# FILA DE NOTIFICAÇÕES DE LEVEL UP
+# ═══════════════════════════════════════════════════════════════
+
+LEVEL_UP_COALESCE_SECONDS = 5        # Janela para juntar level ups do mesmo membro
+LEVEL_UP_FLUSH_INTERVAL = 2          # Segundos entre verificações da fila
+LEVEL_UP_BATCH_SIZE = 15             # Máximo de membros por embed de level up
+LEVEL_UP_MAX_MESSAGES = 5            # Mensagens no canal de level-ups por janela
+LEVEL_UP_WINDOW_SECONDS = 5          # Tamanho da janela do rate limit do canal
+
+# ═══════════════════════════════════════════════════════════════
+# FEED DE MUDANÇAS DE EVENTOS
+# ═══════════════════════════════════════════════════════════════
+
+EVENT_FEED_FALLBACK_SECONDS = 300    # Polling de segurança (Dashboard no mesmo processo: o feed cobre tudo)
+EVENT_FEED_CROSS_PROCESS_SECONDS = 15  # DASHBOARD_MODE=process: o feed não vê eventos criados/encerrados pela Dashboard
+EVENT_ANNOUNCE_DEBOUNCE_SECONDS = 3  # Agrupa presenças próximas em uma única edição do anúncio
+EVENT_PRESENCE_FLUSH_SECONDS = 1     # Janela para juntar cliques de presença em um único insert
+EVENT_PRESENCE_BATCH_SIZE = 100      # Máximo de presenças gravadas por lote
+
+# ═══════════════════════════════════════════════════════════════
+# AGENDADOR DE TAREFAS
+# ═══════════════════════════════════════════════════════════════
+
+JOB_JITTER_SECONDS = 5               # Atraso aleatório máximo dos jobs periódicos (evita rajadas no Supabase)
+
+# ═══════════════════════════════════════════════════════════════
+# ENVIO DE NOTIFICAÇÕES (DM)
+# ═══════════════════════════════════════════════════════════════
+
+NOTIFICATION_POLL_SECONDS = 15       # Intervalo entre verificações da fila de notificações
+NOTIFICATION_BATCH_SIZE = 50         # Notificações reservadas por lote
+NOTIFICATION_CONCURRENCY = 5         # DMs enviadas em paralelo
+NOTIFICATION_DM_MAX = 5              # Máximo de chamadas de DM por janela (rate limit do Discord)
+NOTIFICATION_DM_WINDOW_SECONDS = 1   # Tamanho da janela do rate limit de DMs
+NOTIFICATION_MAX_RETRIES = 3         # Novas tentativas para falhas transitórias
+NOTIFICATION_RETRY_BASE_SECONDS = 2  # Backoff exponencial: 2s, 4s, 8s
+
+# ═══════════════════════════════════════════════════════════════
+# DASHBOARD EM PROCESSO SEPARADO (DASHBOARD_MODE=process)
+# ═══════════════════════════════════════════════════════════════
+
+DASHBOARD_HEALTH_INTERVAL = 30       # Segundos entre health checks (3 falhas seguidas = restart)
+
 # ═══════════════════════════════════════════════════════════════
 # SISTEMA DE CHECK-IN E STREAK
 # ═══════════════════════════════════════════════════════════════
@@ -607,6 +659,9 @@ VIP_EXTRA_DAILY_MISSIONS = 1         # +1 missão diária extra
 VIP_LOOTBOX_BONUS_CHANCE = 10        # +10% chance de prêmio raro
 VIP_PROFILE_BADGE = "👑 VIP"         # Badge exclusiva no perfil
 
+# Índice de VIPs em memória: recarregado periodicamente (cobre alterações feitas pela Dashboard em outro processo)
+VIP_INDEX_REFRESH_SECONDS = 600
+
 # ═══════════════════════════════════════════════════════════════
 # LISTA DE BENEFÍCIOS (para exibição)
 # ═══════════════════════════════════════════════════════════════
@@ -672,3 +727,6 @@ CALL_STATUS = {
 
 # Tempo limite para resposta do expert (em horas)
 CALL_REQUEST_EXPIRY_HOURS = 48
+
+# Compras iguais (item + alvo) dentro desta janela deslizante (duplo envio) são tratadas como uma só
+SHOP_IDEMPOTENCY_WINDOW_SECONDS = 30
@@ -1,13 +1,19 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 import os
 import sys
+import time
 import logging
+import threading
+from datetime import datetime, timezone
 from functools import wraps
 from dotenv import load_dotenv
 
 # Adiciona diretório pai ao path para importar modulos do bot
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.connection import get_supabase
+from database.change_feed import event_feed, dashboard_bus
+from database.queries import DashboardQueries, EventQueries
+from database.vip_index import vip_index
 
 # Configuração de Logs
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +26,70 @@ app.secret_key = os.getenv("SECRET_KEY", "shark_secret_key_123")  # Trocar em pr
 
 # Configurações
 ADMIN_PASSWORD = os.getenv("DASHBOARD_PASSWORD", "admin123")
+STARTED_AT = time.time()
+
+MISSIONS_PAGE_SIZE = 50
+MISSION_COUNTS_CACHE_SECONDS = 30
+
+_mission_counts_cache = {'data': None, 'fetched_at': 0.0}
+_mission_counts_lock = threading.Lock()
+
+
+def get_mission_counts():
+    """Contadores da página de missões com cache curto"""
+    with _mission_counts_lock:
+        if _mission_counts_cache['data'] is None or time.time() - _mission_counts_cache['fetched_at'] > MISSION_COUNTS_CACHE_SECONDS:
+            _mission_counts_cache['data'] = DashboardQueries.get_mission_counts()
+            _mission_counts_cache['fetched_at'] = time.time()
+        return _mission_counts_cache['data']
+
+
+class UsernameCache:
+    """
+    Cache user_id -> username da Dashboard.
+    Busca apenas os IDs que faltam e, a cada REFRESH_SECONDS, traz só os usuários
+    alterados desde a última atualização (coluna updated_at).
+    """
+    
+    REFRESH_SECONDS = 60
+    
+    def __init__(self):
+        self._names = {}
+        self._watermark = None  # Maior updated_at já visto
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _refresh(self):
+        if self._watermark is None:
+            self._watermark = datetime.now(timezone.utc).isoformat()
+            return
+        
+        while True:
+            changed = DashboardQueries.get_users_updated_since(self._watermark)
+            for user in changed:
+                if user['user_id'] in self._names:
+                    self._names[user['user_id']] = user.get('username')
+            if changed:
+                self._watermark = changed[-1]['updated_at']
+            if len(changed) < 1000:
+                break
+    
+    def get_many(self, user_ids):
+        with self._lock:
+            if time.time() - self._refreshed_at > self.REFRESH_SECONDS:
+                self._refresh()
+                self._refreshed_at = time.time()
+            
+            missing = [uid for uid in set(user_ids) if uid not in self._names]
+            if missing:
+                found = DashboardQueries.get_usernames(missing)
+                for uid in missing:
+                    self._names[uid] = found.get(uid)
+            
+            return {uid: self._names.get(uid) for uid in user_ids}
+
+
+username_cache = UsernameCache()
 
 def login_required(f):
     @wraps(f)
@@ -29,6 +99,11 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+@app.route('/healthz')
+def healthz():
+    """Health check usado pelo launcher (não consulta o banco, sem login)"""
+    return jsonify({'status': 'ok', 'pid': os.getpid(), 'uptime': int(time.time() - STARTED_AT)})
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -48,30 +123,16 @@ def logout():
 @app.route('/')
 @login_required
 def home():
-    supabase = get_supabase()
-    
-    # Busca estatísticas
-    total_users = supabase.table('users').select('*', count='exact').execute().count
-    
-    # Para somar XP e Coins, precisamos fazer fetch all (Supabase JS client tem sum(), python client é mais limitado para aggregation direto sem RPC)
-    # Para performance em produção, usaríamos RPC no postgres. Para agora, um fetch simples.
-    # Limitando a 1000 para não estourar em demo
-    users_data = supabase.table('users').select('xp,coins').limit(1000).execute().data
-    
-    total_xp = sum(u['xp'] for u in users_data)
-    total_coins = sum(u['coins'] for u in users_data)
-    
-    active_missions = supabase.table('missions').select('*', count='exact').eq('status', 'active').execute().count
-    
-    # Top Users
-    top_users = supabase.table('users').select('*').order('xp', desc=True).limit(5).execute().data
+    # Totais e top 5 em uma única chamada (RPC), com cache curto
+    home_stats = DashboardQueries.get_home_stats()
     
     stats = {
-        'total_users': total_users,
-        'total_xp': total_xp,
-        'total_coins': total_coins,
-        'active_missions': active_missions
+        'total_users': home_stats['total_users'],
+        'total_xp': home_stats['total_xp'],
+        'total_coins': home_stats['total_coins'],
+        'active_missions': home_stats['active_missions']
     }
+    top_users = home_stats['top_users']
     
     return render_template('home.html', stats=stats, top_users=top_users, title="Dashboard Overview", active_page='home')
 
@@ -115,6 +176,9 @@ def update_user():
         }).eq('user_id', user_id).execute()
         
         logger.info(f"Update result: {result}")
+        # Mesmo processo do bot: índice de VIPs atualizado na hora (senão, na próxima recarga)
+        if result.data:
+            vip_index.apply(result.data[0])
         
         admin_text = " (Admin)" if is_admin else ""
         flash(f"Usuário {user_id} atualizado com sucesso!{admin_text}", "success")
@@ -127,58 +191,57 @@ def update_user():
 @app.route('/missions')
 @login_required
 def missions():
-    supabase = get_supabase()
-    
     # Filters
     filter_status = request.args.get('status')
     filter_type = request.args.get('type')
     filter_user = request.args.get('user')
+    before = request.args.get('before')
     
-    query = supabase.table('missions').select('*').order('started_at', desc=True)
+    # Página atual (keyset por id - custo constante em qualquer página)
+    missions_data = DashboardQueries.get_missions_page(
+        status=filter_status or None,
+        mission_type=filter_type or None,
+        user_id=int(filter_user) if filter_user and filter_user.isdigit() else None,
+        before_id=int(before) if before and before.isdigit() else None,
+        page_size=MISSIONS_PAGE_SIZE
+    )
+    has_next = len(missions_data) > MISSIONS_PAGE_SIZE
+    missions_data = missions_data[:MISSIONS_PAGE_SIZE]
+    next_before = missions_data[-1]['id'] if has_next else None
     
-    if filter_status:
-        query = query.eq('status', filter_status)
-    if filter_type:
-        query = query.eq('mission_type', filter_type)
-    if filter_user and filter_user.isdigit():
-        query = query.eq('user_id', int(filter_user))
-    
-    missions_data = query.limit(100).execute().data
-    
-    # Get all users for name lookup
-    users_data = supabase.table('users').select('user_id,username').execute().data
-    user_map = {u['user_id']: u['username'] or f"User {u['user_id']}" for u in users_data}
-    
-    # Add username to each mission
+    # Nomes apenas dos usuários desta página (cache)
+    user_map = username_cache.get_many([m['user_id'] for m in missions_data])
     for mission in missions_data:
-        mission['username'] = user_map.get(mission['user_id'], f"ID: {mission['user_id']}")
+        mission['username'] = user_map.get(mission['user_id']) or f"ID: {mission['user_id']}"
     
-    # Get unique users that have missions (for dropdown)
-    all_missions = supabase.table('missions').select('user_id').execute().data
-    unique_user_ids = list(set(m['user_id'] for m in all_missions))
-    users_with_missions = [
-        {'user_id': uid, 'username': user_map.get(uid, f"ID: {uid}")}
-        for uid in unique_user_ids
-    ]
-    users_with_missions.sort(key=lambda x: x['username'].lower())
+    filter_user_name = ''
+    if filter_user and filter_user.isdigit():
+        filter_user_name = username_cache.get_many([int(filter_user)]).get(int(filter_user)) or ''
     
-    # Stats
-    stats = {
-        'active': len([m for m in all_missions if m.get('status') == 'active']),
-        'completed': len([m for m in all_missions if m.get('status') == 'completed']),
-        'weekly': len([m for m in all_missions if m.get('mission_type') == 'weekly' and m.get('status') == 'active'])
-    }
+    # Stats (contagem no servidor, com cache)
+    stats = get_mission_counts()
     
     return render_template('missions.html', 
                            missions=missions_data, 
                            stats=stats,
-                           users_with_missions=users_with_missions,
+                           next_before=next_before,
+                           is_first_page=not before,
                            filter_status=filter_status or '',
                            filter_type=filter_type or '',
                            filter_user=filter_user or '',
+                           filter_user_name=filter_user_name,
                            title="Gerenciar Missões", 
                            active_page='missions')
 
+@app.route('/users/search')
+@login_required
+def search_users():
+    """Typeahead do filtro de usuário (JSON)"""
+    term = (request.args.get('q') or '').strip()
+    if len(term) < 2 and not term.isdigit():
+        return jsonify([])
+    return jsonify(DashboardQueries.search_users(term))
+
 @app.route('/missions/advance', methods=['POST'])
 @login_required
 def advance_mission():
@@ -276,6 +339,8 @@ def complete_mission():
                     'status': 'pending',
                 }).execute()
                 logger.info(f"Notification created for user {user_id}")
+                # Entrega imediata se o bot roda no mesmo processo (a linha gravada é o fallback)
+                dashboard_bus.publish('notification', user_id=user_id)
             except Exception as notif_error:
                 logger.warning(f"Could not create notification: {notif_error}")
             
@@ -314,16 +379,10 @@ def convert_utc_to_br(utc_time_str):
 @app.route('/events')
 @login_required
 def events():
-    supabase = get_supabase()
-    
-    # Busca todos os eventos
-    events_data = supabase.table('events').select('*').order('created_at', desc=True).limit(50).execute().data
+    # Eventos e contagem de presenças em uma única consulta
+    events_data = EventQueries.get_events_with_presence_counts(limit=50)
     
-    # Busca presenças por evento e converte horários
     for event in events_data:
-        presences = supabase.table('event_presence').select('id', count='exact').eq('event_id', event['id']).execute()
-        event['presence_count'] = presences.count or 0
-        
         # Converte horários UTC para horário brasileiro
         if event.get('start_time'):
             event['start_time_br'] = convert_utc_to_br(event['start_time'])
@@ -387,9 +446,12 @@ def create_event():
             data['end_time'] = end_utc.isoformat()
         
         result = supabase.table('events').insert(data).execute()
+        EventQueries.get_active_events.invalidate()
         
         if result.data:
             event_id = result.data[0]['id']
+            # Avisa o bot na hora (se estiver no mesmo processo); senão o polling de fallback anuncia
+            event_feed.publish('insert', event_id=event_id, event=result.data[0])
             flash(f"✅ Evento '{name}' criado com sucesso! (ID: {event_id})", "success")
         else:
             flash("Erro ao criar evento", "error")
@@ -408,9 +470,12 @@ def end_event():
         event_id = int(request.form.get('event_id'))
         
         supabase = get_supabase()
-        supabase.table('events').update({
+        result = supabase.table('events').update({
             'is_active': False
         }).eq('id', event_id).execute()
+        EventQueries.get_active_events.invalidate()
+        
+        event_feed.publish('end', event_id=event_id, event=result.data[0] if result.data else None)
         
         flash(f"✅ Evento #{event_id} encerrado!", "success")
     except Exception as e:
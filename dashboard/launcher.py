@@ -0,0 +1,104 @@
+"""
+🦈 SharkClub Dashboard - Launcher
+Executa a Dashboard em um processo separado (gunicorn, múltiplos workers),
+com health check e desligamento gracioso. Assim a Dashboard não disputa o GIL com o bot.
+"""
+
+import importlib.util
+import os
+import signal
+import subprocess
+import sys
+from typing import Optional
+
+import aiohttp
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class DashboardProcess:
+    """Gerencia o processo da Dashboard (start, health check com restart e stop gracioso)"""
+    
+    def __init__(self, port: int, workers: int = 2, graceful_timeout: int = 10, max_failures: int = 3):
+        self.port = port
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.max_failures = max_failures
+        self.process: Optional[subprocess.Popen] = None
+        self.failures = 0
+        self.restarts = 0
+        self._stopping = False
+    
+    @staticmethod
+    def is_supported() -> bool:
+        """gunicorn instalado (Linux/macOS)"""
+        return importlib.util.find_spec('gunicorn') is not None
+    
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+    
+    def start(self) -> None:
+        """Inicia o servidor WSGI em um processo filho"""
+        command = [
+            sys.executable, '-m', 'gunicorn',
+            '--workers', str(self.workers),
+            '--bind', f'0.0.0.0:{self.port}',
+            '--graceful-timeout', str(self.graceful_timeout),
+            '--timeout', '60',
+            '--log-level', 'warning',
+            'dashboard.app:app',
+        ]
+        self.process = subprocess.Popen(command, cwd=ROOT_DIR)
+        self.failures = 0
+        print(f"🌐 Dashboard iniciada em processo separado (PID {self.process.pid}, {self.workers} workers, porta {self.port})")
+    
+    def stop(self) -> None:
+        """Desliga a Dashboard: SIGTERM (gunicorn termina as requisições em andamento) e kill se passar do tempo"""
+        self._stopping = True
+        if not self.running:
+            return
+        
+        print("🛑 Encerrando Dashboard...")
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=self.graceful_timeout + 5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        print("✅ Dashboard encerrada")
+    
+    def restart(self) -> None:
+        if self.running:
+            self.process.kill()
+            self.process.wait()
+        self.restarts += 1
+        self.start()
+    
+    async def check_health(self) -> None:
+        """Verifica /healthz; reinicia o processo se ele morreu ou parou de responder"""
+        if self._stopping:
+            return
+        
+        if not self.running:
+            print(f"⚠️ Processo da Dashboard terminou (código {self.process.returncode if self.process else '?'}) - reiniciando")
+            self.restart()
+            return
+        
+        try:
+            timeout = aiohttp.ClientTimeout(total=5)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(f'http://127.0.0.1:{self.port}/healthz') as response:
+                    healthy = response.status == 200
+        except Exception:
+            healthy = False
+        
+        if healthy:
+            self.failures = 0
+            return
+        
+        self.failures += 1
+        print(f"⚠️ Health check da Dashboard falhou ({self.failures}/{self.max_failures})")
+        if self.failures >= self.max_failures:
+            print("🔁 Reiniciando Dashboard")
+            self.restart()
@@ -0,0 +1,66 @@
+"""
+🦈 SharkClub Discord Bot - Badge Cache
+Insígnias de cada usuário em memória (/perfil e /badges leem daqui).
+As concessões e remoções de BadgeQueries mantêm o cache coerente; escritas de fora do bot
+(ex: reset_users.py) aparecem quando o conjunto vence.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class BadgeCache:
+    """Cache thread-safe user_id -> {badge_name: linha da tabela badges} com validade"""
+    
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._items: Dict[int, Tuple[float, Dict[str, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+    
+    def _entry(self, user_id: int) -> Optional[Dict[str, Dict[str, Any]]]:
+        entry = self._items.get(user_id)
+        if not entry:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            self._items.pop(user_id, None)
+            return None
+        return entry[1]
+    
+    def get(self, user_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Insígnias do usuário (None se não estiver em cache ou tiver vencido)"""
+        with self._lock:
+            badges = self._entry(user_id)
+            return [dict(badge) for badge in badges.values()] if badges is not None else None
+    
+    def has(self, user_id: int, badge_name: str) -> Optional[bool]:
+        """True/False se o conjunto do usuário estiver em cache, None se for desconhecido"""
+        with self._lock:
+            badges = self._entry(user_id)
+            return badge_name in badges if badges is not None else None
+    
+    def load(self, user_id: int, rows: List[Dict[str, Any]]) -> None:
+        """Substitui o conjunto do usuário pelas linhas lidas do banco"""
+        with self._lock:
+            self._items[user_id] = (time.monotonic(), {row['badge_name']: row for row in rows})
+    
+    def add(self, row: Dict[str, Any]) -> None:
+        """Registra uma insígnia concedida (ignorado se o usuário não estiver em cache)"""
+        with self._lock:
+            badges = self._entry(row['user_id'])
+            if badges is not None:
+                badges[row['badge_name']] = row
+    
+    def remove(self, user_id: int, badge_name: str) -> None:
+        with self._lock:
+            badges = self._entry(user_id)
+            if badges is not None:
+                badges.pop(badge_name, None)
+    
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._items.pop(user_id, None)
+
+
+# Cache global usado por BadgeQueries
+badge_cache = BadgeCache()
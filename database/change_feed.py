@@ -0,0 +1,105 @@
+"""
+🦈 SharkClub Discord Bot - Change Feed
+Feed de mudanças e barramento de mensagens em processo: a Dashboard (thread) e as queries publicam,
+o bot consome no próprio event loop sem precisar consultar o banco.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class ChangeFeed:
+    """
+    Feed de mudanças thread-safe.
+    Produtores podem estar em qualquer thread; o consumidor roda no loop do bot.
+    Enquanto nenhum loop estiver conectado, as publicações são ignoradas
+    (o polling de fallback do consumidor cobre esse caso).
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+    
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Conecta o feed ao event loop do consumidor"""
+        self._loop = loop
+        self._queue = asyncio.Queue()
+    
+    @property
+    def attached(self) -> bool:
+        return self._loop is not None and not self._loop.is_closed()
+    
+    def publish(self, change_type: str, **payload: Any) -> bool:
+        """Publica uma mudança (ex: 'insert', 'update', 'end'). Retorna False se não há consumidor."""
+        if not self.attached:
+            return False
+        
+        change: Dict[str, Any] = {'type': change_type, **payload}
+        
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is self._loop:
+            self._queue.put_nowait(change)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, change)
+        return True
+    
+    async def get(self) -> Dict[str, Any]:
+        """Aguarda a próxima mudança"""
+        return await self._queue.get()
+
+
+class MessageBus:
+    """
+    Barramento thread-safe por tópicos (Dashboard -> bot).
+    Os handlers (async) são registrados pelos cogs e executados no loop do bot.
+    O banco continua sendo o registro durável: se o bot não estiver no mesmo processo,
+    publish retorna False e o polling do bot processa o registro normalmente.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handlers: Dict[str, List[Callable[..., Awaitable[None]]]] = {}
+    
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Conecta o barramento ao event loop do bot"""
+        self._loop = loop
+    
+    def subscribe(self, topic: str, handler: Callable[..., Awaitable[None]]) -> None:
+        """Registra um handler async para um tópico (recebe o payload como kwargs)"""
+        self._handlers.setdefault(topic, []).append(handler)
+    
+    def unsubscribe(self, topic: str, handler: Callable[..., Awaitable[None]]) -> None:
+        handlers = self._handlers.get(topic, [])
+        if handler in handlers:
+            handlers.remove(handler)
+    
+    def publish(self, topic: str, **payload: Any) -> bool:
+        """Publica uma mensagem de qualquer thread. Retorna False se ninguém no processo vai recebê-la."""
+        if self._loop is None or self._loop.is_closed() or not self._handlers.get(topic):
+            return False
+        
+        self._loop.call_soon_threadsafe(self._dispatch, topic, payload)
+        return True
+    
+    def _dispatch(self, topic: str, payload: Dict[str, Any]) -> None:
+        for handler in list(self._handlers.get(topic, [])):
+            task = self._loop.create_task(handler(**payload))
+            task.add_done_callback(lambda t, topic=topic: self._log_error(topic, t))
+    
+    @staticmethod
+    def _log_error(topic: str, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            print(f"⚠️ Erro no handler do tópico '{topic}': {task.exception()}")
+
+
+# Feed de mudanças da tabela events (insert, update, end)
+event_feed = ChangeFeed('events')
+
+# Barramento Dashboard -> bot (ex: 'notification' quando uma missão é aprovada)
+dashboard_bus = MessageBus('dashboard')
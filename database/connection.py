@@ -264,6 +264,21 @@ CREATE TABLE IF NOT EXISTS event_presence (
     UNIQUE(event_id, user_id)
 );
 
+-- ═══════════════════════════════════════════════════════════════
+-- TABELA: HELP_PAIRS
+-- Membros únicos ajudados por semana (missão Mentor da Comunidade)
+-- ═══════════════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS help_pairs (
+    id SERIAL PRIMARY KEY,
+    helper_id BIGINT NOT NULL,                -- Quem ajudou
+    helped_id BIGINT NOT NULL,                -- Quem foi ajudado
+    week_start DATE NOT NULL,                 -- Segunda-feira da semana (UTC)
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    
+    UNIQUE(helper_id, week_start, helped_id)
+);
+
 -- ═══════════════════════════════════════════════════════════════
 -- ÍNDICES PARA PERFORMANCE
 -- ═══════════════════════════════════════════════════════════════
@@ -279,6 +294,10 @@ CREATE INDEX IF NOT EXISTS idx_badges_user ON badges(user_id);
 -- Missions
 CREATE INDEX IF NOT EXISTS idx_missions_user ON missions(user_id, status);
 CREATE INDEX IF NOT EXISTS idx_missions_type ON missions(mission_type, status);
+CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status);
+CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users(updated_at);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin (username gin_trgm_ops);  -- ILIKE '%termo%' da busca
 
 -- Rankings
 CREATE INDEX IF NOT EXISTS idx_rankings_weekly ON rankings(weekly_xp DESC);
@@ -327,6 +346,92 @@ CREATE TRIGGER users_updated_at
 ALTER TABLE users ADD COLUMN IF NOT EXISTS is_vip BOOLEAN DEFAULT FALSE;
 ALTER TABLE users ADD COLUMN IF NOT EXISTS vip_expires_at TIMESTAMPTZ;
 
+-- ═══════════════════════════════════════════════════════════════
+-- FUNÇÃO: ESTATÍSTICAS DA DASHBOARD (RPC)
+-- ═══════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION dashboard_home_stats()
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_users', totals.total_users,
+        'total_xp', totals.total_xp,
+        'total_coins', totals.total_coins,
+        'active_missions', (SELECT COUNT(*) FROM missions WHERE status = 'active'),
+        'top_users', (
+            SELECT COALESCE(json_agg(top), '[]'::json) FROM (
+                SELECT user_id, username, level, xp, is_vip FROM users ORDER BY xp DESC LIMIT 5
+            ) top
+        )
+    )
+    FROM (
+        SELECT COUNT(*) AS total_users, COALESCE(SUM(xp), 0) AS total_xp, COALESCE(SUM(coins), 0) AS total_coins
+        FROM users
+    ) totals;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION dashboard_mission_counts()
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'active', (SELECT COUNT(*) FROM missions WHERE status = 'active'),
+        'completed', (SELECT COUNT(*) FROM missions WHERE status = 'completed'),
+        'weekly', (SELECT COUNT(*) FROM missions WHERE mission_type = 'weekly' AND status = 'active')
+    );
+$$ LANGUAGE sql STABLE;
+
+-- ═══════════════════════════════════════════════════════════════
+-- FUNÇÃO: RECOMPENSAS EM LOTE (RPC)
+-- XP (com booster), nível e moedas somados no próprio UPDATE
+-- ═══════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION users_apply_rewards(
+    p_user_ids BIGINT[],
+    p_xp INTEGER[],
+    p_coins INTEGER[],
+    p_levels INTEGER[],
+    p_level_xp INTEGER[]
+)
+RETURNS TABLE (user_id BIGINT, xp_gained INTEGER, xp INTEGER, level INTEGER, coins INTEGER) AS $$
+    WITH deltas AS (
+        SELECT d.user_id, d.xp, d.coins FROM unnest(p_user_ids, p_xp, p_coins) AS d(user_id, xp, coins)
+    ), gains AS (
+        SELECT u.user_id, d.coins,
+               CASE WHEN d.xp > 0 AND u.xp_multiplier > 1 AND u.multiplier_expires_at > NOW()
+                    THEN FLOOR(d.xp * u.xp_multiplier)::INTEGER ELSE d.xp END AS xp_gained
+        FROM users u JOIN deltas d ON d.user_id = u.user_id
+    )
+    UPDATE users u SET
+        xp = GREATEST(0, u.xp + g.xp_gained),
+        coins = GREATEST(0, u.coins + g.coins),
+        level = COALESCE((
+            SELECT MAX(c.lvl) FROM unnest(p_levels, p_level_xp) AS c(lvl, req)
+            WHERE c.req <= GREATEST(0, u.xp + g.xp_gained)
+        ), 1)
+    FROM gains g
+    WHERE u.user_id = g.user_id
+    RETURNING u.user_id, g.xp_gained, u.xp, u.level, u.coins;
+$$ LANGUAGE sql;
+
+-- ═══════════════════════════════════════════════════════════════
+-- FUNÇÕES: INVENTÁRIO DE RECOMPENSAS (RPC)
+-- Incremento e decremento atômicos (reward_use retorna NULL se não houver unidade)
+-- ═══════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION reward_add(p_user_id BIGINT, p_reward_type TEXT, p_count INTEGER DEFAULT 1)
+RETURNS INTEGER AS $$
+    INSERT INTO rewards (user_id, reward_type, available_count)
+    VALUES (p_user_id, p_reward_type, p_count)
+    ON CONFLICT (user_id, reward_type)
+    DO UPDATE SET available_count = rewards.available_count + EXCLUDED.available_count
+    RETURNING available_count;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION reward_use(p_user_id BIGINT, p_reward_type TEXT)
+RETURNS INTEGER AS $$
+    UPDATE rewards SET available_count = available_count - 1, last_used = NOW()
+    WHERE user_id = p_user_id AND reward_type = p_reward_type AND available_count > 0
+    RETURNING available_count;
+$$ LANGUAGE sql;
+
 -- ═══════════════════════════════════════════════════════════════
 -- RLS (Row Level Security) - OPCIONAL
 -- Descomente as linhas abaixo se quiser habilitar RLS
@@ -0,0 +1,61 @@
+"""
+🦈 SharkClub Discord Bot - Evaluation Cooldowns
+Mapa em memória (avaliador, alvo) -> horário da última avaliação.
+Aquecido no startup com uma consulta sobre a janela de cooldown e atualizado a cada avaliação criada,
+então as verificações do painel de avaliação não consultam o banco.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .expirations import to_timestamp
+
+
+class EvaluationCooldowns:
+    """Mapa com validade: entradas mais antigas que a janela são descartadas ao serem consultadas"""
+    
+    def __init__(self):
+        self._last: Dict[Tuple[int, int], float] = {}
+        self._window = 0.0  # Segundos cobertos pelo aquecimento
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> bool:
+        return self._window > 0
+    
+    def load(self, rows: List[Dict[str, Any]], window_seconds: float) -> None:
+        """Aquece o mapa com as avaliações da janela (mantém registros mais novos feitos durante a carga)"""
+        with self._lock:
+            for row in rows:
+                created_at = to_timestamp(row.get('created_at'))
+                if created_at is None:
+                    continue
+                pair = (row['evaluator_id'], row['target_id'])
+                self._last[pair] = max(created_at, self._last.get(pair, 0.0))
+            self._window = window_seconds
+    
+    def record(self, evaluator_id: int, target_id: int, when: Optional[float] = None) -> None:
+        with self._lock:
+            self._last[(evaluator_id, target_id)] = when if when is not None else time.time()
+    
+    def can_evaluate(self, evaluator_id: int, target_id: int, cooldown_seconds: float) -> Optional[bool]:
+        """
+        True/False se o mapa responde; None se ainda não foi aquecido
+        ou se o cooldown pedido é maior que a janela carregada (consultar o banco).
+        """
+        if not self.loaded or cooldown_seconds > self._window:
+            return None
+        
+        now = time.time()
+        with self._lock:
+            last = self._last.get((evaluator_id, target_id))
+            if last is None:
+                return True
+            if now - last >= self._window:
+                del self._last[(evaluator_id, target_id)]  # Venceu para qualquer cooldown coberto
+            return now - last >= cooldown_seconds
+
+
+# Mapa global usado por EvaluationQueries
+evaluation_cooldowns = EvaluationCooldowns()
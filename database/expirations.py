@@ -0,0 +1,147 @@
+"""
+🦈 SharkClub Discord Bot - Expiration Scheduler
+Agenda em memória (heap) das expirações: boosters, VIP, eventos, calls e missões.
+Cada expiração dispara no horário exato; as que vencem juntas são processadas em lote.
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+
+Timestamp = Union[datetime, str, float, int]
+
+
+def to_timestamp(value: Timestamp) -> Optional[float]:
+    """Converte datetime, string ISO ou epoch para epoch (segundos)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # Horários sem fuso são salvos em UTC
+    return value.timestamp()
+
+
+class ExpirationScheduler:
+    """
+    Heap de expirações thread-safe.
+    Produtores (queries, Dashboard) agendam de qualquer thread; o runner roda no loop do bot
+    e chama o handler de cada tipo com todas as chaves vencidas de uma vez.
+    Reagendar uma chave substitui o horário anterior (entradas antigas são ignoradas no pop).
+    """
+    
+    def __init__(self, retry_delay: float = 60.0):
+        self.retry_delay = retry_delay
+        self._heap: List[Tuple[float, str, Hashable]] = []
+        self._due: Dict[Tuple[str, Hashable], float] = {}
+        self._handlers: Dict[str, Callable[[List[Hashable]], Any]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    def register(self, kind: str, handler: Callable[[List[Hashable]], Any]) -> None:
+        """Define a função (síncrona, roda em thread) que expira um lote de chaves do tipo"""
+        self._handlers[kind] = handler
+    
+    def schedule(self, kind: str, key: Hashable, when: Timestamp) -> bool:
+        """Agenda (ou reagenda) a expiração de uma chave"""
+        due_at = to_timestamp(when)
+        if due_at is None:
+            return False
+        
+        with self._lock:
+            self._due[(kind, key)] = due_at
+            heapq.heappush(self._heap, (due_at, kind, key))
+            is_next = self._heap[0][0] == due_at
+        
+        if is_next:
+            self._wake()
+        return True
+    
+    def cancel(self, kind: str, key: Hashable) -> None:
+        """Cancela a expiração agendada de uma chave (ex: VIP removido manualmente)"""
+        with self._lock:
+            self._due.pop((kind, key), None)
+    
+    def __len__(self) -> int:
+        return len(self._due)
+    
+    def _wake(self) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    def _next_delay(self) -> Optional[float]:
+        """Segundos até a próxima expiração válida (None se não houver nenhuma)"""
+        with self._lock:
+            while self._heap:
+                due_at, kind, key = self._heap[0]
+                if self._due.get((kind, key)) == due_at:
+                    return max(0.0, due_at - time.time())
+                heapq.heappop(self._heap)  # Entrada substituída ou cancelada
+        return None
+    
+    def _pop_due(self) -> Dict[str, List[Hashable]]:
+        """Remove do heap tudo que já venceu, agrupado por tipo"""
+        limit = time.time()
+        batches: Dict[str, List[Hashable]] = {}
+        
+        with self._lock:
+            while self._heap and self._heap[0][0] <= limit:
+                due_at, kind, key = heapq.heappop(self._heap)
+                if self._due.get((kind, key)) != due_at:
+                    continue
+                del self._due[(kind, key)]
+                batches.setdefault(kind, []).append(key)
+        
+        return batches
+    
+    async def run(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Loop principal: dorme até a próxima expiração e dispara os lotes vencidos"""
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        
+        while True:
+            self._wakeup.clear()
+            delay = self._next_delay()
+            
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    continue  # Algo mais próximo foi agendado; recalcula
+                except asyncio.TimeoutError:
+                    pass
+            
+            for kind, keys in self._pop_due().items():
+                handler = self._handlers.get(kind)
+                if not handler:
+                    print(f"⚠️ Expiração sem handler registrado: {kind}")
+                    continue
+                
+                try:
+                    await asyncio.to_thread(handler, keys)
+                except Exception as e:
+                    print(f"⚠️ Erro ao expirar {len(keys)} '{kind}': {e} - nova tentativa em {self.retry_delay:.0f}s")
+                    for key in keys:
+                        self.schedule(kind, key, time.time() + self.retry_delay)
+
+
+# Agenda global de expirações do bot
+expirations = ExpirationScheduler()
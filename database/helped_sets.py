@@ -0,0 +1,64 @@
+"""
+🦈 SharkClub Discord Bot - Helped Sets
+Conjunto em memória dos membros ajudados por cada helper na semana atual (tabela help_pairs).
+"Já ajudou este membro?" e "quantos únicos?" viram operações O(1).
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+def current_week_start() -> str:
+    """Segunda-feira da semana atual (UTC), no formato da coluna help_pairs.week_start"""
+    today = datetime.now(timezone.utc).date()
+    return (today - timedelta(days=today.weekday())).isoformat()
+
+
+class HelpedSets:
+    """
+    Cache thread-safe helper_id -> (semana, membros ajudados).
+    Todas as escritas em help_pairs passam por ActivityQueries.record_help, então um conjunto carregado
+    continua válido até a semana virar.
+    """
+    
+    def __init__(self):
+        self._sets: Dict[int, Tuple[str, Set[int]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, helper_id: int, week_start: str) -> Optional[Set[int]]:
+        """Membros ajudados na semana (None se o conjunto não estiver carregado)"""
+        with self._lock:
+            entry = self._sets.get(helper_id)
+            if not entry or entry[0] != week_start:
+                return None
+            return set(entry[1])
+    
+    def contains(self, helper_id: int, helped_id: int, week_start: str) -> Optional[bool]:
+        with self._lock:
+            entry = self._sets.get(helper_id)
+            if not entry or entry[0] != week_start:
+                return None
+            return helped_id in entry[1]
+    
+    def count(self, helper_id: int, week_start: str) -> Optional[int]:
+        with self._lock:
+            entry = self._sets.get(helper_id)
+            if not entry or entry[0] != week_start:
+                return None
+            return len(entry[1])
+    
+    def load(self, helper_id: int, week_start: str, helped_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._sets[helper_id] = (week_start, set(helped_ids))
+    
+    def add(self, helper_id: int, helped_id: int, week_start: str) -> None:
+        """Registra um par novo (ignorado se o conjunto da semana não estiver carregado)"""
+        with self._lock:
+            entry = self._sets.get(helper_id)
+            if entry and entry[0] == week_start:
+                entry[1].add(helped_id)
+
+
+# Conjuntos globais usados por ActivityQueries
+helped_sets = HelpedSets()
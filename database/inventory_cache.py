@@ -0,0 +1,59 @@
+"""
+🦈 SharkClub Discord Bot - Inventory Cache
+Inventário de recompensas (tickets, lootboxes, caixas) por usuário em memória.
+Só as operações atômicas de RewardQueries escrevem aqui, com a quantidade devolvida pelo banco,
+então o cache nunca diverge das escritas feitas por este processo.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InventoryCache:
+    """Cache thread-safe user_id -> {reward_type: available_count} com validade"""
+    
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._items: Dict[int, Tuple[float, Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, user_id: int) -> Optional[Dict[str, int]]:
+        """Inventário completo do usuário (None se não estiver em cache ou tiver vencido)"""
+        with self._lock:
+            entry = self._items.get(user_id)
+            if not entry:
+                return None
+            loaded_at, counts = entry
+            if time.monotonic() - loaded_at > self.ttl:
+                self._items.pop(user_id, None)
+                return None
+            return dict(counts)
+    
+    def get_count(self, user_id: int, reward_type: str) -> Optional[int]:
+        """Quantidade de um tipo (None = desconhecida, precisa consultar o banco)"""
+        counts = self.get(user_id)
+        if counts is None:
+            return None
+        return counts.get(reward_type, 0)
+    
+    def load(self, user_id: int, rows: List[Dict[str, Any]]) -> None:
+        """Substitui o inventário do usuário pelas linhas lidas da tabela rewards"""
+        counts = {row['reward_type']: row.get('available_count') or 0 for row in rows}
+        with self._lock:
+            self._items[user_id] = (time.monotonic(), counts)
+    
+    def set_count(self, user_id: int, reward_type: str, count: int) -> None:
+        """Aplica a quantidade devolvida por uma escrita atômica (ignorado se o usuário não estiver em cache)"""
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry:
+                entry[1][reward_type] = count
+    
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._items.pop(user_id, None)
+
+
+# Cache global usado por RewardQueries e UserQueries.get_user_state
+inventory = InventoryCache()
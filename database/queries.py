@@ -4,8 +4,17 @@ Queries para interação com Supabase
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set
+from .badge_cache import badge_cache
 from .connection import get_supabase
+from .change_feed import event_feed
+from .evaluation_cooldowns import evaluation_cooldowns
+from .expirations import expirations
+from .helped_sets import current_week_start, helped_sets
+from .inventory_cache import inventory
+from .single_flight import single_flight
+from .user_state import UserState
+from .vip_index import vip_index
 
 
 class UserQueries:
@@ -44,6 +53,38 @@ class UserQueries:
             user = UserQueries.create_user(user_id, username)
         return user
     
+    @staticmethod
+    def get_user_state(user_id: int, username: str = None) -> Optional[UserState]:
+        """
+        Carrega usuário, missões ativas, cooldowns, recompensas e progresso de hoje em um único round trip
+        (recursos embutidos - todas as tabelas referenciam users.user_id).
+        Com username, cria o usuário se ele não existir.
+        """
+        client = get_supabase()
+        today = datetime.now(timezone.utc).date().isoformat()
+        embedded = '*, missions(*), cooldowns(action_type, last_used), rewards(*), daily_progress(*)'
+        result = client.table('users').select(embedded).eq('user_id', user_id).eq('missions.status', 'active').eq('daily_progress.date', today).execute()
+        
+        if not result.data:
+            if username is None:
+                return None
+            return UserState(UserQueries.create_user(user_id, username), created=True)
+        
+        user = result.data[0]
+        missions = user.pop('missions', None)
+        cooldowns = user.pop('cooldowns', None)
+        rewards = user.pop('rewards', None)
+        progress = user.pop('daily_progress', None) or []
+        inventory.load(user_id, rewards or [])
+        return UserState(
+            user,
+            is_vip=UserQueries.vip_from_user(user),
+            missions=missions,
+            cooldowns=cooldowns,
+            rewards=rewards,
+            daily_progress=progress[0] if progress else None,
+        )
+    
     @staticmethod
     def update_xp(user_id: int, xp_amount: int, new_level: Optional[int] = None, apply_booster: bool = True) -> Dict[str, Any]:
         """Atualiza XP do usuário. Se apply_booster=True, aplica multiplicador ativo."""
@@ -141,6 +182,9 @@ class UserQueries:
         }
         
         result = client.table('users').update(update_data).eq('user_id', user_id).execute()
+        
+        if result.data:
+            expirations.schedule('booster', user_id, expires_at)
         return result.data[0] if result.data else None
     
     @staticmethod
@@ -149,7 +193,11 @@ class UserQueries:
         user = UserQueries.get_user(user_id)
         if not user:
             return None
-        
+        return UserQueries.booster_from_user(user)
+    
+    @staticmethod
+    def booster_from_user(user: Dict[str, Any]) -> Dict[str, Any]:
+        """Booster ativo a partir de uma linha de usuário já carregada (sem consultar o banco)"""
         multiplier = user.get('xp_multiplier', 1.0)
         expires_at_str = user.get('multiplier_expires_at')
         
@@ -169,14 +217,8 @@ class UserQueries:
                     'remaining_seconds': remaining_seconds,
                     'remaining_minutes': remaining_seconds // 60,
                 }
-            else:
-                # Booster expirou, limpa
-                client = get_supabase()
-                client.table('users').update({
-                    'xp_multiplier': 1.0,
-                    'multiplier_expires_at': None
-                }).eq('user_id', user_id).execute()
-                return None
+            # Booster expirado - a limpeza no banco é feita pela agenda de expirações
+            return None
         except:
             return None
     
@@ -195,6 +237,98 @@ class UserQueries:
         return set(u['user_id'] for u in (result.data or []))
     
     @staticmethod
+    def iter_users(columns: str = 'user_id, xp, level', page_size: int = 1000):
+        """
+        Percorre todos os usuários em páginas (keyset por user_id).
+        Evita o limite de linhas por request do Supabase em bases grandes.
+        """
+        client = get_supabase()
+        last_id = None
+        
+        while True:
+            query = client.table('users').select(columns).order('user_id').limit(page_size)
+            if last_id is not None:
+                query = query.gt('user_id', last_id)
+            
+            result = query.execute()
+            page = result.data or []
+            if not page:
+                break
+            
+            yield page
+            
+            if len(page) < page_size:
+                break
+            last_id = page[-1]['user_id']
+    
+    @staticmethod
+    def update_levels_batch(levels_by_user: Dict[int, int], chunk_size: int = 500) -> int:
+        """
+        Atualiza o nível de vários usuários em lote.
+        Agrupa por nível de destino (no máximo 10 grupos) e envia um update por bloco de IDs.
+        """
+        if not levels_by_user:
+            return 0
+        
+        client = get_supabase()
+        
+        users_by_level: Dict[int, List[int]] = {}
+        for user_id, level in levels_by_user.items():
+            users_by_level.setdefault(level, []).append(user_id)
+        
+        updated = 0
+        for level, user_ids in users_by_level.items():
+            for i in range(0, len(user_ids), chunk_size):
+                chunk = user_ids[i:i + chunk_size]
+                result = client.table('users').update({'level': level}).in_('user_id', chunk).execute()
+                updated += len(result.data) if result.data else 0
+        
+        return updated
+    
+    @staticmethod
+    def get_users_batch(user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Busca vários usuários em uma única consulta"""
+        if not user_ids:
+            return {}
+        client = get_supabase()
+        result = client.table('users').select('*').in_('user_id', list(user_ids)).execute()
+        return {user['user_id']: user for user in result.data or []}
+    
+    @staticmethod
+    def create_users_batch(usernames: Dict[int, str]) -> Dict[int, Dict[str, Any]]:
+        """Cria vários usuários de uma vez (ignora os que já existirem)"""
+        if not usernames:
+            return {}
+        client = get_supabase()
+        rows = [{'user_id': user_id, 'username': username} for user_id, username in usernames.items()]
+        client.table('users').upsert(rows, on_conflict='user_id', ignore_duplicates=True).execute()
+        return UserQueries.get_users_batch(list(usernames))
+    
+    @staticmethod
+    def apply_rewards_batch(rewards: Dict[int, tuple]) -> Dict[int, int]:
+        """
+        Soma XP (com booster ativo) e moedas de vários usuários em um único incremento (RPC users_apply_rewards).
+        XP, nível e moedas são calculados no próprio UPDATE: ganhos e débitos simultâneos não se perdem.
+        rewards: {user_id: (xp, moedas)}. Retorna o XP efetivamente ganho por usuário.
+        """
+        if not rewards:
+            return {}
+        
+        import config
+        client = get_supabase()
+        curve = sorted(config.XP_PER_LEVEL.items())
+        user_ids = list(rewards)
+        result = client.rpc('users_apply_rewards', {
+            'p_user_ids': user_ids,
+            'p_xp': [rewards[user_id][0] for user_id in user_ids],
+            'p_coins': [rewards[user_id][1] for user_id in user_ids],
+            'p_levels': [level for level, _ in curve],
+            'p_level_xp': [required_xp for _, required_xp in curve],
+        }).execute()
+        return {row['user_id']: row['xp_gained'] for row in result.data or []}
+    
+    @staticmethod
+    @single_flight(ttl=5)
     def get_top_users(limit: int = 10, order_by: str = 'xp') -> List[Dict[str, Any]]:
         """Busca top usuários por XP ou outro campo"""
         client = get_supabase()
@@ -220,11 +354,19 @@ class UserQueries:
     
     @staticmethod
     def is_vip(user_id: int) -> bool:
-        """Verifica se o usuário é VIP (ativo)"""
+        """Verifica se o usuário é VIP (ativo) - consulta o índice em memória quando carregado"""
+        known = vip_index.contains(user_id)
+        if known is not None:
+            return known
+        
         user = UserQueries.get_user(user_id)
         if not user:
             return False
-        
+        return UserQueries.vip_from_user(user)
+    
+    @staticmethod
+    def vip_from_user(user: Dict[str, Any]) -> bool:
+        """VIP ativo a partir de uma linha de usuário já carregada (sem consultar o banco)"""
         is_vip = user.get('is_vip', False)
         if not is_vip:
             return False
@@ -237,12 +379,7 @@ class UserQueries:
                 now = datetime.now(timezone.utc)
                 
                 if vip_expires_at < now:
-                    # VIP expirou, remove o status
-                    client = get_supabase()
-                    client.table('users').update({
-                        'is_vip': False,
-                        'vip_expires_at': None
-                    }).eq('user_id', user_id).execute()
+                    # VIP expirado - a remoção no banco é feita pela agenda de expirações
                     return False
             except:
                 pass
@@ -256,7 +393,7 @@ class UserQueries:
         if not user:
             return None
         
-        is_vip = UserQueries.is_vip(user_id)
+        is_vip = UserQueries.vip_from_user(user)
         
         result = {
             'is_vip': is_vip,
@@ -299,6 +436,13 @@ class UserQueries:
             update_data['vip_expires_at'] = None  # Permanente
         
         result = client.table('users').update(update_data).eq('user_id', user_id).execute()
+        
+        if result.data:
+            vip_index.apply(result.data[0])
+            if duration_days is not None:
+                expirations.schedule('vip', user_id, expires_at)
+            else:
+                expirations.cancel('vip', user_id)
         return result.data[0] if result.data else None
     
     @staticmethod
@@ -310,8 +454,36 @@ class UserQueries:
             'vip_expires_at': None
         }
         result = client.table('users').update(update_data).eq('user_id', user_id).execute()
+        expirations.cancel('vip', user_id)
+        if result.data:
+            vip_index.apply(result.data[0])
         return result.data[0] if result.data else None
     
+    @staticmethod
+    def load_vip_index(page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Carrega o índice de VIPs em memória. Retorna as linhas (user_id, vip_expires_at).
+        Lê todas as páginas (keyset por user_id) antes de marcar o índice como carregado -
+        um índice parcial responderia False para os VIPs que ficaram de fora.
+        """
+        client = get_supabase()
+        rows = []
+        last_id = None
+        
+        while True:
+            query = client.table('users').select('user_id, vip_expires_at').eq('is_vip', True).order('user_id').limit(page_size)
+            if last_id is not None:
+                query = query.gt('user_id', last_id)
+            
+            page = query.execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            last_id = page[-1]['user_id']
+        
+        vip_index.load(rows)
+        return rows
+    
     @staticmethod
     def get_all_vips() -> List[Dict[str, Any]]:
         """Retorna lista de todos os usuários VIP ativos"""
@@ -339,44 +511,88 @@ class BadgeQueries:
     
     @staticmethod
     def get_user_badges(user_id: int) -> List[Dict[str, Any]]:
-        """Busca todas as insígnias do usuário"""
+        """Busca todas as insígnias do usuário (conjunto em cache)"""
+        badges = badge_cache.get(user_id)
+        if badges is not None:
+            return badges
+        
         client = get_supabase()
         result = client.table('badges').select('*').eq('user_id', user_id).execute()
+        badge_cache.load(user_id, result.data or [])
         return result.data if result.data else []
     
     @staticmethod
     def has_badge(user_id: int, badge_name: str) -> bool:
         """Verifica se usuário tem determinada insígnia"""
-        client = get_supabase()
-        result = client.table('badges').select('id').eq('user_id', user_id).eq('badge_name', badge_name).execute()
-        return len(result.data) > 0 if result.data else False
+        cached = badge_cache.has(user_id, badge_name)
+        if cached is not None:
+            return cached
+        return any(b.get('badge_name') == badge_name for b in BadgeQueries.get_user_badges(user_id))
     
     @staticmethod
-    def award_badge(user_id: int, badge_name: str, badge_type: str = 'permanent', 
-                    expires_at: Optional[datetime] = None) -> Dict[str, Any]:
-        """Concede insígnia ao usuário"""
-        client = get_supabase()
-        
-        # Verifica se já tem a badge
-        if BadgeQueries.has_badge(user_id, badge_name):
-            return None
-        
-        data = {
+    def _badge_row(user_id: int, badge_name: str, badge_type: str = 'permanent',
+                   expires_at: Optional[datetime] = None) -> Dict[str, Any]:
+        return {
             'user_id': user_id,
             'badge_name': badge_name,
             'badge_type': badge_type,
             'is_temporary': expires_at is not None,
             'expires_at': expires_at.isoformat() if expires_at else None,
         }
+    
+    @staticmethod
+    def award_badge(user_id: int, badge_name: str, badge_type: str = 'permanent', 
+                    expires_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Concede insígnia ao usuário.
+        Insert com ON CONFLICT DO NOTHING (UNIQUE(user_id, badge_name)): retorna None se ele já tinha.
+        """
+        # Já sabemos que ele tem - nem vai ao banco
+        if badge_cache.has(user_id, badge_name):
+            return None
         
-        result = client.table('badges').insert(data).execute()
-        return result.data[0] if result.data else None
+        client = get_supabase()
+        data = BadgeQueries._badge_row(user_id, badge_name, badge_type, expires_at)
+        result = client.table('badges').upsert(data, on_conflict='user_id,badge_name', ignore_duplicates=True).execute()
+        
+        if not result.data:
+            return None
+        badge_cache.add(result.data[0])
+        return result.data[0]
+    
+    @staticmethod
+    def award_badges_batch(awards: List[tuple], chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """
+        Concede várias insígnias em lote (ondas de level up, eventos).
+        awards: [(user_id, badge_name, badge_type)]. Um insert ON CONFLICT DO NOTHING por bloco;
+        retorna apenas as linhas realmente criadas.
+        """
+        rows = {}
+        for user_id, badge_name, badge_type in awards:
+            if (user_id, badge_name) not in rows and not badge_cache.has(user_id, badge_name):
+                rows[(user_id, badge_name)] = BadgeQueries._badge_row(user_id, badge_name, badge_type)
+        
+        if not rows:
+            return []
+        
+        client = get_supabase()
+        rows = list(rows.values())
+        created = []
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            result = client.table('badges').upsert(chunk, on_conflict='user_id,badge_name', ignore_duplicates=True).execute()
+            created.extend(result.data or [])
+        
+        for row in created:
+            badge_cache.add(row)
+        return created
     
     @staticmethod
     def remove_badge(user_id: int, badge_name: str) -> bool:
         """Remove insígnia do usuário"""
         client = get_supabase()
         result = client.table('badges').delete().eq('user_id', user_id).eq('badge_name', badge_name).execute()
+        badge_cache.remove(user_id, badge_name)
         return True
 
 
@@ -413,6 +629,9 @@ class MissionQueries:
         }
         
         result = client.table('missions').insert(data).execute()
+        
+        if result.data and expires_at:
+            expirations.schedule('missions', data['expires_at'], expires_at)
         return result.data[0] if result.data else None
     
     @staticmethod
@@ -464,6 +683,10 @@ class MissionQueries:
             return 0
         client = get_supabase()
         result = client.table('missions').insert(missions_data).execute()
+        
+        # Uma entrada por prazo distinto (todas as missões do mesmo prazo expiram juntas)
+        for expires_at in {m.get('expires_at') for m in missions_data if m.get('expires_at')}:
+            expirations.schedule('missions', expires_at, expires_at)
         return len(result.data) if result.data else 0
 
 
@@ -478,39 +701,52 @@ class RewardQueries:
         return result.data[0] if result.data else None
     
     @staticmethod
-    def add_reward(user_id: int, reward_type: str, count: int = 1) -> Dict[str, Any]:
-        """Adiciona recompensa ao usuário"""
+    def get_inventory(user_id: int) -> Dict[str, int]:
+        """Inventário do usuário {reward_type: quantidade} (lido do cache quando possível)"""
+        counts = inventory.get(user_id)
+        if counts is not None:
+            return counts
+        
+        client = get_supabase()
+        result = client.table('rewards').select('reward_type, available_count').eq('user_id', user_id).execute()
+        inventory.load(user_id, result.data or [])
+        return {row['reward_type']: row.get('available_count') or 0 for row in result.data or []}
+    
+    @staticmethod
+    def add_reward(user_id: int, reward_type: str, count: int = 1) -> Optional[int]:
+        """
+        Adiciona recompensa ao usuário com um incremento atômico no banco (RPC reward_add).
+        Retorna a nova quantidade disponível.
+        """
         client = get_supabase()
-        existing = RewardQueries.get_reward(user_id, reward_type)
+        result = client.rpc('reward_add', {'p_user_id': user_id, 'p_reward_type': reward_type, 'p_count': count}).execute()
         
-        if existing:
-            new_count = existing.get('available_count', 0) + count
-            result = client.table('rewards').update({'available_count': new_count}).eq('id', existing['id']).execute()
-        else:
-            data = {
-                'user_id': user_id,
-                'reward_type': reward_type,
-                'available_count': count,
-            }
-            result = client.table('rewards').insert(data).execute()
+        if result.data is None:
+            inventory.invalidate(user_id)
+            return None
         
-        return result.data[0] if result.data else None
+        inventory.set_count(user_id, reward_type, result.data)
+        return result.data
     
     @staticmethod
     def use_reward(user_id: int, reward_type: str) -> bool:
-        """Usa uma recompensa (decrementa contador)"""
+        """
+        Usa uma recompensa com um decremento condicional no banco (RPC reward_use:
+        UPDATE ... WHERE available_count > 0). Cliques simultâneos nunca gastam a mesma unidade duas vezes.
+        Se o cache sabe que não há unidades, nem consulta o banco.
+        """
+        if inventory.get_count(user_id, reward_type) == 0:
+            return False
+        
         client = get_supabase()
-        existing = RewardQueries.get_reward(user_id, reward_type)
+        result = client.rpc('reward_use', {'p_user_id': user_id, 'p_reward_type': reward_type}).execute()
         
-        if not existing or existing.get('available_count', 0) <= 0:
+        if result.data is None:
+            # Nada disponível (ou outro clique levou a última unidade)
+            inventory.set_count(user_id, reward_type, 0)
             return False
         
-        new_count = existing['available_count'] - 1
-        update_data = {
-            'available_count': new_count,
-            'last_used': datetime.now(timezone.utc).isoformat(),
-        }
-        client.table('rewards').update(update_data).eq('id', existing['id']).execute()
+        inventory.set_count(user_id, reward_type, result.data)
         return True
 
 
@@ -529,21 +765,34 @@ class CooldownQueries:
     
     @staticmethod
     def set_cooldown(user_id: int, action_type: str) -> None:
-        """Define cooldown para uma ação"""
+        """Define cooldown para uma ação (upsert - UNIQUE(user_id, action_type))"""
         client = get_supabase()
         now = datetime.now(timezone.utc).isoformat()
+        client.table('cooldowns').upsert({'user_id': user_id, 'action_type': action_type, 'last_used': now}, on_conflict='user_id,action_type').execute()
+    
+    @staticmethod
+    def claim_cooldown(user_id: int, action_type: str, cooldown_seconds: int) -> bool:
+        """
+        Inicia o cooldown só se ele estiver liberado (update condicional em last_used).
+        Entre cliques simultâneos, apenas um consegue - os outros recebem False.
+        """
+        client = get_supabase()
+        now = datetime.now(timezone.utc)
+        threshold = (now - timedelta(seconds=cooldown_seconds)).isoformat()
         
-        # Tenta atualizar, se não existir insere
-        existing = client.table('cooldowns').select('id').eq('user_id', user_id).eq('action_type', action_type).execute()
+        result = client.table('cooldowns').update({'last_used': now.isoformat()}).eq('user_id', user_id).eq('action_type', action_type).lte('last_used', threshold).execute()
+        if result.data:
+            return True
         
-        if existing.data:
-            client.table('cooldowns').update({'last_used': now}).eq('user_id', user_id).eq('action_type', action_type).execute()
-        else:
-            client.table('cooldowns').insert({
-                'user_id': user_id,
-                'action_type': action_type,
-                'last_used': now,
-            }).execute()
+        # Primeiro uso: ainda não existe linha. Se outro clique inserir antes, a UNIQUE barra este
+        try:
+            result = client.table('cooldowns').insert({'user_id': user_id, 'action_type': action_type, 'last_used': now.isoformat()}).execute()
+            return bool(result.data)
+        except Exception as e:
+            if getattr(e, 'code', None) == '23505':  # unique_violation: o outro clique venceu
+                return False
+            print(f"❌ Erro ao iniciar cooldown {action_type} de {user_id}: {e}")
+            raise
     
     @staticmethod
     def check_cooldown(user_id: int, action_type: str, cooldown_seconds: int) -> tuple[bool, int]:
@@ -701,29 +950,51 @@ class ActivityQueries:
         return consecutive
     
     @staticmethod
-    def get_unique_helped_members(helper_id: int, days: int = 7) -> List[int]:
+    def get_helped_this_week(helper_id: int) -> Set[int]:
+        """Membros únicos que o helper ajudou na semana atual (conjunto em memória, carregado uma vez)"""
+        week_start = current_week_start()
+        helped = helped_sets.get(helper_id, week_start)
+        if helped is not None:
+            return helped
+        
+        client = get_supabase()
+        result = client.table('help_pairs').select('helped_id').eq('helper_id', helper_id).eq('week_start', week_start).execute()
+        helped = {row['helped_id'] for row in result.data or []}
+        helped_sets.load(helper_id, week_start, helped)
+        return helped
+    
+    @staticmethod
+    def count_helped_this_week(helper_id: int) -> int:
+        """Quantidade de membros únicos ajudados na semana atual"""
+        count = helped_sets.count(helper_id, current_week_start())
+        if count is not None:
+            return count
+        return len(ActivityQueries.get_helped_this_week(helper_id))
+    
+    @staticmethod
+    def record_help(helper_id: int, helped_member_id: int) -> bool:
         """
-        Retorna lista de IDs de membros únicos que o helper ajudou nos últimos X dias.
-        Usa a tabela de evaluations para rastrear ajudas.
+        Registra que o helper ajudou o membro nesta semana.
+        Insert ON CONFLICT DO NOTHING em help_pairs; retorna True só para um par novo
+        (que também vai para o activity_log, onde conta como atividade do helper).
         """
-        client = get_supabase()
-        from_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        week_start = current_week_start()
+        already_helped = helped_sets.contains(helper_id, helped_member_id, week_start)
+        if already_helped is None:
+            already_helped = helped_member_id in ActivityQueries.get_helped_this_week(helper_id)
+        if already_helped:
+            return False
         
-        # Busca avaliações onde o helper foi o alvo (quem recebeu o /ajudou)
-        # ou usa activity_log com tipo 'help'
-        result = client.table('activity_log').select('message_id').eq('user_id', helper_id).eq('activity_type', 'help').gte('created_at', from_date).execute()
+        client = get_supabase()
+        data = {'helper_id': helper_id, 'helped_id': helped_member_id, 'week_start': week_start}
+        result = client.table('help_pairs').upsert(data, on_conflict='helper_id,week_start,helped_id', ignore_duplicates=True).execute()
         
+        helped_sets.add(helper_id, helped_member_id, week_start)
         if not result.data:
-            return []
-        
-        # message_id é usado para armazenar o ID do membro que foi ajudado
-        unique_members = set()
-        for item in result.data:
-            member_id = item.get('message_id')
-            if member_id:
-                unique_members.add(member_id)
+            return False
         
-        return list(unique_members)
+        ActivityQueries.log_help_activity(helper_id, helped_member_id)
+        return True
     
     @staticmethod
     def log_help_activity(helper_id: int, helped_member_id: int) -> Dict[str, Any]:
@@ -761,8 +1032,35 @@ class EvaluationQueries:
             'created_at': datetime.now(timezone.utc).isoformat(),
         }
         result = client.table('evaluations').insert(data).execute()
+        if result.data:
+            evaluation_cooldowns.record(evaluator_id, target_id)
         return result.data[0] if result.data else None
     
+    @staticmethod
+    def warm_cooldowns(cooldown_hours: int = 24, page_size: int = 1000) -> int:
+        """
+        Carrega os pares avaliados dentro da janela de cooldown (startup, em páginas por id).
+        A janela só é marcada como carregada depois da última página - um mapa parcial liberaria avaliações.
+        """
+        client = get_supabase()
+        since = (datetime.now(timezone.utc) - timedelta(hours=cooldown_hours)).isoformat()
+        rows = []
+        last_id = None
+        
+        while True:
+            query = client.table('evaluations').select('id, evaluator_id, target_id, created_at').gte('created_at', since).order('id').limit(page_size)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            
+            page = query.execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            last_id = page[-1]['id']
+        
+        evaluation_cooldowns.load(rows, cooldown_hours * 3600)
+        return len(rows)
+    
     @staticmethod
     def get_user_evaluations_received(user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Busca avaliações recebidas pelo usuário (mais recentes primeiro)"""
@@ -825,7 +1123,11 @@ class EvaluationQueries:
     
     @staticmethod
     def can_evaluate(evaluator_id: int, target_id: int, cooldown_hours: int = 24) -> bool:
-        """Verifica se o avaliador pode avaliar o alvo (cooldown)"""
+        """Verifica se o avaliador pode avaliar o alvo (cooldown) - pelo mapa em memória quando aquecido"""
+        cached = evaluation_cooldowns.can_evaluate(evaluator_id, target_id, cooldown_hours * 3600)
+        if cached is not None:
+            return cached
+        
         client = get_supabase()
         cooldown_time = (datetime.now(timezone.utc) - timedelta(hours=cooldown_hours)).isoformat()
         
@@ -1011,10 +1313,12 @@ class DailyProgressQueries:
         return result.data[0] if result.data else None
     
     @staticmethod
-    def get_user_daily_summary(user_id: int) -> Dict[str, Any]:
-        """Retorna resumo do dia para o usuário"""
-        progress = DailyProgressQueries.get_or_create_today_progress(user_id)
-        is_vip = UserQueries.is_vip(user_id)
+    def get_user_daily_summary(user_id: int, state: UserState = None) -> Dict[str, Any]:
+        """Retorna resumo do dia para o usuário (com state pré-carregado, só cria o progresso se faltar)"""
+        progress = state.daily_progress if state else None
+        if progress is None:
+            progress = DailyProgressQueries.get_or_create_today_progress(user_id)
+        is_vip = state.is_vip if state else UserQueries.is_vip(user_id)
         
         import config
         
@@ -1060,9 +1364,14 @@ class EventQueries:
             'starts_at': datetime.now(timezone.utc).isoformat(),
         }
         result = client.table('events').insert(data).execute()
+        EventQueries.get_active_events.invalidate()
+        
+        if result.data:
+            event_feed.publish('insert', event_id=result.data[0]['id'], event=result.data[0])
         return result.data[0] if result.data else None
     
     @staticmethod
+    @single_flight(ttl=2)
     def get_active_events() -> List[Dict[str, Any]]:
         """Retorna todos os eventos ativos"""
         client = get_supabase()
@@ -1093,6 +1402,9 @@ class EventQueries:
             'ends_at': datetime.now(timezone.utc).isoformat(),
         }
         result = client.table('events').update(update_data).eq('id', event_id).execute()
+        EventQueries.get_active_events.invalidate()
+        
+        event_feed.publish('end', event_id=event_id, event=result.data[0] if result.data else None)
         return result.data[0] if result.data else None
     
     @staticmethod
@@ -1110,6 +1422,7 @@ class EventQueries:
                 'channel_id': str(channel_id),
             }
             client.table('events').update(update_data).eq('id', event_id).execute()
+            EventQueries.get_active_events.invalidate()
             return True
         except:
             return False
@@ -1148,6 +1461,54 @@ class EventQueries:
         result = client.table('event_presence').insert(data).execute()
         return result.data[0] if result.data else None
     
+    @staticmethod
+    def mark_presences_batch(event: Dict[str, Any], usernames: Dict[int, str]) -> List[Dict[str, Any]]:
+        """
+        Marca presença de vários usuários em um evento e credita as recompensas em lote.
+        Usuários que já tinham presença são ignorados. Retorna apenas as presenças novas.
+        """
+        if not usernames:
+            return []
+        
+        import config
+        client = get_supabase()
+        
+        users = UserQueries.get_users_batch(list(usernames))
+        missing = {user_id: name for user_id, name in usernames.items() if user_id not in users}
+        if missing:
+            users.update(UserQueries.create_users_batch(missing))
+        
+        rows = []
+        for user_id in usernames:
+            is_vip = bool(users.get(user_id, {}).get('is_vip'))
+            multiplier = config.VIP_EVENT_PRESENCE_MULTIPLIER if is_vip else config.FREE_EVENT_PRESENCE_MULTIPLIER
+            rows.append({
+                'event_id': event['id'],
+                'user_id': user_id,
+                'presence_multiplier': multiplier,
+                'xp_earned': event.get('xp_reward', config.EVENT_PRESENCE_BASE_XP) * multiplier,
+                'coins_earned': event.get('coins_reward', config.EVENT_PRESENCE_BASE_COINS) * multiplier,
+            })
+        
+        # UNIQUE(event_id, user_id): duplicados são ignorados e não voltam no resultado
+        result = client.table('event_presence').upsert(rows, on_conflict='event_id,user_id', ignore_duplicates=True).execute()
+        presences = result.data or []
+        
+        rewards = {p['user_id']: (p['xp_earned'], p['coins_earned']) for p in presences}
+        xp_gained = UserQueries.apply_rewards_batch(rewards)
+        
+        for presence in presences:
+            presence['is_vip'] = bool(users.get(presence['user_id'], {}).get('is_vip'))
+            presence['xp_gained'] = xp_gained.get(presence['user_id'], presence['xp_earned'])
+        return presences
+    
+    @staticmethod
+    def get_presence_user_ids(event_id: int) -> Set[int]:
+        """IDs de todos os usuários que já marcaram presença no evento"""
+        client = get_supabase()
+        result = client.table('event_presence').select('user_id').eq('event_id', event_id).execute()
+        return {row['user_id'] for row in result.data or []}
+    
     @staticmethod
     def get_event_presences(event_id: int) -> List[Dict[str, Any]]:
         """Retorna todas as presenças de um evento"""
@@ -1155,6 +1516,34 @@ class EventQueries:
         result = client.table('event_presence').select('*').eq('event_id', event_id).execute()
         return result.data if result.data else []
     
+    @staticmethod
+    def get_presence_summary(event_id: int, preview_limit: int = 15) -> Dict[str, Any]:
+        """Contagem de presenças e os primeiros participantes do evento, em uma única consulta"""
+        client = get_supabase()
+        result = client.table('event_presence').select('user_id, marked_at', count='exact').eq('event_id', event_id).order('marked_at').limit(preview_limit).execute()
+        return {'count': result.count or 0, 'preview': result.data or []}
+    
+    @staticmethod
+    def get_events_with_presence_counts(limit: int = 50) -> List[Dict[str, Any]]:
+        """Eventos mais recentes com a contagem de presenças (agregado embutido, sem uma consulta por evento)"""
+        client = get_supabase()
+        result = client.table('events').select('*, event_presence(count)').order('created_at', desc=True).limit(limit).execute()
+        
+        events = result.data or []
+        for event in events:
+            aggregate = event.pop('event_presence', None) or []
+            event['presence_count'] = aggregate[0]['count'] if aggregate else 0
+        return events
+    
+    @staticmethod
+    def get_user_presence_event_ids(user_id: int, event_ids: List[int]) -> Set[int]:
+        """IDs dos eventos (entre os informados) em que o usuário já marcou presença"""
+        if not event_ids:
+            return set()
+        client = get_supabase()
+        result = client.table('event_presence').select('event_id').eq('user_id', user_id).in_('event_id', event_ids).execute()
+        return {row['event_id'] for row in result.data or []}
+    
     @staticmethod
     def get_user_event_presences(user_id: int, days: int = 30) -> List[Dict[str, Any]]:
         """Retorna presenças do usuário nos últimos X dias"""
@@ -1174,21 +1563,59 @@ class ShopQueries:
     """Queries relacionadas à loja e compras"""
     
     @staticmethod
-    def create_purchase(buyer_id: int, item_id: str, target_id: int = None, 
-                       price_paid: int = 0, guild_id: int = None) -> Dict[str, Any]:
-        """Cria uma nova compra na loja"""
+    def purchase(idempotency_key: str, buyer_id: int, item_id: str, price_free: int, price_vip: int,
+                 target_id: int = None, guild_id: int = None, dedupe_seconds: int = 30) -> Dict[str, Any]:
+        """
+        Compra atômica em um único round trip (RPC shop_purchase): preço pelo status VIP, débito condicional
+        e registro da compra. A mesma chave de idempotência nunca cobra duas vezes, e a mesma compra
+        (item + alvo) repetida em dedupe_seconds volta como 'duplicate'.
+        Retorna o recibo {'status': 'ok' | 'duplicate' | 'insufficient_funds' | 'error', 'purchase', 'price', 'balance'}.
+        """
         client = get_supabase()
-        data = {
-            'buyer_id': buyer_id,
-            'item_id': item_id,
-            'target_id': target_id,
-            'price_paid': price_paid,
-            'guild_id': guild_id,
-            'status': 'pending',
-            'created_at': datetime.now(timezone.utc).isoformat(),
-        }
-        result = client.table('shop_purchases').insert(data).execute()
-        return result.data[0] if result.data else None
+        try:
+            result = client.rpc('shop_purchase', {
+                'p_idempotency_key': idempotency_key,
+                'p_buyer_id': buyer_id,
+                'p_item_id': item_id,
+                'p_price_free': price_free,
+                'p_price_vip': price_vip,
+                'p_target_id': target_id,
+                'p_guild_id': guild_id,
+                'p_dedupe_seconds': dedupe_seconds,
+            }).execute()
+        except Exception as e:
+            print(f"⚠️ Erro na compra (RPC shop_purchase - execute migration_shop_transactions.sql): {e}")
+            return {'status': 'error'}
+        
+        receipt = result.data or {'status': 'error'}
+        if receipt.get('status') == 'ok' and item_id == 'call_expert':
+            import config
+            expires_at = datetime.now(timezone.utc) + timedelta(hours=config.CALL_REQUEST_EXPIRY_HOURS)
+            expirations.schedule('call', receipt['purchase']['id'], expires_at)
+        return receipt
+    
+    @staticmethod
+    def refund_purchase(purchase_id: int, new_status: str = 'declined', expected_status: str = 'pending') -> Dict[str, Any]:
+        """
+        Muda o status e devolve as moedas ao comprador na mesma transação (RPC shop_refund).
+        Só reembolsa se a compra ainda estiver em expected_status - recusas repetidas não devolvem duas vezes.
+        Retorna {'status': 'ok' | 'not_refundable' | 'error', 'purchase', 'balance'}.
+        """
+        client = get_supabase()
+        try:
+            result = client.rpc('shop_refund', {
+                'p_purchase_id': purchase_id,
+                'p_new_status': new_status,
+                'p_expected_status': expected_status,
+            }).execute()
+        except Exception as e:
+            print(f"⚠️ Erro no reembolso da compra #{purchase_id}: {e}")
+            return {'status': 'error'}
+        
+        receipt = result.data or {'status': 'error'}
+        if receipt.get('status') == 'ok':
+            expirations.cancel('call', purchase_id)
+        return receipt
     
     @staticmethod
     def get_purchase(purchase_id: int) -> Optional[Dict[str, Any]]:
@@ -1275,18 +1702,239 @@ class ShopQueries:
     
     @staticmethod
     def expire_old_calls(hours: int = 48) -> int:
-        """Expira pedidos de call antigos e retorna quantidade expirada"""
+        """Expira (com reembolso) pedidos de call antigos e retorna quantidade expirada"""
         client = get_supabase()
         expiry_time = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
         
-        result = client.table('shop_purchases').update({
-            'status': 'expired',
-            'resolved_at': datetime.now(timezone.utc).isoformat(),
-        }).eq('status', 'pending').eq('item_id', 'call_expert').lt('created_at', expiry_time).execute()
+        result = client.table('shop_purchases').select('id').eq('status', 'pending').eq('item_id', 'call_expert').lt('created_at', expiry_time).execute()
+        if not result.data:
+            return 0
+        return ExpirationQueries.expire_calls([row['id'] for row in result.data])
+
+
+class ExpirationQueries:
+    """Queries da agenda de expirações (carga inicial e expiração em lote)"""
+    
+    @staticmethod
+    def _select_all(build_query, key: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Lê todas as linhas de uma consulta em páginas (keyset pela coluna `key`), como UserQueries.iter_users.
+        build_query() monta a consulta filtrada; a ordenação, o limite e o cursor são aplicados aqui.
+        """
+        rows = []
+        last_key = None
+        
+        while True:
+            query = build_query().order(key).limit(page_size)
+            if last_key is not None:
+                query = query.gt(key, last_key)
+            
+            page = query.execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            last_key = page[-1][key]
+        
+        return rows
+    
+    @staticmethod
+    def get_scheduled_expirations() -> List[tuple]:
+        """Retorna (tipo, chave, quando) de tudo que ainda vai expirar - carregado no startup (todas as páginas)"""
+        import config
+        client = get_supabase()
+        scheduled = []
+        
+        boosters = ExpirationQueries._select_all(lambda: client.table('users').select('user_id, multiplier_expires_at').gt('xp_multiplier', 1), 'user_id')
+        for user in boosters:
+            if user.get('multiplier_expires_at'):
+                scheduled.append(('booster', user['user_id'], user['multiplier_expires_at']))
+        
+        # A mesma consulta carrega o índice de VIPs
+        for user in UserQueries.load_vip_index():
+            if user.get('vip_expires_at'):
+                scheduled.append(('vip', user['user_id'], user['vip_expires_at']))
+        
+        calls = ExpirationQueries._select_all(lambda: client.table('shop_purchases').select('id, created_at').eq('status', 'pending').eq('item_id', 'call_expert'), 'id')
+        for call in calls:
+            created_at = datetime.fromisoformat(call['created_at'].replace('Z', '+00:00'))
+            scheduled.append(('call', call['id'], created_at + timedelta(hours=config.CALL_REQUEST_EXPIRY_HOURS)))
+        
+        # Poucos horários distintos, mas muitas linhas: percorre todas para não perder nenhum horário
+        missions = ExpirationQueries._select_all(lambda: client.table('missions').select('id, expires_at').eq('status', 'active'), 'id')
+        for expires_at in {m['expires_at'] for m in missions if m.get('expires_at')}:
+            scheduled.append(('missions', expires_at, expires_at))
         
+        return scheduled
+    
+    @staticmethod
+    def expire_boosters(user_ids: List[int]) -> int:
+        """Remove os boosters vencidos de vários usuários (ignora quem renovou)"""
+        client = get_supabase()
+        now = datetime.now(timezone.utc).isoformat()
+        result = client.table('users').update({
+            'xp_multiplier': 1.0,
+            'multiplier_expires_at': None
+        }).in_('user_id', user_ids).lte('multiplier_expires_at', now).execute()
+        return len(result.data) if result.data else 0
+    
+    @staticmethod
+    def expire_vips(user_ids: List[int]) -> int:
+        """Remove o VIP vencido de vários usuários (ignora quem renovou)"""
+        client = get_supabase()
+        now = datetime.now(timezone.utc).isoformat()
+        result = client.table('users').update({
+            'is_vip': False,
+            'vip_expires_at': None
+        }).in_('user_id', user_ids).lte('vip_expires_at', now).execute()
+        vip_index.expire(user_ids)
+        return len(result.data) if result.data else 0
+    
+    @staticmethod
+    def expire_calls(purchase_ids: List[int]) -> int:
+        """
+        Expira pedidos de call que continuam pendentes devolvendo as moedas (RPC shop_refund, atômico).
+        Pedidos já resolvidos são ignorados; se algum reembolso falhar, levanta erro e a agenda tenta de novo
+        (os que já foram reembolsados viram not_refundable na nova tentativa).
+        """
+        expired = 0
+        failed = []
+        for purchase_id in purchase_ids:
+            receipt = ShopQueries.refund_purchase(purchase_id, 'expired')
+            if receipt.get('status') == 'ok':
+                expired += 1
+            elif receipt.get('status') == 'error':
+                failed.append(purchase_id)
+        
+        if failed:
+            raise RuntimeError(f"reembolso falhou para {len(failed)} pedido(s) de call: {failed}")
+        return expired
+    
+    @staticmethod
+    def expire_events(event_ids: List[int]) -> int:
+        """Encerra os eventos cujo horário de término chegou e avisa o bot pelo feed"""
+        client = get_supabase()
+        result = client.table('events').update({
+            'is_active': False,
+            'ends_at': datetime.now(timezone.utc).isoformat(),
+        }).in_('id', event_ids).eq('is_active', True).execute()
+        EventQueries.get_active_events.invalidate()
+        
+        for row in (result.data or []):
+            event_feed.publish('end', event_id=row['id'], event=row)
         return len(result.data) if result.data else 0
 
 
+class DashboardQueries:
+    """Queries agregadas da Dashboard"""
+    
+    @staticmethod
+    @single_flight(ttl=30)
+    def get_home_stats() -> Dict[str, Any]:
+        """
+        Estatísticas da página inicial em um único round trip (RPC dashboard_home_stats).
+        Sem a função no banco (migration_dashboard_stats.sql), soma em páginas - correto, porém mais lento.
+        """
+        client = get_supabase()
+        try:
+            result = client.rpc('dashboard_home_stats').execute()
+            if result.data:
+                return result.data
+        except Exception as e:
+            print(f"⚠️ RPC dashboard_home_stats indisponível, usando fallback: {e}")
+        
+        total_users = total_xp = total_coins = 0
+        for page in UserQueries.iter_users('user_id, xp, coins'):
+            total_users += len(page)
+            total_xp += sum(u.get('xp') or 0 for u in page)
+            total_coins += sum(u.get('coins') or 0 for u in page)
+        
+        active_missions = client.table('missions').select('id', count='exact').eq('status', 'active').limit(1).execute().count
+        top_users = client.table('users').select('user_id, username, level, xp, is_vip').order('xp', desc=True).limit(5).execute().data
+        
+        return {
+            'total_users': total_users,
+            'total_xp': total_xp,
+            'total_coins': total_coins,
+            'active_missions': active_missions or 0,
+            'top_users': top_users or [],
+        }
+    
+    @staticmethod
+    def get_missions_page(status: str = None, mission_type: str = None, user_id: int = None,
+                          before_id: int = None, page_size: int = 50) -> List[Dict[str, Any]]:
+        """Página de missões (keyset por id, mais recentes primeiro). Retorna até page_size + 1 para saber se há próxima."""
+        client = get_supabase()
+        query = client.table('missions').select('*').order('id', desc=True).limit(page_size + 1)
+        
+        if status:
+            query = query.eq('status', status)
+        if mission_type:
+            query = query.eq('mission_type', mission_type)
+        if user_id:
+            query = query.eq('user_id', user_id)
+        if before_id:
+            query = query.lt('id', before_id)
+        
+        result = query.execute()
+        return result.data if result.data else []
+    
+    @staticmethod
+    def get_mission_counts() -> Dict[str, int]:
+        """Contadores da página de missões (RPC dashboard_mission_counts, com fallback em 3 counts)"""
+        client = get_supabase()
+        try:
+            result = client.rpc('dashboard_mission_counts').execute()
+            if result.data:
+                return result.data
+        except Exception as e:
+            print(f"⚠️ RPC dashboard_mission_counts indisponível, usando fallback: {e}")
+        
+        def count(**filters) -> int:
+            query = client.table('missions').select('id', count='exact').limit(1)
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            return query.execute().count or 0
+        
+        return {
+            'active': count(status='active'),
+            'completed': count(status='completed'),
+            'weekly': count(status='active', mission_type='weekly'),
+        }
+    
+    @staticmethod
+    def get_usernames(user_ids: List[int]) -> Dict[int, str]:
+        """Nomes de um conjunto de usuários (apenas os IDs pedidos)"""
+        if not user_ids:
+            return {}
+        client = get_supabase()
+        result = client.table('users').select('user_id, username').in_('user_id', list(user_ids)).execute()
+        return {u['user_id']: u.get('username') for u in (result.data or [])}
+    
+    @staticmethod
+    def get_users_updated_since(since: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Usuários alterados depois de `since` (ISO) - usado para atualizar o cache de nomes"""
+        client = get_supabase()
+        result = client.table('users').select('user_id, username, updated_at').gt('updated_at', since).order('updated_at').limit(limit).execute()
+        return result.data if result.data else []
+    
+    @staticmethod
+    def search_users(term: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Busca usuários por ID ou parte do nome (typeahead).
+        user_id volta como string: snowflakes passam de 2^53 e seriam arredondados no JSON do navegador.
+        """
+        client = get_supabase()
+        query = client.table('users').select('user_id, username')
+        if term.isdigit():
+            query = query.eq('user_id', int(term))
+        else:
+            # Curingas digitados pelo usuário são literais (o PostgREST também trata * como %)
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '')
+            query = query.ilike('username', f'%{escaped}%').order('username')
+        result = query.limit(limit).execute()
+        return [{'user_id': str(row['user_id']), 'username': row.get('username')} for row in result.data or []]
+
+
 class NotificationQueries:
     """Queries relacionadas a notificações pendentes (Dashboard -> Bot)"""
     
@@ -1315,6 +1963,57 @@ class NotificationQueries:
         result = client.table('notifications').select('*').eq('status', 'pending').order('created_at', desc=False).limit(limit).execute()
         return result.data if result.data else []
     
+    @staticmethod
+    def claim_pending_notifications(limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Reserva um lote de notificações pendentes (status 'processing') e retorna as reservadas.
+        O filtro por status no update garante que a mesma notificação não é enviada duas vezes.
+        """
+        client = get_supabase()
+        pending = client.table('notifications').select('id').eq('status', 'pending').order('created_at', desc=False).limit(limit).execute()
+        ids = [n['id'] for n in (pending.data or [])]
+        if not ids:
+            return []
+        
+        result = client.table('notifications').update({'status': 'processing'}).in_('id', ids).eq('status', 'pending').execute()
+        return sorted(result.data or [], key=lambda n: n.get('created_at') or '')
+    
+    @staticmethod
+    def release_stale_claims() -> int:
+        """Devolve para a fila as notificações reservadas que não terminaram (ex: bot reiniciado no meio do envio)"""
+        client = get_supabase()
+        result = client.table('notifications').update({'status': 'pending'}).eq('status', 'processing').execute()
+        return len(result.data) if result.data else 0
+    
+    @staticmethod
+    def mark_many_as_sent(notification_ids: List[int]) -> int:
+        """Marca várias notificações como enviadas (1 query)"""
+        if not notification_ids:
+            return 0
+        client = get_supabase()
+        result = client.table('notifications').update({
+            'status': 'sent',
+            'sent_at': datetime.now(timezone.utc).isoformat(),
+        }).in_('id', notification_ids).execute()
+        return len(result.data) if result.data else 0
+    
+    @staticmethod
+    def mark_many_as_failed(failures: Dict[int, str]) -> int:
+        """Marca várias notificações como falha (1 query por mensagem de erro distinta)"""
+        client = get_supabase()
+        by_error: Dict[str, List[int]] = {}
+        for notification_id, error_msg in failures.items():
+            by_error.setdefault(error_msg, []).append(notification_id)
+        
+        updated = 0
+        for error_msg, ids in by_error.items():
+            result = client.table('notifications').update({
+                'status': 'failed',
+                'error': error_msg,
+            }).in_('id', ids).execute()
+            updated += len(result.data) if result.data else 0
+        return updated
+    
     @staticmethod
     def mark_as_sent(notification_id: int) -> bool:
         """Marca notificação como enviada"""
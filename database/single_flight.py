@@ -0,0 +1,100 @@
+"""
+🦈 SharkClub Discord Bot - Single-Flight
+Agrupa leituras idênticas e simultâneas: quem chega enquanto a consulta está em andamento
+espera e recebe o mesmo resultado, em vez de abrir outra requisição ao banco.
+"""
+
+import copy
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """Uma consulta em andamento (ou o resultado guardado por `ttl` segundos)"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições thread-safe.
+    Só agrupa chamadas que rodam em threads (asyncio.to_thread no bot, requisições da Dashboard):
+    uma chamada síncrona no loop nunca se sobrepõe a outra. Por isso a espera usa threading (não asyncio).
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, func: Callable[[], Any], ttl: float = 0.0) -> Any:
+        """Executa `func` uma única vez por chave entre chamadas simultâneas (e dentro do ttl)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call and call.done.is_set() and time.monotonic() - call.finished_at > ttl:
+                call = None  # Resultado guardado venceu
+            
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Cópia: quem espera não pode alterar o resultado de outro chamador
+            return copy.deepcopy(call.result)
+        
+        try:
+            call.result = func()
+            return copy.deepcopy(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.done.set()
+            # Erros e chamadas sem ttl não ficam guardados
+            if call.error is not None or ttl <= 0:
+                self.forget(key, call)
+    
+    def forget(self, key: Hashable, call: _Call = None) -> None:
+        """Descarta o resultado guardado de uma chave (ex: após uma escrita)"""
+        with self._lock:
+            if call is None or self._calls.get(key) is call:
+                self._calls.pop(key, None)
+    
+    def forget_prefix(self, prefix: str) -> None:
+        """Descarta todas as chaves de uma função"""
+        with self._lock:
+            for key in [k for k in self._calls if k[0] == prefix]:
+                self._calls.pop(key, None)
+
+
+# Grupo global usado pelas queries
+flights = SingleFlight()
+
+
+def single_flight(ttl: float = 0.0):
+    """
+    Decorator para leituras quentes: chamadas simultâneas com os mesmos argumentos
+    compartilham uma única consulta; com `ttl`, o resultado é reaproveitado por alguns segundos.
+    A função decorada ganha `.invalidate()` para descartar o resultado após escritas.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key: Tuple = (name, args, tuple(sorted(kwargs.items())))
+            return flights.do(key, lambda: func(*args, **kwargs), ttl)
+        
+        wrapper.invalidate = lambda: flights.forget_prefix(name)
+        return wrapper
+    
+    return decorator
@@ -0,0 +1,61 @@
+"""
+🦈 SharkClub Discord Bot - User State
+Estado completo de um usuário (linha do usuário, missões ativas, cooldowns, recompensas e progresso de hoje)
+carregado em uma única consulta com recursos embutidos do PostgREST.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class UserState:
+    """Bundle pré-carregado entregue aos handlers (evita uma requisição por informação)"""
+    
+    MISSION_TYPES = ('daily', 'weekly', 'secret')
+    
+    def __init__(self, user: Dict[str, Any], is_vip: bool = False,
+                 missions: List[Dict[str, Any]] = None, cooldowns: List[Dict[str, Any]] = None,
+                 rewards: List[Dict[str, Any]] = None, daily_progress: Optional[Dict[str, Any]] = None,
+                 created: bool = False):
+        self.user = user
+        self.is_vip = is_vip
+        self.missions = missions or []
+        self.cooldowns: Dict[str, Optional[datetime]] = {}
+        for row in cooldowns or []:
+            last_used = row.get('last_used')
+            self.cooldowns[row['action_type']] = (
+                datetime.fromisoformat(last_used.replace('Z', '+00:00')) if last_used else None
+            )
+        self.rewards: Dict[str, Dict[str, Any]] = {r['reward_type']: r for r in rewards or []}
+        self.daily_progress = daily_progress
+        self.created = created  # Usuário criado agora (não tem nada relacionado ainda)
+    
+    @property
+    def user_id(self) -> int:
+        return self.user['user_id']
+    
+    def missions_of(self, mission_type: str) -> List[Dict[str, Any]]:
+        """Missões ativas de um tipo"""
+        return [m for m in self.missions if m.get('mission_type') == mission_type]
+    
+    @property
+    def missions_by_type(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {mission_type: self.missions_of(mission_type) for mission_type in self.MISSION_TYPES}
+    
+    def check_cooldown(self, action_type: str, cooldown_seconds: int) -> Tuple[bool, int]:
+        """Mesmo contrato de CooldownQueries.check_cooldown, sem consultar o banco"""
+        last_used = self.cooldowns.get(action_type)
+        if not last_used:
+            return True, 0
+        
+        remaining = cooldown_seconds - (datetime.now(timezone.utc) - last_used).total_seconds()
+        if remaining <= 0:
+            return True, 0
+        return False, int(remaining)
+    
+    def get_reward(self, reward_type: str) -> Optional[Dict[str, Any]]:
+        return self.rewards.get(reward_type)
+    
+    def reward_count(self, reward_type: str) -> int:
+        reward = self.rewards.get(reward_type)
+        return reward.get('available_count', 0) if reward else 0
@@ -0,0 +1,70 @@
+"""
+🦈 SharkClub Discord Bot - VIP Index
+Conjunto em memória dos VIPs ativos com o horário de expiração de cada um.
+UserQueries.is_vip vira um teste de pertinência O(1) em vez de buscar a linha do usuário.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .expirations import to_timestamp
+
+
+class VipIndex:
+    """
+    Índice thread-safe user_id -> expiração (epoch, None = permanente).
+    Carregado em uma consulta no startup, atualizado por set_vip/remove_vip e pela agenda de expirações.
+    Enquanto não for carregado, contains() retorna None e as queries consultam o banco.
+    """
+    
+    def __init__(self):
+        self._members: Dict[int, Optional[float]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+    
+    def __len__(self) -> int:
+        return len(self._members)
+    
+    def load(self, rows: List[Dict[str, Any]]) -> None:
+        """Substitui o índice pelas linhas (user_id, vip_expires_at) dos usuários com is_vip"""
+        members = {row['user_id']: to_timestamp(row.get('vip_expires_at')) for row in rows}
+        with self._lock:
+            self._members = members
+            self._loaded = True
+    
+    def contains(self, user_id: int) -> Optional[bool]:
+        """VIP ativo? (None se o índice ainda não foi carregado)"""
+        if not self._loaded:
+            return None
+        with self._lock:
+            if user_id not in self._members:
+                return False
+            expires_at = self._members[user_id]
+        # A expiração no banco é feita pela agenda; aqui o horário já basta
+        return expires_at is None or expires_at > time.time()
+    
+    def apply(self, user: Dict[str, Any]) -> None:
+        """Atualiza um usuário a partir da linha gravada (is_vip, vip_expires_at)"""
+        with self._lock:
+            if user.get('is_vip'):
+                self._members[user['user_id']] = to_timestamp(user.get('vip_expires_at'))
+            else:
+                self._members.pop(user['user_id'], None)
+    
+    def expire(self, user_ids: Iterable[int]) -> None:
+        """Remove os VIPs vencidos (quem renovou nesse meio tempo continua)"""
+        now = time.time()
+        with self._lock:
+            for user_id in user_ids:
+                expires_at = self._members.get(user_id)
+                if expires_at is not None and expires_at <= now:
+                    del self._members[user_id]
+
+
+# Índice global usado por UserQueries
+vip_index = VipIndex()
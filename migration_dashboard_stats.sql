@@ -0,0 +1,40 @@
+-- Estatísticas da página inicial da Dashboard em uma única chamada (RPC)
+-- Substitui o download de todos os usuários para somar XP e moedas no Python
+CREATE OR REPLACE FUNCTION dashboard_home_stats()
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_users', totals.total_users,
+        'total_xp', totals.total_xp,
+        'total_coins', totals.total_coins,
+        'active_missions', (SELECT COUNT(*) FROM missions WHERE status = 'active'),
+        'top_users', (
+            SELECT COALESCE(json_agg(top), '[]'::json) FROM (
+                SELECT user_id, username, level, xp, is_vip FROM users ORDER BY xp DESC LIMIT 5
+            ) top
+        )
+    )
+    FROM (
+        SELECT COUNT(*) AS total_users, COALESCE(SUM(xp), 0) AS total_xp, COALESCE(SUM(coins), 0) AS total_coins
+        FROM users
+    ) totals;
+$$ LANGUAGE sql STABLE;
+
+-- Contadores da página de missões (cada contagem usa um index, sem varrer a tabela inteira)
+CREATE OR REPLACE FUNCTION dashboard_mission_counts()
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'active', (SELECT COUNT(*) FROM missions WHERE status = 'active'),
+        'completed', (SELECT COUNT(*) FROM missions WHERE status = 'completed'),
+        'weekly', (SELECT COUNT(*) FROM missions WHERE mission_type = 'weekly' AND status = 'active')
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Index para o filtro de missões ativas
+CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status);
+
+-- Indexes para o cache incremental de nomes e a busca de usuários da Dashboard
+-- A busca é por parte do nome (ILIKE '%termo%'): só um índice de trigramas atende o curinga inicial
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users(updated_at);
+DROP INDEX IF EXISTS idx_users_username;
+CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin (username gin_trgm_ops);
@@ -0,0 +1,20 @@
+-- Membros únicos ajudados por semana em uma tabela própria
+-- Substitui a leitura de todas as linhas 'help' do activity_log (7 dias) e a deduplicação no Python
+
+CREATE TABLE IF NOT EXISTS help_pairs (
+    id SERIAL PRIMARY KEY,
+    helper_id BIGINT NOT NULL,                -- Quem ajudou
+    helped_id BIGINT NOT NULL,                -- Quem foi ajudado
+    week_start DATE NOT NULL,                 -- Segunda-feira da semana (UTC)
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    
+    UNIQUE(helper_id, week_start, helped_id)
+);
+
+-- Copia as ajudas já registradas no activity_log (message_id guarda o ID do membro ajudado)
+INSERT INTO help_pairs (helper_id, helped_id, week_start, created_at)
+SELECT user_id, message_id, date_trunc('week', created_at AT TIME ZONE 'UTC')::date, MIN(created_at)
+FROM activity_log
+WHERE activity_type = 'help' AND message_id IS NOT NULL
+GROUP BY user_id, message_id, date_trunc('week', created_at AT TIME ZONE 'UTC')::date
+ON CONFLICT (helper_id, week_start, helped_id) DO NOTHING;
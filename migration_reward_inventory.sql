@@ -0,0 +1,20 @@
+-- Inventário de recompensas com operações atômicas (RPC)
+-- Substitui o ler quantidade -> gravar quantidade feito no Python (cliques simultâneos gastavam o mesmo ticket duas vezes)
+
+-- Incremento (cria a linha se preciso). Retorna a nova quantidade
+CREATE OR REPLACE FUNCTION reward_add(p_user_id BIGINT, p_reward_type TEXT, p_count INTEGER DEFAULT 1)
+RETURNS INTEGER AS $$
+    INSERT INTO rewards (user_id, reward_type, available_count)
+    VALUES (p_user_id, p_reward_type, p_count)
+    ON CONFLICT (user_id, reward_type)
+    DO UPDATE SET available_count = rewards.available_count + EXCLUDED.available_count
+    RETURNING available_count;
+$$ LANGUAGE sql;
+
+-- Decremento condicional: só gasta se houver unidade disponível. Retorna a nova quantidade ou NULL
+CREATE OR REPLACE FUNCTION reward_use(p_user_id BIGINT, p_reward_type TEXT)
+RETURNS INTEGER AS $$
+    UPDATE rewards SET available_count = available_count - 1, last_used = NOW()
+    WHERE user_id = p_user_id AND reward_type = p_reward_type AND available_count > 0
+    RETURNING available_count;
+$$ LANGUAGE sql;
@@ -0,0 +1,32 @@
+-- Recompensas em lote (presenças de evento) como incremento no próprio UPDATE (RPC)
+-- Substitui o upsert de XP/nível/moedas absolutos calculados no Python, que sobrescrevia
+-- ganhos e débitos (compras, tickets) gravados entre a leitura e a escrita.
+-- O booster ativo é aplicado aqui e o nível é recalculado pela curva enviada (config.XP_PER_LEVEL).
+-- Retorna uma linha por usuário com o XP efetivamente ganho e os valores finais.
+CREATE OR REPLACE FUNCTION users_apply_rewards(
+    p_user_ids BIGINT[],
+    p_xp INTEGER[],
+    p_coins INTEGER[],
+    p_levels INTEGER[],
+    p_level_xp INTEGER[]
+)
+RETURNS TABLE (user_id BIGINT, xp_gained INTEGER, xp INTEGER, level INTEGER, coins INTEGER) AS $$
+    WITH deltas AS (
+        SELECT d.user_id, d.xp, d.coins FROM unnest(p_user_ids, p_xp, p_coins) AS d(user_id, xp, coins)
+    ), gains AS (
+        SELECT u.user_id, d.coins,
+               CASE WHEN d.xp > 0 AND u.xp_multiplier > 1 AND u.multiplier_expires_at > NOW()
+                    THEN FLOOR(d.xp * u.xp_multiplier)::INTEGER ELSE d.xp END AS xp_gained
+        FROM users u JOIN deltas d ON d.user_id = u.user_id
+    )
+    UPDATE users u SET
+        xp = GREATEST(0, u.xp + g.xp_gained),
+        coins = GREATEST(0, u.coins + g.coins),
+        level = COALESCE((
+            SELECT MAX(c.lvl) FROM unnest(p_levels, p_level_xp) AS c(lvl, req)
+            WHERE c.req <= GREATEST(0, u.xp + g.xp_gained)
+        ), 1)
+    FROM gains g
+    WHERE u.user_id = g.user_id
+    RETURNING u.user_id, g.xp_gained, u.xp, u.level, u.coins;
+$$ LANGUAGE sql;
@@ -0,0 +1,116 @@
+-- Compras e reembolsos da loja em uma única transação (RPC)
+-- Substitui o ler saldo -> descontar -> inserir -> devolver em caso de erro feito no Python
+
+-- Chave de idempotência: o id da interação do Discord. O mesmo envio processado duas vezes gera um único débito
+ALTER TABLE shop_purchases ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_shop_purchases_idempotency ON shop_purchases(idempotency_key);
+
+-- Duplo clique (envios diferentes da mesma compra): busca a última compra igual do comprador
+CREATE INDEX IF NOT EXISTS idx_shop_purchases_buyer_item ON shop_purchases(buyer_id, item_id, created_at DESC);
+
+-- Versão anterior (sem a janela de duplicidade)
+DROP FUNCTION IF EXISTS shop_purchase(TEXT, BIGINT, TEXT, INTEGER, INTEGER, BIGINT, BIGINT);
+
+-- Preço pelo status VIP + débito condicional + registro da compra. Retorna o recibo:
+-- {'status': 'ok' | 'duplicate' | 'insufficient_funds', 'purchase': {...}, 'price': preço, 'balance': saldo}
+-- 'duplicate' também quando o comprador já fez a mesma compra (item + alvo) nos últimos p_dedupe_seconds
+CREATE OR REPLACE FUNCTION shop_purchase(
+    p_idempotency_key TEXT,
+    p_buyer_id BIGINT,
+    p_item_id TEXT,
+    p_price_free INTEGER,
+    p_price_vip INTEGER,
+    p_target_id BIGINT DEFAULT NULL,
+    p_guild_id BIGINT DEFAULT NULL,
+    p_dedupe_seconds INTEGER DEFAULT 30
+)
+RETURNS JSON AS $$
+DECLARE
+    v_purchase shop_purchases%ROWTYPE;
+    v_price INTEGER;
+    v_balance INTEGER;
+BEGIN
+    SELECT * INTO v_purchase FROM shop_purchases WHERE idempotency_key = p_idempotency_key;
+    IF FOUND THEN
+        RETURN json_build_object(
+            'status', 'duplicate',
+            'purchase', row_to_json(v_purchase),
+            'price', v_purchase.price_paid,
+            'balance', (SELECT coins FROM users WHERE user_id = p_buyer_id)
+        );
+    END IF;
+
+    -- Trava a linha do comprador: compras simultâneas do mesmo usuário são serializadas
+    SELECT CASE WHEN is_vip AND (vip_expires_at IS NULL OR vip_expires_at > NOW()) THEN p_price_vip ELSE p_price_free END,
+           coins
+    INTO v_price, v_balance
+    FROM users WHERE user_id = p_buyer_id
+    FOR UPDATE;
+
+    -- Sob a trava, a janela é deslizante: um segundo envio igual sempre enxerga a compra do primeiro
+    SELECT * INTO v_purchase FROM shop_purchases
+    WHERE buyer_id = p_buyer_id
+      AND item_id = p_item_id
+      AND target_id IS NOT DISTINCT FROM p_target_id
+      AND created_at > NOW() - make_interval(secs => p_dedupe_seconds)
+    ORDER BY created_at DESC
+    LIMIT 1;
+    IF FOUND THEN
+        RETURN json_build_object('status', 'duplicate', 'purchase', row_to_json(v_purchase), 'price', v_purchase.price_paid, 'balance', v_balance);
+    END IF;
+
+    IF v_price IS NULL OR v_balance < v_price THEN
+        RETURN json_build_object(
+            'status', 'insufficient_funds',
+            'price', COALESCE(v_price, p_price_free),
+            'balance', COALESCE(v_balance, 0)
+        );
+    END IF;
+
+    UPDATE users SET coins = coins - v_price WHERE user_id = p_buyer_id RETURNING coins INTO v_balance;
+
+    BEGIN
+        INSERT INTO shop_purchases (buyer_id, item_id, target_id, price_paid, guild_id, status, created_at, idempotency_key)
+        VALUES (p_buyer_id, p_item_id, p_target_id, v_price, p_guild_id, 'pending', NOW(), p_idempotency_key)
+        RETURNING * INTO v_purchase;
+    EXCEPTION WHEN unique_violation THEN
+        -- Outra chamada com a mesma chave terminou primeiro: desfaz o débito e devolve o recibo dela
+        UPDATE users SET coins = coins + v_price WHERE user_id = p_buyer_id RETURNING coins INTO v_balance;
+        SELECT * INTO v_purchase FROM shop_purchases WHERE idempotency_key = p_idempotency_key;
+        RETURN json_build_object('status', 'duplicate', 'purchase', row_to_json(v_purchase), 'price', v_purchase.price_paid, 'balance', v_balance);
+    END;
+
+    RETURN json_build_object('status', 'ok', 'purchase', row_to_json(v_purchase), 'price', v_price, 'balance', v_balance);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reembolso: muda o status (só se ainda estiver no status esperado) e devolve as moedas na mesma transação
+-- {'status': 'ok' | 'not_refundable', 'purchase': {...}, 'balance': saldo do comprador}
+CREATE OR REPLACE FUNCTION shop_refund(
+    p_purchase_id BIGINT,
+    p_new_status TEXT,
+    p_expected_status TEXT DEFAULT 'pending'
+)
+RETURNS JSON AS $$
+DECLARE
+    v_purchase shop_purchases%ROWTYPE;
+    v_balance INTEGER;
+BEGIN
+    UPDATE shop_purchases SET status = p_new_status, resolved_at = NOW()
+    WHERE id = p_purchase_id AND status = p_expected_status
+    RETURNING * INTO v_purchase;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object(
+            'status', 'not_refundable',
+            'purchase', (SELECT row_to_json(p) FROM shop_purchases p WHERE p.id = p_purchase_id)
+        );
+    END IF;
+
+    UPDATE users SET coins = coins + v_purchase.price_paid
+    WHERE user_id = v_purchase.buyer_id
+    RETURNING coins INTO v_balance;
+
+    RETURN json_build_object('status', 'ok', 'purchase', row_to_json(v_purchase), 'balance', v_balance);
+END;
+$$ LANGUAGE plpgsql;
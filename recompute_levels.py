@@ -0,0 +1,50 @@
+"""
+🦈 SharkClub Discord Bot - Recalcular Níveis
+Script para recalcular o nível de todos os usuários depois de alterar config.XP_PER_LEVEL
+Por padrão apenas simula; use --aplicar para gravar no banco.
+Os cargos são ajustados pelo sync de cargos do bot (ou /recalcular-niveis).
+"""
+
+import os
+import sys
+import time
+
+# Adiciona o diretório pai ao path para importar módulos do bot
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+from utils.level_recompute import LevelRecompute
+
+load_dotenv()
+
+
+def recompute_levels(apply: bool = False):
+    """Recalcula os níveis e mostra quantos usuários sobem ou descem"""
+    print("🦈 SharkClub - Recalcular Níveis")
+    print("=" * 50)
+    print(f"   Modo: {'APLICAR' if apply else 'SIMULAÇÃO (dry-run)'}")
+    
+    if apply:
+        confirmacao = input("\n🔐 Digite 'CONFIRMAR' para gravar os novos níveis: ")
+        if confirmacao != "CONFIRMAR":
+            print("\n❌ Operação cancelada.")
+            return None
+    
+    started = time.monotonic()
+    report = LevelRecompute.run(dry_run=not apply)
+    elapsed = time.monotonic() - started
+    
+    print(f"\n   👥 Usuários analisados: {report['total']}")
+    print(f"   ⬆️  Sobem de nível: {report['up']}")
+    print(f"   ⬇️  Descem de nível: {report['down']}")
+    print(f"   ➖ Sem mudança: {report['unchanged']}")
+    if apply:
+        print(f"   💾 Atualizados no banco: {report['updated']}")
+    print(f"   ⏱️  Tempo: {elapsed:.2f}s")
+    
+    print("\n" + "=" * 50)
+    return report
+
+
+if __name__ == "__main__":
+    recompute_levels(apply="--aplicar" in sys.argv)
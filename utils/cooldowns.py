@@ -6,6 +6,7 @@ Sistema de gerenciamento de cooldowns
 from datetime import datetime, timezone, timedelta
 from typing import Tuple
 from database.queries import CooldownQueries
+from database.user_state import UserState
 
 
 class CooldownManager:
@@ -30,7 +31,17 @@ class CooldownManager:
     }
     
     @staticmethod
-    def check(user_id: int, action: str, override_seconds: int = None, is_vip: bool = False) -> Tuple[bool, int]:
+    def get_seconds(action: str, override_seconds: int = None, is_vip: bool = False) -> int:
+        """Duração do cooldown de uma ação (VIP usa a tabela reduzida)"""
+        if override_seconds is not None:
+            return override_seconds
+        if is_vip and action in CooldownManager.VIP_COOLDOWN_TYPES:
+            return CooldownManager.VIP_COOLDOWN_TYPES.get(action, 0)
+        return CooldownManager.COOLDOWN_TYPES.get(action, 0)
+    
+    @staticmethod
+    def check(user_id: int, action: str, override_seconds: int = None, is_vip: bool = False,
+              state: UserState = None) -> Tuple[bool, int]:
         """
         Verifica se ação pode ser executada.
         Retorna (pode_executar, segundos_restantes)
@@ -40,13 +51,12 @@ class CooldownManager:
             action: Tipo de ação
             override_seconds: Cooldown customizado (ignora COOLDOWN_TYPES se fornecido)
             is_vip: Se True, usa cooldowns VIP reduzidos
+            state: Estado pré-carregado (usa os cooldowns dele em vez de consultar o banco)
         """
-        if override_seconds is not None:
-            cooldown_seconds = override_seconds
-        elif is_vip and action in CooldownManager.VIP_COOLDOWN_TYPES:
-            cooldown_seconds = CooldownManager.VIP_COOLDOWN_TYPES.get(action, 0)
-        else:
-            cooldown_seconds = CooldownManager.COOLDOWN_TYPES.get(action, 0)
+        cooldown_seconds = CooldownManager.get_seconds(action, override_seconds, is_vip)
+        
+        if state is not None:
+            return state.check_cooldown(action, cooldown_seconds)
         return CooldownQueries.check_cooldown(user_id, action, cooldown_seconds)
     
     @staticmethod
@@ -54,6 +64,15 @@ class CooldownManager:
         """Define cooldown para uma ação"""
         CooldownQueries.set_cooldown(user_id, action)
     
+    @staticmethod
+    def claim(user_id: int, action: str, is_vip: bool = False) -> bool:
+        """
+        Verifica e define o cooldown em uma única escrita condicional.
+        Retorna False se a ação estiver em cooldown (inclusive se outro clique simultâneo chegou antes).
+        """
+        cooldown_seconds = CooldownManager.get_seconds(action, is_vip=is_vip)
+        return CooldownQueries.claim_cooldown(user_id, action, cooldown_seconds)
+    
     @staticmethod
     def format_remaining(seconds: int) -> str:
         """Formata tempo restante para exibição"""
@@ -0,0 +1,62 @@
+"""
+🦈 SharkClub Discord Bot - Level Recompute
+Recalcula em lote os níveis salvos quando a curva de XP (config.XP_PER_LEVEL) muda
+"""
+
+from typing import Dict, Any, List
+from database.queries import UserQueries
+from utils.xp_calculator import XPCalculator
+
+
+class LevelRecompute:
+    """Recalcula os níveis de todos os usuários a partir do XP atual"""
+    
+    @staticmethod
+    def run(dry_run: bool = True, page_size: int = 1000) -> Dict[str, Any]:
+        """
+        Percorre todos os usuários em páginas, recalcula os níveis em lote
+        e grava apenas os que mudaram (a menos que dry_run=True).
+        
+        Retorna: {'total', 'up', 'down', 'unchanged', 'updated', 'changes': [...]}
+        onde changes é a lista de trocas de cargo a aplicar:
+        [{'user_id', 'old_level', 'new_level'}]
+        """
+        total = 0
+        up = 0
+        down = 0
+        changes: List[Dict[str, int]] = []
+        new_levels: Dict[int, int] = {}
+        
+        for page in UserQueries.iter_users('user_id, xp, level', page_size=page_size):
+            total += len(page)
+            levels = XPCalculator.get_levels_from_xp_batch([u.get('xp', 0) for u in page])
+            
+            for user, new_level in zip(page, levels):
+                old_level = user.get('level') or 1
+                if new_level == old_level:
+                    continue
+                
+                if new_level > old_level:
+                    up += 1
+                else:
+                    down += 1
+                
+                new_levels[user['user_id']] = new_level
+                changes.append({
+                    'user_id': user['user_id'],
+                    'old_level': old_level,
+                    'new_level': new_level,
+                })
+        
+        updated = 0
+        if not dry_run:
+            updated = UserQueries.update_levels_batch(new_levels)
+        
+        return {
+            'total': total,
+            'up': up,
+            'down': down,
+            'unchanged': total - len(changes),
+            'updated': updated,
+            'changes': changes,
+        }
@@ -0,0 +1,37 @@
+"""
+🦈 SharkClub Discord Bot - Rate Limiter
+Limitador assíncrono para respeitar os rate limits das rotas do Discord
+"""
+
+import asyncio
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Permite no máximo `rate` operações a cada `per` segundos (janela deslizante)"""
+    
+    def __init__(self, rate: int, per: float):
+        self.rate = max(1, rate)
+        self.per = per
+        self._calls: deque = deque()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """Aguarda até haver espaço na janela e reserva uma operação"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.per:
+                    self._calls.popleft()
+                
+                if len(self._calls) < self.rate:
+                    self._calls.append(now)
+                    return
+                
+                await asyncio.sleep(self.per - (now - self._calls[0]))
+    
+    def penalize(self, seconds: float) -> None:
+        """Bloqueia a janela por `seconds` (usado ao receber um 429 do Discord)"""
+        blocked_until = time.monotonic() + seconds - self.per
+        self._calls = deque([blocked_until] * self.rate)
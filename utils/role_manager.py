@@ -4,10 +4,73 @@ Sistema de gerenciamento de cargos baseado em níveis
 """
 
 import discord
-from typing import Optional, List
+from types import MappingProxyType
+from typing import Optional, List, Dict, Mapping, FrozenSet, Tuple
 import config
 
 
+class LevelRoleIndex:
+    """
+    Índice por servidor de role_id -> nível (imutável).
+    Montado a partir de config.DISCORD_ROLE_IDS e dos cargos com nome de nível,
+    permite descobrir o nível de um membro por interseção de IDs (sem comparar nomes).
+    Deve ser reconstruído quando cargos são criados, alterados ou removidos.
+    """
+    
+    _by_guild: Dict[int, Tuple[Mapping[int, int], FrozenSet[int]]] = {}
+    
+    @classmethod
+    def rebuild(cls, guild: discord.Guild) -> Mapping[int, int]:
+        """Reconstrói o índice do servidor a partir dos cargos atuais"""
+        names_to_level = {name: level for level, name in config.CARGO_NAMES.items()}
+        index: Dict[int, int] = {}
+        
+        for level, role_id in config.DISCORD_ROLE_IDS.items():
+            if role_id and guild.get_role(role_id):
+                index[role_id] = level
+        
+        for role in guild.roles:
+            level = names_to_level.get(role.name)
+            if level is not None:
+                index.setdefault(role.id, level)
+        
+        mapping = MappingProxyType(index)
+        cls._by_guild[guild.id] = (mapping, frozenset(index))
+        return mapping
+    
+    @classmethod
+    def get(cls, guild: discord.Guild) -> Mapping[int, int]:
+        """Retorna o índice do servidor (monta na primeira chamada)"""
+        entry = cls._by_guild.get(guild.id)
+        if entry is None:
+            return cls.rebuild(guild)
+        return entry[0]
+    
+    @classmethod
+    def get_member_level(cls, member: discord.Member) -> int:
+        """Retorna o maior nível entre os cargos do membro (0 se não tiver cargo de nível)"""
+        if member.guild.id not in cls._by_guild:
+            cls.rebuild(member.guild)
+        mapping, role_ids = cls._by_guild[member.guild.id]
+        
+        level_role_ids = role_ids.intersection(member._roles)
+        if not level_role_ids:
+            return 0
+        return max(mapping[role_id] for role_id in level_role_ids)
+    
+    @classmethod
+    def get_member_level_role_id(cls, member: discord.Member) -> Optional[int]:
+        """Retorna o ID do cargo de maior nível do membro"""
+        if member.guild.id not in cls._by_guild:
+            cls.rebuild(member.guild)
+        mapping, role_ids = cls._by_guild[member.guild.id]
+        
+        level_role_ids = role_ids.intersection(member._roles)
+        if not level_role_ids:
+            return None
+        return max(level_role_ids, key=mapping.__getitem__)
+
+
 class RoleManager:
     """Gerencia cargos de nível no Discord"""
     
@@ -17,9 +80,10 @@ class RoleManager:
     
     async def get_or_create_level_role(self, level: int) -> Optional[discord.Role]:
         """Busca ou cria o cargo para um nível específico"""
-        # Verifica se já existe no cache
-        if level in self._level_roles:
-            return self._level_roles[level]
+        # Verifica se já existe no cache (e se o cargo não foi apagado)
+        cached = self._level_roles.get(level)
+        if cached and self.guild.get_role(cached.id):
+            return cached
         
         # Busca o ID configurado
         configured_id = config.DISCORD_ROLE_IDS.get(level)
@@ -61,9 +125,11 @@ class RoleManager:
     async def update_member_role(self, member: discord.Member, new_level: int, old_level: int = None) -> dict:
         """
         Atualiza o cargo de um membro baseado no novo nível.
-        Remove cargos de níveis anteriores e adiciona o novo.
+        Calcula o conjunto final de cargos (sem os cargos de outros níveis, com o novo)
+        e aplica tudo numa única edição do membro (1 chamada REST em vez de até 11).
         
         Retorna: {'success': bool, 'added': role, 'removed': [roles]}
+        Rate limit (HTTP 429) é propagado para quem chama poder recuar e tentar de novo.
         """
         result = {
             'success': False,
@@ -80,29 +146,21 @@ class RoleManager:
                 result['error'] = "Não foi possível obter o cargo"
                 return result
             
-            # Lista de cargos de nível para remover
-            roles_to_remove = []
+            # Conjunto final: cargos atuais sem os de outros níveis + cargo do novo nível
+            level_role_ids = LevelRoleIndex.get(self.guild)
+            current_ids = set(member._roles)
+            removed_ids = {role_id for role_id in current_ids
+                           if role_id in level_role_ids and role_id != new_role.id}
+            target_ids = (current_ids - removed_ids) | {new_role.id}
             
-            for level in range(1, 11):
-                if level == new_level:
-                    continue  # Não remove o cargo atual
-                
-                level_role = await self.get_or_create_level_role(level)
-                if level_role and level_role in member.roles:
-                    roles_to_remove.append(level_role)
-            
-            # Remove cargos antigos
-            for role in roles_to_remove:
-                try:
-                    await member.remove_roles(role, reason=f"SharkClub - Subiu para nível {new_level}")
-                    result['removed'].append(role)
-                except:
-                    pass
-            
-            # Adiciona novo cargo
-            if new_role not in member.roles:
-                await member.add_roles(new_role, reason=f"SharkClub - Alcançou nível {new_level}")
-                result['added'] = new_role
+            if target_ids != current_ids:
+                await member.edit(
+                    roles=[discord.Object(id=role_id) for role_id in target_ids],
+                    reason=f"SharkClub - Alcançou nível {new_level}"
+                )
+                result['removed'] = [role for role in map(self.guild.get_role, removed_ids) if role]
+                if new_role.id not in current_ids:
+                    result['added'] = new_role
             
             result['success'] = True
             return result
@@ -110,6 +168,11 @@ class RoleManager:
         except discord.Forbidden:
             result['error'] = "Bot sem permissão para gerenciar cargos"
             return result
+        except discord.HTTPException as e:
+            if e.status == 429:
+                raise
+            result['error'] = str(e)
+            return result
         except Exception as e:
             result['error'] = str(e)
             return result
@@ -127,18 +190,9 @@ class RoleManager:
     
     def get_member_level_role(self, member: discord.Member) -> Optional[discord.Role]:
         """Retorna o cargo de nível atual do membro"""
-        for level in range(10, 0, -1):  # Do maior para o menor
-            cargo_name = config.CARGO_NAMES.get(level)
-            for role in member.roles:
-                if role.name == cargo_name:
-                    return role
-        return None
+        role_id = LevelRoleIndex.get_member_level_role_id(member)
+        return self.guild.get_role(role_id) if role_id else None
     
     def get_member_current_level_from_roles(self, member: discord.Member) -> int:
         """Retorna o nível do membro baseado nos cargos"""
-        for level in range(10, 0, -1):
-            cargo_name = config.CARGO_NAMES.get(level)
-            for role in member.roles:
-                if role.name == cargo_name:
-                    return level
-        return 1  # Padrão: nível 1
+        return LevelRoleIndex.get_member_level(member) or 1  # Padrão: nível 1
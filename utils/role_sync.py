@@ -0,0 +1,148 @@
+"""
+🦈 SharkClub Discord Bot - Role Sync Engine
+Sincronização de cargos de nível em lote para servidores de qualquer tamanho
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+import discord
+import config
+from database.queries import UserQueries
+from utils.rate_limiter import RateLimiter
+
+
+class RoleSyncEngine:
+    """
+    Sincroniza os cargos de nível de um servidor em segundo plano.
+    
+    1. Busca os níveis de todos os usuários de uma vez e compara com os cargos atuais
+    2. Enfileira apenas os membros cujo cargo está diferente do nível salvo
+    3. Aplica as mudanças respeitando o rate limit de cargos do Discord
+    
+    Se a execução for interrompida, a fila restante é retomada na próxima chamada
+    (start(replan=True) descarta a fila e replaneja, ex: após /recalcular-niveis).
+    """
+    
+    def __init__(self, guild: discord.Guild,
+                 get_current_level: Callable[[discord.Member], int],
+                 apply_level: Callable[[discord.Member, int], Awaitable[bool]]):
+        self.guild = guild
+        self.get_current_level = get_current_level
+        self.apply_level = apply_level
+        self.limiter = RateLimiter(config.ROLE_SYNC_MAX_EDITS, config.ROLE_SYNC_WINDOW_SECONDS)
+        
+        self.pending: deque = deque()  # (member_id, level)
+        self.total = 0
+        self.synced = 0
+        self.failed = 0
+        self.skipped = 0
+        self._replan = False
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def processed(self) -> int:
+        return self.synced + self.failed + self.skipped
+    
+    @staticmethod
+    def fetch_user_levels() -> Dict[int, int]:
+        """Busca o nível salvo de todos os usuários (em lote, paginado)"""
+        user_levels: Dict[int, int] = {}
+        for page in UserQueries.iter_users('user_id, level'):
+            for user in page:
+                user_levels[user['user_id']] = user.get('level') or 1
+        return user_levels
+    
+    def plan(self, user_levels: Dict[int, int]) -> int:
+        """Monta a fila apenas com os membros cujo cargo difere do nível salvo"""
+        self.pending.clear()
+        for member in self.guild.members:
+            if member.bot:
+                continue
+            
+            level = user_levels.get(member.id)
+            if level and self.get_current_level(member) != level:
+                self.pending.append((member.id, level))
+        
+        self.total = len(self.pending)
+        self.synced = self.failed = self.skipped = 0
+        return self.total
+    
+    def start(self, progress: Callable[['RoleSyncEngine'], Awaitable[None]] = None,
+              replan: bool = False) -> asyncio.Task:
+        """
+        Inicia (ou retoma) a sincronização; se já estiver rodando, retorna a task atual.
+        replan=True descarta a fila pendente e replaneja com os níveis atuais do banco
+        (se estiver rodando, a própria task replaneja antes do próximo membro).
+        """
+        if replan:
+            self._replan = True
+        if self.running:
+            return self._task
+        
+        self._task = asyncio.create_task(self._run(progress))
+        self._task.add_done_callback(self._log_task_error)
+        return self._task
+    
+    def _log_task_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            print(f"⚠️ Sync de cargos ({self.guild.name}) interrompido: {task.exception()}")
+    
+    async def _replan_queue(self) -> None:
+        self._replan = False
+        user_levels = await asyncio.to_thread(self.fetch_user_levels)
+        self.plan(user_levels)
+    
+    async def _run(self, progress: Callable[['RoleSyncEngine'], Awaitable[None]] = None) -> 'RoleSyncEngine':
+        """Processa a fila com rate limit e relatório de progresso"""
+        if self._replan or not self.pending:
+            await self._replan_queue()
+        
+        last_report = 0.0
+        
+        while self.pending:
+            # Níveis recalculados durante o sync: a fila antiga está desatualizada
+            if self._replan:
+                await self._replan_queue()
+                continue
+            
+            member_id, level = self.pending[0]
+            member = self.guild.get_member(member_id)
+            
+            # Membro saiu ou o cargo já foi corrigido por outro fluxo (ex: level up)
+            if not member or self.get_current_level(member) == level:
+                self.skipped += 1
+            else:
+                await self.limiter.acquire()
+                try:
+                    success = await self.apply_level(member, level)
+                except discord.HTTPException as e:
+                    if e.status == 429:
+                        self.limiter.penalize(config.ROLE_SYNC_WINDOW_SECONDS)
+                        continue  # Tenta o mesmo membro de novo após a pausa
+                    success = False
+                
+                if success:
+                    self.synced += 1
+                else:
+                    self.failed += 1
+            
+            self.pending.popleft()
+            
+            if progress and time.monotonic() - last_report >= config.ROLE_SYNC_PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                await progress(self)
+        
+        if progress:
+            await progress(self)
+        
+        if self.synced or self.failed:
+            print(f"🔄 Sync de cargos ({self.guild.name}): {self.synced} atualizados, {self.failed} erros")
+        
+        return self
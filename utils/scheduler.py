@@ -0,0 +1,229 @@
+"""
+🦈 SharkClub Discord Bot - Job Scheduler
+Agendador central das tarefas em segundo plano (substitui os tasks.loop espalhados pelos cogs)
+"""
+
+import asyncio
+import random
+from abc import ABC, abstractmethod
+import time
+from datetime import datetime, timedelta, timezone
+from datetime import time as dtime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+class Trigger(ABC):
+    """Base dos gatilhos: calcula o próximo horário de execução (epoch)"""
+    
+    @abstractmethod
+    def next_run(self, now: float) -> float:
+        ...
+
+
+class Interval(Trigger):
+    """Executa a cada `seconds` segundos"""
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+    
+    def next_run(self, now: float) -> float:
+        return now + self.seconds
+
+
+class Daily(Trigger):
+    """Executa todos os dias nos horários indicados (UTC)"""
+    
+    def __init__(self, times: Sequence[dtime]):
+        self.times = sorted(times)
+    
+    def next_run(self, now: float) -> float:
+        current = datetime.fromtimestamp(now, timezone.utc)
+        for days in range(2):
+            day = current.date() + timedelta(days=days)
+            for at in self.times:
+                candidate = datetime.combine(day, at, tzinfo=timezone.utc)
+                if candidate.timestamp() > now:
+                    return candidate.timestamp()
+        return now + 86400
+
+
+class Weekly(Trigger):
+    """Executa uma vez por semana (weekday: 0 = segunda-feira) no horário indicado (UTC)"""
+    
+    def __init__(self, weekday: int, at: dtime):
+        self.weekday = weekday
+        self.at = at
+    
+    def next_run(self, now: float) -> float:
+        current = datetime.fromtimestamp(now, timezone.utc)
+        days_ahead = (self.weekday - current.weekday()) % 7
+        candidate = datetime.combine(current.date() + timedelta(days=days_ahead), self.at, tzinfo=timezone.utc)
+        if candidate.timestamp() <= now:
+            candidate += timedelta(days=7)
+        return candidate.timestamp()
+
+
+class Job:
+    """Uma tarefa agendada com métricas de execução"""
+    
+    def __init__(self, name: str, func: Callable[[], Awaitable[None]],
+                 trigger: Optional[Trigger] = None, after: Sequence[str] = (),
+                 jitter: float = 0.0, run_on_start: bool = False):
+        self.name = name
+        self.func = func
+        self.trigger = trigger  # None = executa uma única vez no startup
+        self.after = list(after)
+        self.jitter = jitter
+        self.run_on_start = run_on_start or trigger is None
+        
+        self.ready = asyncio.Event()  # Primeira execução concluída (libera dependentes)
+        self.running = False
+        self.next_run_at: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        
+        # Métricas
+        self.runs = 0
+        self.failures = 0
+        self.overruns = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_error: Optional[str] = None
+    
+    @property
+    def avg_duration(self) -> float:
+        return self.total_duration / self.runs if self.runs else 0.0
+    
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'runs': self.runs,
+            'failures': self.failures,
+            'overruns': self.overruns,
+            'last_duration': self.last_duration,
+            'avg_duration': self.avg_duration,
+            'max_duration': self.max_duration,
+            'running': self.running,
+            'next_run_at': self.next_run_at,
+            'last_error': self.last_error,
+        }
+
+
+class JobScheduler:
+    """
+    Agendador central.
+    - Gatilhos por intervalo, horário diário ou semanal, com jitter
+    - Dependências: um job só começa depois da primeira execução dos jobs em `after`
+    - Single-flight: nunca roda duas instâncias do mesmo job ao mesmo tempo
+    - Overrun: se a execução passa do próximo horário, os horários perdidos são pulados e contados
+    """
+    
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self._started = False
+    
+    def add_job(self, name: str, func: Callable[[], Awaitable[None]],
+                trigger: Optional[Trigger] = None, after: Sequence[str] = (),
+                jitter: float = 0.0, run_on_start: bool = False) -> Job:
+        """Registra um job (se o agendador já estiver rodando, ele inicia imediatamente)"""
+        if name in self.jobs:
+            self.remove_job(name)
+        
+        job = Job(name, func, trigger, after, jitter, run_on_start)
+        self.jobs[name] = job
+        if self._started:
+            job._task = asyncio.create_task(self._run_job(job))
+        return job
+    
+    def remove_job(self, name: str) -> None:
+        """Cancela e remove um job (usado no cog_unload)"""
+        job = self.jobs.pop(name, None)
+        if job and job._task:
+            job._task.cancel()
+    
+    def start(self) -> None:
+        """Inicia todos os jobs registrados (idempotente - on_ready pode disparar mais de uma vez)"""
+        if self._started:
+            return
+        self._started = True
+        
+        for job in self.jobs.values():
+            job._task = asyncio.create_task(self._run_job(job))
+        print(f"⏱️ Agendador iniciado com {len(self.jobs)} jobs")
+    
+    def trigger_now(self, name: str) -> bool:
+        """Antecipa a próxima execução de um job (ignorado se ele já estiver rodando)"""
+        job = self.jobs.get(name)
+        if not job:
+            return False
+        job._wakeup.set()
+        return True
+    
+    def stats(self) -> List[dict]:
+        return [job.stats() for job in self.jobs.values()]
+    
+    async def _wait_dependencies(self, job: Job) -> None:
+        for dep in job.after:
+            dependency = self.jobs.get(dep)
+            if dependency:
+                await dependency.ready.wait()
+            else:
+                print(f"⚠️ Job '{job.name}' depende de '{dep}', que não está registrado")
+    
+    async def _sleep_until(self, job: Job, when: float) -> None:
+        """Dorme até o horário (ou até trigger_now - inclusive se chamado durante a última execução)"""
+        job.next_run_at = when
+        delay = when - time.time()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(job._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _execute(self, job: Job) -> None:
+        job.running = True
+        started = time.monotonic()
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            print(f"⚠️ Erro no job '{job.name}': {e}")
+        finally:
+            job.running = False
+            duration = time.monotonic() - started
+            job.runs += 1
+            job.last_duration = duration
+            job.total_duration += duration
+            job.max_duration = max(job.max_duration, duration)
+    
+    async def _run_job(self, job: Job) -> None:
+        await self._wait_dependencies(job)
+        
+        if job.run_on_start:
+            await self._execute(job)
+        job.ready.set()
+        
+        if job.trigger is None:
+            return
+        
+        next_at = job.trigger.next_run(time.time())
+        while True:
+            await self._sleep_until(job, next_at + random.uniform(0, job.jitter))
+            
+            job._wakeup.clear()
+            await self._execute(job)
+            
+            # Overrun: a execução atravessou um ou mais horários - pula os perdidos
+            now = time.time()
+            next_at = job.trigger.next_run(next_at)
+            if next_at <= now:
+                skipped = 0
+                while next_at <= now:
+                    next_at = job.trigger.next_run(next_at)
+                    skipped += 1
+                job.overruns += skipped
+                print(f"⚠️ Job '{job.name}' demorou {job.last_duration:.1f}s e perdeu {skipped} execução(ões)")
@@ -3,7 +3,8 @@
 Cálculos de XP, níveis e progressão
 """
 
-from typing import Tuple, Optional
+from bisect import bisect_right
+from typing import Tuple, Optional, List
 import config
 
 
@@ -21,6 +22,22 @@ class XPCalculator:
                 break
         return level
     
+    @staticmethod
+    def get_levels_from_xp_batch(xp_values: List[int]) -> List[int]:
+        """
+        Calcula o nível de vários valores de XP de uma vez (operações em lote).
+        Ordena a curva uma única vez e resolve cada XP por busca binária.
+        """
+        curve = sorted(config.XP_PER_LEVEL.items(), key=lambda item: item[1])
+        thresholds = [required_xp for _, required_xp in curve]
+        levels = [lvl for lvl, _ in curve]
+        
+        result = []
+        for xp in xp_values:
+            index = bisect_right(thresholds, xp or 0) - 1
+            result.append(levels[index] if index >= 0 else 1)
+        return result
+    
     @staticmethod
     def get_xp_for_level(level: int) -> int:
         """Retorna XP necessário para alcançar determinado nível"""